@@ -0,0 +1,107 @@
+"""
+Prison Management System - archive tier
+
+Prisoners who were released, transferred or deceased and have not been
+modified for ``inactive_days`` are moved, with their sentences, visits,
+programs and incidents, into the ``archived_*`` tables, so the hot tables
+(and every list, search and statistic over them) only hold current records.
+``Archiver`` runs ``archive_inactive_prisoners()`` at startup and every
+``interval`` seconds, one batch per transaction, until a batch comes back
+short. Archived records stay readable through the ``include_archived``
+option of the prisoner endpoints.
+"""
+
+import asyncio
+import logging
+
+from backend.db import Database
+
+logger = logging.getLogger(__name__)
+
+# Archive tables, in the order archive_inactive_prisoners() fills them
+ARCHIVE_TABLES = (
+    "archived_prisoners", "archived_sentences", "archived_visits", "archived_prisoner_programs", "archived_incidents",
+)
+
+# Seconds between batches of one run, so archiving does not monopolize the database
+BATCH_PAUSE = 0.1
+
+
+class Archiver:
+    """Background scheduler for ``archive_inactive_prisoners()``; ``interval`` 0 disables it."""
+
+    def __init__(self, db: Database, interval: float = 0.0, batch_size: int = 500, inactive_days: int = 90):
+        self.db = db
+        self.interval = interval
+        self.batch_size = batch_size
+        self.inactive_days = inactive_days
+        self.last_run = None
+        self.last_archived = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    async def start(self):
+        if self.interval:
+            self._task = asyncio.create_task(self._run(), name="archiver")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self, max_batches: int = None) -> int:
+        """Archive batches until none is left (or ``max_batches``); returns the number of prisoners archived."""
+        async with self._lock:
+            archived = 0
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                count = await self.db.fetch_val(
+                    "SELECT archive_inactive_prisoners(%s, make_interval(days => %s))",
+                    (self.batch_size, self.inactive_days),
+                )
+                archived += count
+                batches += 1
+                if count < self.batch_size:
+                    break
+                await asyncio.sleep(BATCH_PAUSE)
+            if archived:
+                logger.info(f"Archived {archived} prisoners in {batches} batches")
+                # Fresh statistics keep the plans (and estimated counts) over the archive accurate
+                await self.db.execute(f"ANALYZE {', '.join(ARCHIVE_TABLES)}")
+            self.last_run = await self.db.fetch_val("SELECT now()")
+            self.last_archived = archived
+            return archived
+
+    async def status(self) -> dict:
+        """Settings, the last run and the number of rows in the hot and archive tables."""
+        counts = await self.db.fetch_one("""
+            SELECT (SELECT COUNT(*) FROM archived_prisoners) AS archived_prisoners,
+                   (SELECT COUNT(*) FROM archived_sentences) AS archived_sentences,
+                   (SELECT COUNT(*) FROM archived_visits) AS archived_visits,
+                   (SELECT COUNT(*) FROM archived_prisoner_programs) AS archived_prisoner_programs,
+                   (SELECT COUNT(*) FROM archived_incidents) AS archived_incidents,
+                   (SELECT COALESCE(SUM(prisoner_count), 0) FROM prisoner_status_counts) AS prisoners,
+                   (SELECT COUNT(*) FROM prisoners
+                    WHERE status IN ('released', 'transferred', 'deceased')
+                      AND updated_at < CURRENT_TIMESTAMP - make_interval(days => %s)) AS eligible_prisoners
+        """, (self.inactive_days,))
+        return {
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "inactive_days": self.inactive_days,
+            "last_run": self.last_run,
+            "last_archived": self.last_archived,
+            "counts": counts,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.warning(f"Archiving failed: {e}")
+            await asyncio.sleep(self.interval)
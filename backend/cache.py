@@ -0,0 +1,166 @@
+"""
+Prison Management System - in-process caches
+
+Caches register the tables they are derived from; write endpoints call
+``invalidate_tables`` (through ``db.after_commit``, so only once the change
+is committed) to drop every dependent entry immediately instead of waiting
+for it to expire.
+"""
+
+import asyncio
+from collections import OrderedDict, defaultdict
+import hashlib
+import time
+from typing import NamedTuple, Optional
+
+# table name -> caches holding data derived from it
+_caches_by_table = defaultdict(list)
+
+
+class TTLCache:
+    """Bounded dict cache whose entries expire ``ttl`` seconds after being stored."""
+
+    def __init__(self, ttl: float, tables=(), max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._loading = {}  # key -> task of the in-flight load
+        self._generation = 0  # bumped by clear() so in-flight loads do not store stale values
+        for table in tables:
+            _caches_by_table[table].append(self)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key, loader):
+        """
+        Return the cached value or ``await loader()`` and cache it.
+
+        Concurrent misses for the same key share one load instead of each
+        querying the database.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._loading[key] = task
+        # A cancelled caller must not cancel the load other callers are waiting for
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader):
+        generation = self._generation
+        try:
+            value = await loader()
+        finally:
+            del self._loading[key]
+        if generation == self._generation:
+            self.set(key, value)
+        return value
+
+    async def get_or_load_many(self, keys, loader) -> dict:
+        """
+        Return ``{key: value}`` for ``keys``, loading every missing key with one ``await loader(missing)``.
+
+        ``loader`` returns a dict; keys it leaves out (e.g. rows that do not
+        exist) are absent from the result and are not cached.
+        """
+        now = time.monotonic()
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                found[key] = entry[1]
+            else:
+                missing.append(key)
+        if missing:
+            generation = self._generation
+            loaded = await loader(missing)
+            if generation == self._generation:
+                for key, value in loaded.items():
+                    self.set(key, value)
+            found.update(loaded)
+        return found
+
+    def discard(self, *keys):
+        """Drop individual entries (and keep loads already in flight from storing stale values)."""
+        for key in keys:
+            self._entries.pop(key, None)
+        self._generation += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+
+def invalidate_tables(*tables: str):
+    """Drop every cache entry derived from any of ``tables``."""
+    for table in tables:
+        for cache in _caches_by_table.get(table, ()):
+            cache.clear()
+
+
+def invalidate_all():
+    for caches in _caches_by_table.values():
+        for cache in caches:
+            cache.clear()
+
+
+def on_table_changed(table: Optional[str]):
+    """
+    ``table_changed`` subscriber keeping caches consistent across workers.
+
+    ``None`` (the listener reconnected and may have missed notifications)
+    drops everything.
+    """
+    if table is None:
+        invalidate_all()
+    else:
+        invalidate_tables(table)
+
+
+# ============================================
+# CONDITIONAL GET
+# ============================================
+
+
+class CachedBody(NamedTuple):
+    """A pre-serialized response body and its entity tag."""
+
+    body: bytes
+    etag: str
+
+
+def make_etag(*parts) -> str:
+    """Strong entity tag over ``parts`` (bytes are hashed as-is, anything else by its repr)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
@@ -0,0 +1,779 @@
+"""
+Prison Management System - Database access layer
+
+Two interchangeable backends sit behind the same async API:
+
+* ``AsyncDatabase`` - native asyncio driver (psycopg 3) with its own pool.
+* ``ThreadedDatabase`` - psycopg2 ``ConnectionPool`` driven from worker threads.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+import csv
+import io
+import logging
+import threading
+import time
+import weakref
+
+import anyio
+import psycopg
+from psycopg import sql as pgsql
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+import psycopg_pool
+import psycopg2
+from psycopg2 import extensions
+from psycopg2 import sql as pg2sql
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the acquire timeout."""
+
+
+class DatabaseError(Exception):
+    """Driver-independent wrapper around an error raised by PostgreSQL."""
+
+    def __init__(self, original: Exception):
+        super().__init__(str(original).strip())
+        self.original = original
+        self.sqlstate = getattr(original, "sqlstate", None) or getattr(original, "pgcode", None)
+
+
+# ============================================
+# INSTRUMENTATION
+# ============================================
+
+# Callbacks told about every statement ``(sql, params, seconds)`` and every connection checkout
+# ``(seconds)``. In threaded mode they run on the worker thread, so they must be cheap and thread-safe.
+_query_observers = []
+_acquire_observers = []
+
+
+def add_query_observer(callback):
+    _query_observers.append(callback)
+
+
+def add_acquire_observer(callback):
+    _acquire_observers.append(callback)
+
+
+def remove_query_observer(callback):
+    _query_observers.remove(callback)
+
+
+def _observe_query(sql, params, started: float):
+    elapsed = time.perf_counter() - started
+    for callback in _query_observers:
+        callback(sql, params, elapsed)
+
+
+def _observe_acquire(started: float):
+    elapsed = time.perf_counter() - started
+    for callback in _acquire_observers:
+        callback(elapsed)
+
+
+class _PooledConnection:
+    """A psycopg2 connection plus the bookkeeping needed to recycle it."""
+
+    __slots__ = ("conn", "created_at", "last_used", "uses")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of psycopg2 connections.
+
+    Connections are health-checked on checkout when they have been idle for
+    longer than ``check_idle`` seconds, and are recycled after ``max_uses``
+    checkouts or once they are older than ``max_lifetime`` seconds.
+    """
+
+    def __init__(
+        self,
+        db_config: dict,
+        min_size: int = 2,
+        max_size: int = 20,
+        acquire_timeout: float = 5.0,
+        max_uses: int = 5000,
+        max_lifetime: float = 1800.0,
+        check_idle: float = 30.0,
+        autocommit: bool = False,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool size must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+        self.autocommit = autocommit
+
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._checked_out = {}
+        self._cond = threading.Condition()
+
+        self._counters = {
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "connections_failed_check": 0,
+            "acquired": 0,
+            "acquire_timeouts": 0,
+            "acquire_wait_seconds_total": 0.0,
+            "acquire_wait_seconds_max": 0.0,
+        }
+
+    # --------------------------------------------
+    # Lifecycle
+    # --------------------------------------------
+
+    def open(self):
+        """Eagerly open ``min_size`` connections."""
+        for _ in range(self.min_size):
+            with self._cond:
+                if self._size >= self.min_size:
+                    break
+                self._size += 1
+            try:
+                pooled = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled.conn)
+
+    # --------------------------------------------
+    # Checkout / return
+    # --------------------------------------------
+
+    def getconn(self):
+        """Check out a healthy connection, waiting up to ``acquire_timeout`` seconds."""
+        observed = time.perf_counter()
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+
+        while True:
+            pooled = None
+            create = False
+            with self._cond:
+                self._waiting += 1
+                try:
+                    while True:
+                        if self._closed:
+                            raise PoolTimeout("Connection pool is closed")
+                        if self._idle:
+                            pooled = self._idle.pop()
+                            break
+                        if self._size < self.max_size:
+                            self._size += 1
+                            create = True
+                            break
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._counters["acquire_timeouts"] += 1
+                            raise PoolTimeout(
+                                f"Timed out after {self.acquire_timeout}s waiting for a database connection"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            if create:
+                try:
+                    pooled = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._in_use += 1
+                self._checked_out[id(pooled.conn)] = pooled
+                self._counters["acquired"] += 1
+                self._counters["acquire_wait_seconds_total"] += waited
+                if waited > self._counters["acquire_wait_seconds_max"]:
+                    self._counters["acquire_wait_seconds_max"] = waited
+
+            pooled.uses += 1
+            _observe_acquire(observed)
+            return pooled.conn
+
+    def putconn(self, conn):
+        """Return a connection to the pool, rolling back any open transaction."""
+        with self._cond:
+            pooled = self._checked_out.pop(id(conn), None)
+            if pooled is None:
+                raise ValueError("Connection does not belong to this pool")
+            self._in_use -= 1
+
+        if not conn.closed and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._close_quietly(conn)
+
+        if conn.closed or self._closed or self._is_expired(pooled):
+            self._discard(pooled)
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    # --------------------------------------------
+    # Statistics
+    # --------------------------------------------
+
+    def stats(self) -> dict:
+        """Return a snapshot of pool sizing and counters."""
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                **self._counters,
+            }
+
+    # --------------------------------------------
+    # Internals
+    # --------------------------------------------
+
+    def _connect(self) -> _PooledConnection:
+        conn = psycopg2.connect(**self.db_config, cursor_factory=RealDictCursor)
+        conn.autocommit = self.autocommit
+        with self._cond:
+            self._counters["connections_created"] += 1
+        return _PooledConnection(conn)
+
+    def _is_expired(self, pooled: _PooledConnection) -> bool:
+        if self.max_uses and pooled.uses >= self.max_uses:
+            return True
+        if self.max_lifetime and time.monotonic() - pooled.created_at >= self.max_lifetime:
+            return True
+        return False
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        if pooled.conn.closed or self._is_expired(pooled):
+            return False
+        if time.monotonic() - pooled.last_used < self.check_idle:
+            return True
+        try:
+            with pooled.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            pooled.conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding pooled connection that failed health check: {e}")
+            with self._cond:
+                self._counters["connections_failed_check"] += 1
+            return False
+
+    def _discard(self, pooled: _PooledConnection):
+        self._close_quietly(pooled.conn)
+        with self._cond:
+            self._size -= 1
+            self._counters["connections_recycled"] += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# ============================================
+# ASYNC QUERY API
+# ============================================
+
+
+class QueryRunner(ABC):
+    """Query helpers shared by databases and transaction-bound sessions."""
+
+    async def fetch_all(self, sql: str, params=None) -> list:
+        """Run a statement and return every row as a dict."""
+        return await self._execute(sql, params, "all")
+
+    async def fetch_one(self, sql: str, params=None):
+        """Run a statement and return the first row, or None."""
+        return await self._execute(sql, params, "one")
+
+    async def fetch_val(self, sql: str, params=None):
+        """Run a statement and return the first column of the first row."""
+        row = await self._execute(sql, params, "one")
+        return next(iter(row.values())) if row else None
+
+    async def execute(self, sql: str, params=None) -> int:
+        """Run a statement and return the number of affected rows."""
+        return await self._execute(sql, params, "none")
+
+    @abstractmethod
+    async def copy_rows(self, table: str, columns, rows) -> int:
+        """Load ``rows`` (sequences matching ``columns``) into ``table`` with ``COPY FROM STDIN``."""
+
+    @abstractmethod
+    async def _execute(self, sql: str, params, fetch: str):
+        """Run ``sql`` and return all rows, the first row or the row count, by ``fetch``."""
+
+    def after_commit(self, callback, *args):
+        """Call ``callback(*args)`` once what was run so far is committed; standalone statements already are."""
+        callback(*args)
+
+
+class Session(QueryRunner):
+    """
+    Base class for queries bound to one connection inside a transaction.
+
+    ``after_commit`` callbacks wait for the outermost transaction to commit;
+    a savepoint that rolls back drops the ones registered inside it, and a
+    transaction that rolls back drops them all.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._after_commit = []
+
+    def after_commit(self, callback, *args):
+        self._after_commit.append((callback, args))
+
+    def _committed(self):
+        callbacks, self._after_commit = self._after_commit, []
+        for callback, args in callbacks:
+            callback(*args)
+
+
+class Database(QueryRunner):
+    """
+    Base class for the async database facade.
+
+    Standalone ``fetch_*``/``execute`` calls run in autocommit mode on a pooled
+    connection; ``transaction()`` pins one connection and yields a session
+    whose nested ``transaction()`` calls become savepoints.
+    """
+
+    mode = ""
+
+    @abstractmethod
+    async def open(self):
+        """Open the pool, waiting for its first connections."""
+
+    @abstractmethod
+    async def close(self):
+        """Close the pool and its connections."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Pool statistics, as reported by the health check and the metrics endpoint."""
+
+    @abstractmethod
+    def transaction(self):
+        """Async context manager pinning one connection to a transaction and yielding its session."""
+
+    @abstractmethod
+    def stream(self, sql: str, params=None, batch_size: int = 1000):
+        """
+        Async iterator over the result in lists of up to ``batch_size`` dict rows.
+
+        Rows come from a server-side cursor, so memory stays flat however large
+        the result is; the connection is held until the iterator is exhausted or closed.
+        """
+
+
+class AsyncSession(Session):
+    """Queries bound to one psycopg 3 async connection."""
+
+    def __init__(self, conn: psycopg.AsyncConnection):
+        super().__init__()
+        self.conn = conn
+
+    async def _execute(self, sql: str, params, fetch: str):
+        started = time.perf_counter()
+        try:
+            cur = await self.conn.execute(sql, params)
+            if fetch == "all":
+                return await cur.fetchall()
+            if fetch == "one":
+                return await cur.fetchone()
+            return cur.rowcount
+        except psycopg.Error as e:
+            raise DatabaseError(e) from e
+        finally:
+            _observe_query(sql, params, started)
+
+    async def copy_rows(self, table: str, columns, rows) -> int:
+        query = pgsql.SQL("COPY {} ({}) FROM STDIN").format(
+            pgsql.Identifier(table), pgsql.SQL(", ").join(map(pgsql.Identifier, columns))
+        )
+        count = 0
+        started = time.perf_counter()
+        try:
+            async with self.conn.cursor() as cur:
+                async with cur.copy(query) as copy:
+                    for row in rows:
+                        await copy.write_row(row)
+                        count += 1
+        except psycopg.Error as e:
+            raise DatabaseError(e) from e
+        finally:
+            _observe_query(f"COPY {table} FROM STDIN", None, started)
+        return count
+
+    @asynccontextmanager
+    async def transaction(self):
+        mark = len(self._after_commit)
+        self._depth += 1
+        try:
+            async with self.conn.transaction():
+                yield self
+        except BaseException as e:
+            del self._after_commit[mark:]
+            if isinstance(e, psycopg.Error):
+                raise DatabaseError(e) from e
+            raise
+        finally:
+            self._depth -= 1
+        if not self._depth:
+            self._committed()
+
+
+class AsyncDatabase(Database):
+    """Database facade backed by psycopg 3 and ``psycopg_pool.AsyncConnectionPool``."""
+
+    mode = "async"
+
+    def __init__(
+        self,
+        db_config: dict,
+        min_size: int = 2,
+        max_size: int = 20,
+        acquire_timeout: float = 5.0,
+        max_uses: int = 5000,
+        max_lifetime: float = 1800.0,
+        check_idle: float = 30.0,
+    ):
+        self.max_uses = max_uses
+        self.check_idle = check_idle
+        self._uses = weakref.WeakKeyDictionary()
+        self._last_used = weakref.WeakKeyDictionary()
+        self._recycled = 0
+        self._pool = psycopg_pool.AsyncConnectionPool(
+            make_conninfo(**db_config),
+            kwargs={"autocommit": True, "row_factory": dict_row},
+            min_size=min_size,
+            max_size=max_size,
+            timeout=acquire_timeout,
+            max_lifetime=max_lifetime,
+            check=self._check,
+            open=False,
+            name="prison-async",
+        )
+
+    async def open(self):
+        await self._pool.open(wait=True, timeout=self._pool.timeout)
+
+    async def close(self):
+        await self._pool.close()
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, **self._pool.get_stats(), "connections_recycled": self._recycled}
+
+    async def _check(self, conn: psycopg.AsyncConnection):
+        if time.monotonic() - self._last_used.get(conn, 0.0) >= self.check_idle:
+            await psycopg_pool.AsyncConnectionPool.check_connection(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        """Check out a raw psycopg 3 connection, recycling it after ``max_uses``."""
+        started = time.perf_counter()
+        try:
+            conn = await self._pool.getconn()
+        except psycopg_pool.PoolTimeout as e:
+            raise PoolTimeout(str(e)) from e
+        _observe_acquire(started)
+        try:
+            yield conn
+        finally:
+            uses = self._uses.get(conn, 0) + 1
+            self._uses[conn] = uses
+            self._last_used[conn] = time.monotonic()
+            if self.max_uses and uses >= self.max_uses:
+                self._recycled += 1
+                await conn.close()
+            await self._pool.putconn(conn)
+
+    async def _execute(self, sql: str, params, fetch: str):
+        async with self.connection() as conn:
+            return await AsyncSession(conn)._execute(sql, params, fetch)
+
+    async def copy_rows(self, table: str, columns, rows) -> int:
+        async with self.connection() as conn:
+            return await AsyncSession(conn).copy_rows(table, columns, rows)
+
+    @asynccontextmanager
+    async def transaction(self):
+        async with self.connection() as conn:
+            async with AsyncSession(conn).transaction() as session:
+                yield session
+
+    async def stream(self, sql: str, params=None, batch_size: int = 1000):
+        async with self.connection() as conn:
+            try:
+                # Server-side cursors only live inside a transaction
+                async with conn.transaction():
+                    async with conn.cursor(name="stream") as cur:
+                        started = time.perf_counter()
+                        try:
+                            await cur.execute(sql, params)
+                        finally:
+                            _observe_query(sql, params, started)
+                        while rows := await cur.fetchmany(batch_size):
+                            yield rows
+            except psycopg.Error as e:
+                raise DatabaseError(e) from e
+
+
+class ThreadedSession(Session):
+    """Queries bound to one psycopg2 connection, executed on worker threads."""
+
+    def __init__(self, db: "ThreadedDatabase", conn):
+        super().__init__()
+        self.db = db
+        self.conn = conn
+
+    async def _execute(self, sql: str, params, fetch: str):
+        return await self.db.run_sync(_execute_blocking, self.conn, sql, params, fetch)
+
+    async def copy_rows(self, table: str, columns, rows) -> int:
+        return await self.db.run_sync(_copy_blocking, self.conn, table, columns, rows)
+
+    @asynccontextmanager
+    async def transaction(self):
+        mark = len(self._after_commit)
+        self._depth += 1
+        savepoint = f"sp_{self._depth}"
+        await self.execute(f"SAVEPOINT {savepoint}")
+        try:
+            yield self
+        except BaseException:
+            del self._after_commit[mark:]
+            await self.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            raise
+        else:
+            await self.execute(f"RELEASE SAVEPOINT {savepoint}")
+        finally:
+            self._depth -= 1
+
+
+def _execute_blocking(conn, sql: str, params, fetch: str):
+    started = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            if fetch == "all":
+                return cur.fetchall()
+            if fetch == "one":
+                return cur.fetchone()
+            return cur.rowcount
+    except psycopg2.Error as e:
+        raise DatabaseError(e) from e
+    finally:
+        _observe_query(sql, params, started)
+
+
+def _copy_blocking(conn, table: str, columns, rows) -> int:
+    # psycopg2 copies from a file-like object; CSV writes None as an unquoted empty field, i.e. NULL
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    buffer.seek(0)
+    query = pg2sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        pg2sql.Identifier(table), pg2sql.SQL(", ").join(map(pg2sql.Identifier, columns))
+    )
+    started = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            cur.copy_expert(query, buffer)
+    except psycopg2.Error as e:
+        raise DatabaseError(e) from e
+    finally:
+        _observe_query(f"COPY {table} FROM STDIN", None, started)
+    return count
+
+
+def _open_stream_blocking(conn, sql: str, params):
+    # psycopg2 refuses named cursors on autocommit connections; the stream gets its own transaction
+    conn.autocommit = False
+    started = time.perf_counter()
+    try:
+        cur = conn.cursor(name="stream")
+        cur.execute(sql, params)
+        return cur
+    except psycopg2.Error as e:
+        raise DatabaseError(e) from e
+    finally:
+        _observe_query(sql, params, started)
+
+
+def _fetch_stream_blocking(cur, batch_size: int) -> list:
+    try:
+        return cur.fetchmany(batch_size)
+    except psycopg2.Error as e:
+        raise DatabaseError(e) from e
+
+
+def _close_stream_blocking(conn):
+    try:
+        conn.rollback()
+        conn.autocommit = True
+    except psycopg2.Error:
+        conn.close()  # the pool discards closed connections
+
+
+class ThreadedDatabase(Database):
+    """Database facade backed by the psycopg2 ``ConnectionPool`` and bounded thread limiters."""
+
+    mode = "threaded"
+
+    def __init__(self, db_config: dict, **pool_config):
+        self._pool = ConnectionPool(db_config, autocommit=True, **pool_config)
+        self._limiter = None
+        self._acquire_limiter = None
+
+    async def open(self):
+        # Statements only run for callers already holding a connection, so max_size threads always
+        # suffice for them; checkouts wait on threads of their own, which can never take those slots
+        self._limiter = anyio.CapacityLimiter(self._pool.max_size)
+        self._acquire_limiter = anyio.CapacityLimiter(self._pool.max_size)
+        await anyio.to_thread.run_sync(self._pool.open)
+
+    async def close(self):
+        await anyio.to_thread.run_sync(self._pool.close)
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, **self._pool.stats()}
+
+    async def run_sync(self, func, *args):
+        """Run a blocking call on a worker thread."""
+        return await anyio.to_thread.run_sync(func, *args, limiter=self._limiter)
+
+    async def getconn(self):
+        """Check out a connection, waiting up to the pool's ``acquire_timeout`` outside the statement limiter."""
+        return await anyio.to_thread.run_sync(self._pool.getconn, limiter=self._acquire_limiter)
+
+    async def _execute(self, sql: str, params, fetch: str):
+        conn = await self.getconn()
+        # Shielded so a cancelled caller cannot skip the call that returns the connection
+        with anyio.CancelScope(shield=True):
+            return await self.run_sync(self._execute_pooled, conn, sql, params, fetch)
+
+    def _execute_pooled(self, conn, sql: str, params, fetch: str):
+        try:
+            return _execute_blocking(conn, sql, params, fetch)
+        finally:
+            self._pool.putconn(conn)
+
+    async def copy_rows(self, table: str, columns, rows) -> int:
+        conn = await self.getconn()
+        with anyio.CancelScope(shield=True):
+            return await self.run_sync(self._copy_pooled, conn, table, columns, rows)
+
+    def _copy_pooled(self, conn, table: str, columns, rows) -> int:
+        try:
+            return _copy_blocking(conn, table, columns, rows)
+        finally:
+            self._pool.putconn(conn)
+
+    async def stream(self, sql: str, params=None, batch_size: int = 1000):
+        conn = await self.getconn()
+        try:
+            cur = await self.run_sync(_open_stream_blocking, conn, sql, params)
+            while rows := await self.run_sync(_fetch_stream_blocking, cur, batch_size):
+                yield rows
+        finally:
+            # Shielded: a cancelled consumer (a client leaving an export) must still end the
+            # cursor's transaction and return the connection
+            with anyio.CancelScope(shield=True):
+                await self.run_sync(_close_stream_blocking, conn)
+                await self.run_sync(self._pool.putconn, conn)
+
+    @asynccontextmanager
+    async def transaction(self):
+        conn = await self.getconn()
+        try:
+            session = ThreadedSession(self, conn)
+            await session.execute("BEGIN")
+            try:
+                yield session
+            except BaseException:
+                with anyio.CancelScope(shield=True):
+                    await session.execute("ROLLBACK")
+                raise
+            else:
+                await session.execute("COMMIT")
+        finally:
+            # Shielded, or a cancelled caller would keep the pool slot forever
+            with anyio.CancelScope(shield=True):
+                await self.run_sync(self._pool.putconn, conn)
+        session._committed()
+
+
+def create_database(mode: str, db_config: dict, pool_config: dict) -> Database:
+    """Build the database facade for ``DB_MODE`` (``async`` or ``threaded``)."""
+    if mode == "async":
+        return AsyncDatabase(db_config, **pool_config)
+    if mode == "threaded":
+        return ThreadedDatabase(db_config, **pool_config)
+    raise ValueError(f"Unknown DB_MODE {mode!r}; expected 'async' or 'threaded'")
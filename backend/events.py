@@ -0,0 +1,77 @@
+"""
+Prison Management System - Postgres LISTEN/NOTIFY listener
+
+One dedicated connection per worker LISTENs on the channels that have
+subscribers and hands each payload to their callbacks. The connection is
+independent of the query pool (and of ``DB_MODE``) and reconnects on its own.
+"""
+
+import asyncio
+from collections import defaultdict
+import logging
+
+import psycopg
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeListener:
+    """
+    Dispatch Postgres notifications to in-process subscribers.
+
+    Callbacks run on the event loop and must not block. After every
+    (re)connect each callback is invoked with ``None``: notifications sent
+    while the listener was disconnected are lost, so subscribers should treat
+    it as "anything may have changed".
+    """
+
+    def __init__(self, db_config: dict, reconnect_delay: float = 2.0):
+        self._conninfo = make_conninfo(**db_config)
+        self.reconnect_delay = reconnect_delay
+        self._callbacks = defaultdict(list)
+        self._task = None
+        self.connected = False
+
+    def subscribe(self, channel: str, callback):
+        """Call ``callback(payload)`` for every notification on ``channel``; subscribe before ``start()``."""
+        self._callbacks[channel].append(callback)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="change-listener")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, channel: str, payload):
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception(f"Notification handler for {channel} failed")
+
+    async def _run(self):
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True) as conn:
+                    for channel in self._callbacks:
+                        await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+                    self.connected = True
+                    for channel in self._callbacks:
+                        self._dispatch(channel, None)
+                    async for notify in conn.notifies():
+                        self._dispatch(notify.channel, notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Change listener disconnected: {e}")
+            finally:
+                self.connected = False
+            await asyncio.sleep(self.reconnect_delay)
@@ -0,0 +1,91 @@
+"""
+Prison Management System - streaming exports
+
+Exports read through ``Database.stream`` (a server-side cursor fetched in
+batches) and encode each batch as CSV or NDJSON as soon as it arrives, so a
+response of any size starts immediately and runs in constant memory.
+"""
+
+import csv
+from datetime import date, datetime, time
+from decimal import Decimal
+import io
+import json
+
+from backend.db import Database
+
+# export name -> (query, materialized report). Queries of materialized reports select from
+# ``{view}``, which becomes ``mv_<report>`` or, for fresh exports, ``v_<report>``.
+EXPORTS = {
+    # Views
+    "prisoner-details": ("SELECT * FROM {view} ORDER BY prisoner_id", "prisoner_details"),
+    "block-summary": ("SELECT * FROM {view} ORDER BY block_name", "block_summary"),
+    "cell-occupancy": ("SELECT * FROM v_cell_occupancy", None),
+    "upcoming-releases": (
+        "SELECT * FROM v_upcoming_releases"
+        " WHERE release_date <= (CURRENT_DATE + make_interval(months => %(months)s))::DATE",
+        None,
+    ),
+    "release-forecast": ("SELECT * FROM v_release_forecast ORDER BY release_date NULLS LAST, prisoner_id", None),
+    "staff-overview": ("SELECT * FROM v_staff_overview", None),
+    # Tables
+    "prisoners": ("SELECT * FROM prisoners ORDER BY id", None),
+    "sentences": ("SELECT * FROM sentences ORDER BY id", None),
+    "cells": ("SELECT * FROM cells ORDER BY id", None),
+    "cell-blocks": ("SELECT * FROM cell_blocks ORDER BY id", None),
+    "staff": ("SELECT * FROM staff ORDER BY id", None),
+    "visitors": ("SELECT * FROM visitors ORDER BY id", None),
+    "visits": ("SELECT * FROM visits ORDER BY id", None),
+    "programs": ("SELECT * FROM programs ORDER BY id", None),
+    "prisoner-programs": ("SELECT * FROM prisoner_programs ORDER BY id", None),
+    "incidents": ("SELECT * FROM incidents ORDER BY id", None),
+}
+
+# export name -> the export endpoint's query arguments its query takes as parameters
+EXPORT_PARAMS = {"upcoming-releases": ("months",)}
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def export_query(name: str, fresh: bool = False, **arguments) -> tuple:
+    """Query of export ``name`` and its parameters, picked from ``arguments``."""
+    query, report = EXPORTS[name]
+    if report:
+        query = query.format(view=f"v_{report}" if fresh else f"mv_{report}")
+    names = EXPORT_PARAMS.get(name)
+    return query, ({key: arguments[key] for key in names} if names else None)
+
+
+def _json_default(value):
+    # Same representations the JSON endpoints produce
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date, time)) else value
+
+
+def _encode_csv(rows: list, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(rows[0].keys())
+    for row in rows:
+        writer.writerow(map(_csv_value, row.values()))
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows: list) -> str:
+    return "".join(json.dumps(row, default=_json_default) + "\n" for row in rows)
+
+
+async def export_stream(db: Database, query: str, params, fmt: str, batch_size: int = 1000):
+    """Yield the encoded export of ``query`` one fetched batch at a time."""
+    first = True
+    async for rows in db.stream(query, params, batch_size=batch_size):
+        yield _encode_csv(rows, header=first) if fmt == "csv" else _encode_ndjson(rows)
+        first = False
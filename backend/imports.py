@@ -0,0 +1,590 @@
+"""
+Prison Management System - bulk imports
+
+An upload (CSV with a header row, or NDJSON) is parsed and type-checked in
+Python as it streams in, loaded batch by batch with ``COPY`` into a
+temporary staging table and validated there with set-based SQL - the same
+rules the row triggers and constraints enforce, evaluated for the whole
+batch in a handful of statements. The
+rows that pass are merged into the target table with one ``INSERT ...
+SELECT`` in the same transaction; the rest come back in a per-row report.
+"""
+
+import codecs
+import csv
+from datetime import date, datetime, time as dtime
+import io
+import json
+import re
+import time
+from typing import NamedTuple
+
+import anyio
+
+from backend.db import Database
+
+STAGING_TABLE = "import_staging"
+
+# Parsed rows staged per COPY, so memory stays bounded however large the upload is
+STAGING_BATCH_ROWS = 10000
+
+
+class ImportFormatError(ValueError):
+    """The upload as a whole cannot be parsed (bad encoding, missing CSV header, unknown format)."""
+
+
+class ImportSpec(NamedTuple):
+    """How rows for one table are parsed, defaulted, validated and merged."""
+
+    table: str
+    columns: dict  # column -> SQL type (INTEGER, DATE, TIME, TIMESTAMP, TEXT or VARCHAR(n))
+    required: tuple
+    choices: dict  # column -> allowed values
+    defaults: dict  # column -> SQL expression used when the value is missing
+    checks: tuple  # SELECT line, message FROM import_staging s ... (rows to reject)
+    batch_checks: tuple = ()  # checks that depend on the other accepted rows, run after ``checks``
+    tables: tuple = ()  # caches to invalidate after a merge
+    derived: dict = {}  # column -> SQL type, staged empty, filled by ``prepare`` and merged with ``columns``
+    prepare: tuple = ()  # statements run on the accepted rows before the merge
+
+
+PRISONER_IMPORT = ImportSpec(
+    table="prisoners",
+    columns={
+        "prisoner_number": "VARCHAR(20)",
+        "first_name": "VARCHAR(100)",
+        "last_name": "VARCHAR(100)",
+        "date_of_birth": "DATE",
+        "gender": "VARCHAR(10)",
+        "nationality": "VARCHAR(50)",
+        "cell_id": "INTEGER",
+        "admission_date": "DATE",
+        "status": "VARCHAR(20)",
+        "blood_type": "VARCHAR(5)",
+        "emergency_contact_name": "VARCHAR(200)",
+        "emergency_contact_phone": "VARCHAR(20)",
+        "notes": "TEXT",
+    },
+    required=("prisoner_number", "first_name", "last_name", "date_of_birth", "gender", "nationality"),
+    choices={
+        "gender": ("male", "female", "other"),
+        "status": ("incarcerated", "released", "transferred", "deceased", "escaped"),
+        "blood_type": ("A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"),
+    },
+    defaults={"admission_date": "CURRENT_DATE", "status": "'incarcerated'"},
+    checks=(
+        """
+        SELECT s.line, 'date_of_birth: prisoner must be at least 18 years old'
+        FROM import_staging s
+        WHERE s.date_of_birth > CURRENT_DATE - INTERVAL '18 years'
+        """,
+        """
+        SELECT line, 'prisoner_number ' || prisoner_number || ' appears earlier in the file'
+        FROM (
+            SELECT line, prisoner_number, ROW_NUMBER() OVER (PARTITION BY prisoner_number ORDER BY line) AS seen
+            FROM import_staging
+            WHERE prisoner_number IS NOT NULL
+        ) numbered
+        WHERE seen > 1
+        """,
+        """
+        SELECT s.line, 'prisoner_number ' || s.prisoner_number || ' already exists'
+        FROM import_staging s
+        JOIN prisoners p ON p.prisoner_number = s.prisoner_number
+        """,
+        # check_archived_prisoner_number
+        """
+        SELECT s.line, 'prisoner_number ' || s.prisoner_number || ' belongs to an archived prisoner'
+        FROM import_staging s
+        JOIN archived_prisoners a ON a.prisoner_number = s.prisoner_number
+        """,
+        """
+        SELECT s.line, 'cell_id ' || s.cell_id || ' does not exist'
+        FROM import_staging s
+        LEFT JOIN cells c ON c.id = s.cell_id
+        WHERE s.cell_id IS NOT NULL AND c.id IS NULL
+        """,
+    ),
+    batch_checks=(
+        # check_cell_capacity for the whole batch: earlier lines take the free places first.
+        # The cells are locked so concurrent placements cannot fill them before the merge.
+        """
+        WITH target_cells AS (
+            SELECT id, cell_code, capacity, current_occupancy
+            FROM cells
+            WHERE id IN (SELECT cell_id FROM import_staging)
+            ORDER BY id
+            FOR UPDATE
+        )
+        SELECT line, 'Cell ' || cell_code || ' is at full capacity (' || capacity || ' places)'
+        FROM (
+            SELECT s.line, c.cell_code, c.capacity,
+                   c.current_occupancy + ROW_NUMBER() OVER (PARTITION BY s.cell_id ORDER BY s.line) AS occupancy
+            FROM import_staging s
+            JOIN target_cells c ON c.id = s.cell_id
+            WHERE s.status = 'incarcerated'
+        ) placed
+        WHERE occupancy > capacity
+        """,
+    ),
+    tables=("prisoners", "cells", "cell_blocks"),
+)
+
+VISIT_IMPORT = ImportSpec(
+    table="visits",
+    columns={
+        "prisoner_id": "INTEGER",
+        "visitor_id": "INTEGER",
+        "visiting_room_id": "INTEGER",
+        "visit_date": "DATE",
+        "scheduled_start_time": "TIME",
+        "scheduled_end_time": "TIME",
+        "status": "VARCHAR(20)",
+        "visit_type": "VARCHAR(20)",
+        "approved_by_staff_id": "INTEGER",
+        "notes": "TEXT",
+    },
+    required=("prisoner_id", "visitor_id", "visit_date", "scheduled_start_time", "scheduled_end_time"),
+    choices={
+        "status": ("scheduled", "completed", "cancelled", "no_show"),
+        "visit_type": ("regular", "legal", "family", "conjugal"),
+    },
+    defaults={"status": "'scheduled'", "visit_type": "'regular'"},
+    checks=(
+        """
+        SELECT s.line, 'scheduled_end_time must be after scheduled_start_time'
+        FROM import_staging s
+        WHERE s.scheduled_end_time <= s.scheduled_start_time
+        """,
+        """
+        SELECT s.line, 'prisoner_id ' || s.prisoner_id || ' does not exist'
+        FROM import_staging s
+        LEFT JOIN prisoners p ON p.id = s.prisoner_id
+        WHERE s.prisoner_id IS NOT NULL AND p.id IS NULL
+        """,
+        """
+        SELECT s.line, 'visitor_id ' || s.visitor_id || ' does not exist'
+        FROM import_staging s
+        LEFT JOIN visitors v ON v.id = s.visitor_id
+        WHERE s.visitor_id IS NOT NULL AND v.id IS NULL
+        """,
+        # check_visitor_blacklist
+        """
+        SELECT s.line, 'Visitor ' || v.first_name || ' ' || v.last_name || ' is blacklisted and cannot schedule visits'
+        FROM import_staging s
+        JOIN visitors v ON v.id = s.visitor_id
+        WHERE v.is_blacklisted
+        """,
+        """
+        SELECT s.line, 'approved_by_staff_id ' || s.approved_by_staff_id || ' does not exist'
+        FROM import_staging s
+        LEFT JOIN staff st ON st.id = s.approved_by_staff_id
+        WHERE s.approved_by_staff_id IS NOT NULL AND st.id IS NULL
+        """,
+        """
+        SELECT s.line, 'visiting_room_id ' || s.visiting_room_id || ' does not exist'
+        FROM import_staging s
+        LEFT JOIN visiting_rooms r ON r.id = s.visiting_room_id
+        WHERE s.visiting_room_id IS NOT NULL AND r.id IS NULL
+        """,
+        # assign_visit_booth: only visits that occupy a booth need the room open
+        """
+        SELECT s.line, CASE WHEN NOT r.is_active THEN 'Visiting room ' || r.name || ' is closed'
+                            ELSE 'Visiting room ' || r.name || ' is open from ' || r.opens_at || ' to ' || r.closes_at END
+        FROM import_staging s
+        JOIN visiting_rooms r ON r.id = s.visiting_room_id
+        WHERE s.status IN ('scheduled', 'completed')
+          AND (NOT r.is_active OR s.scheduled_start_time < r.opens_at OR s.scheduled_end_time > r.closes_at)
+        """,
+        # no_overlapping_prisoner_visits
+        """
+        SELECT s.line, 'Prisoner ' || s.prisoner_id || ' already has a visit at that time'
+        FROM import_staging s
+        WHERE s.status IN ('scheduled', 'completed')
+          AND s.visit_date IS NOT NULL
+          AND s.scheduled_end_time > s.scheduled_start_time
+          AND EXISTS (
+              SELECT 1 FROM visit_bookings b
+              WHERE b.prisoner_id = s.prisoner_id
+                AND b.during && tsrange(s.visit_date + s.scheduled_start_time, s.visit_date + s.scheduled_end_time)
+          )
+        """,
+    ),
+    batch_checks=(
+        # no_overlapping_prisoner_visits within the file: earlier lines keep their time
+        """
+        SELECT s.line, 'Prisoner ' || s.prisoner_id || ' has an overlapping visit on line ' || MIN(e.line)
+        FROM import_staging s
+        JOIN import_staging e
+          ON e.prisoner_id = s.prisoner_id
+         AND e.visit_date = s.visit_date
+         AND e.line < s.line
+         AND e.scheduled_start_time < s.scheduled_end_time
+         AND s.scheduled_start_time < e.scheduled_end_time
+        WHERE s.status IN ('scheduled', 'completed') AND e.status IN ('scheduled', 'completed')
+        GROUP BY s.line, s.prisoner_id
+        """,
+        # assign_visit_booth gives each visit the lowest free booth, so one fits unless as many
+        # bookings as the room has booths overlap it: booked visits plus earlier lines of the file
+        """
+        SELECT s.line, 'Visiting room ' || r.name || ' has no free booth at that time'
+        FROM import_staging s
+        JOIN visiting_rooms r ON r.id = s.visiting_room_id
+        WHERE s.status IN ('scheduled', 'completed')
+          AND (
+              SELECT COUNT(*) FROM visit_bookings b
+              WHERE b.visiting_room_id = s.visiting_room_id
+                AND b.during && tsrange(s.visit_date + s.scheduled_start_time, s.visit_date + s.scheduled_end_time)
+          ) + (
+              SELECT COUNT(*) FROM import_staging e
+              WHERE e.visiting_room_id = s.visiting_room_id
+                AND e.visit_date = s.visit_date
+                AND e.line < s.line
+                AND e.status IN ('scheduled', 'completed')
+                AND e.scheduled_start_time < s.scheduled_end_time
+                AND s.scheduled_start_time < e.scheduled_end_time
+          ) >= r.booths
+        """,
+    ),
+    tables=("visits",),
+    # assign_visit_booth picks a booth from visit_bookings, which trg_sync_visit_booking only fills
+    # once the whole INSERT has run, so every row of one merge would get the same booth; the
+    # booths are given here instead, lowest free first in line order, and the trigger keeps them
+    derived={"booth": "INTEGER"},
+    prepare=(
+        """
+        DO $$
+        DECLARE
+            v_row RECORD;
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('visiting_room'), room_id)
+            FROM (SELECT DISTINCT visiting_room_id AS room_id FROM import_staging
+                  WHERE visiting_room_id IS NOT NULL ORDER BY 1) rooms;
+            FOR v_row IN
+                SELECT s.line, s.visiting_room_id, r.booths,
+                       tsrange(s.visit_date + s.scheduled_start_time, s.visit_date + s.scheduled_end_time) AS during
+                FROM import_staging s
+                JOIN visiting_rooms r ON r.id = s.visiting_room_id
+                WHERE s.status IN ('scheduled', 'completed')
+                ORDER BY s.line
+            LOOP
+                UPDATE import_staging SET booth = (
+                    SELECT booth.n
+                    FROM generate_series(1, v_row.booths) AS booth(n)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM visit_bookings b
+                        WHERE b.visiting_room_id = v_row.visiting_room_id AND b.booth = booth.n
+                          AND b.during && v_row.during
+                    )
+                      AND NOT EXISTS (
+                        SELECT 1 FROM import_staging e
+                        WHERE e.visiting_room_id = v_row.visiting_room_id AND e.booth = booth.n
+                          AND tsrange(e.visit_date + e.scheduled_start_time, e.visit_date + e.scheduled_end_time)
+                              && v_row.during
+                    )
+                    ORDER BY booth.n
+                    LIMIT 1
+                )
+                WHERE line = v_row.line;
+            END LOOP;
+        END
+        $$
+        """,
+    ),
+)
+
+INCIDENT_IMPORT = ImportSpec(
+    table="incidents",
+    columns={
+        "prisoner_id": "INTEGER",
+        "reported_by_staff_id": "INTEGER",
+        "incident_date": "TIMESTAMP",
+        "incident_type": "VARCHAR(50)",
+        "severity": "VARCHAR(20)",
+        "location": "VARCHAR(100)",
+        "description": "TEXT",
+        "action_taken": "TEXT",
+        "solitary_days": "INTEGER",
+    },
+    required=("prisoner_id", "incident_type", "severity", "description"),
+    choices={
+        "incident_type": (
+            "fight", "contraband", "escape_attempt", "assault_staff", "property_damage", "disobedience", "other",
+        ),
+        "severity": ("minor", "moderate", "major", "critical"),
+    },
+    defaults={"incident_date": "CURRENT_TIMESTAMP", "solitary_days": "0"},
+    checks=(
+        """
+        SELECT s.line, 'solitary_days cannot be negative'
+        FROM import_staging s
+        WHERE s.solitary_days < 0
+        """,
+        """
+        SELECT s.line, 'prisoner_id ' || s.prisoner_id || ' does not exist'
+        FROM import_staging s
+        LEFT JOIN prisoners p ON p.id = s.prisoner_id
+        WHERE s.prisoner_id IS NOT NULL AND p.id IS NULL
+        """,
+        """
+        SELECT s.line, 'reported_by_staff_id ' || s.reported_by_staff_id || ' does not exist'
+        FROM import_staging s
+        LEFT JOIN staff st ON st.id = s.reported_by_staff_id
+        WHERE s.reported_by_staff_id IS NOT NULL AND st.id IS NULL
+        """,
+    ),
+    tables=("incidents",),
+)
+
+IMPORTS = {spec.table: spec for spec in (PRISONER_IMPORT, VISIT_IMPORT, INCIDENT_IMPORT)}
+
+
+# ============================================
+# PARSING
+# ============================================
+
+
+PARSERS = {
+    "DATE": (date.fromisoformat, "a date (YYYY-MM-DD)"),
+    "TIME": (dtime.fromisoformat, "a time (HH:MM[:SS])"),
+    "TIMESTAMP": (datetime.fromisoformat, "a timestamp (YYYY-MM-DD HH:MM[:SS])"),
+}
+
+
+def _parse_value(value, sql_type: str):
+    """Convert one field to the Python value COPY expects; ValueError describes what was wrong."""
+    if isinstance(value, str):
+        value = value.strip()
+    if value is None or value == "":
+        return None
+    if sql_type == "INTEGER":
+        if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+            raise ValueError("expected an integer")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError("expected an integer") from None
+    if not isinstance(value, str):
+        raise ValueError("expected a string")
+    if sql_type in PARSERS:
+        parse, expected = PARSERS[sql_type]
+        try:
+            return parse(value)
+        except ValueError:
+            raise ValueError(f"expected {expected}") from None
+    length = re.fullmatch(r"VARCHAR\((\d+)\)", sql_type)
+    if length and len(value) > int(length.group(1)):
+        raise ValueError(f"longer than {length.group(1)} characters")
+    return value
+
+
+class UploadParser:
+    """
+    Incremental parser of an upload into staging rows ``(line, *columns)``.
+
+    ``feed`` takes the body chunk by chunk and returns the rows of the records
+    completed so far; ``close`` returns the rest. Per-line errors collect in
+    ``errors``. Unknown fields are ignored, like the single-row POST endpoints do.
+    """
+
+    def __init__(self, spec: ImportSpec, fmt: str):
+        if fmt not in ("csv", "ndjson"):
+            raise ImportFormatError(f"Unknown import format {fmt!r}; expected 'csv' or 'ndjson'")
+        self.spec = spec
+        self.fmt = fmt
+        self.received = 0
+        self.errors = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._pending = ""  # text after the last complete record
+        self._lines = 0  # physical lines parsed so far
+        self._fieldnames = None
+
+    def feed(self, chunk: bytes) -> list:
+        return self._parse(self._decode(chunk, final=False), final=False)
+
+    def close(self) -> list:
+        rows = self._parse(self._decode(b"", final=True), final=True)
+        if self.fmt == "csv" and self._fieldnames is None:
+            raise ImportFormatError("CSV upload has no header row")
+        return rows
+
+    def _decode(self, chunk: bytes, final: bool) -> str:
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError as e:
+            raise ImportFormatError(f"Upload is not valid UTF-8: {e}") from e
+
+    def _complete(self, text: str) -> int:
+        """End of the last complete record in ``text``: after a newline, outside any quoted CSV field."""
+        end = text.rfind("\n")
+        if self.fmt == "csv":
+            # A doubled quote inside a field keeps the count even, so odd means the newline is quoted
+            while end != -1 and text.count('"', 0, end) % 2:
+                end = text.rfind("\n", 0, end)
+        return end + 1
+
+    def _parse(self, text: str, final: bool) -> list:
+        text = self._pending + text
+        end = len(text) if final else self._complete(text)
+        self._pending = text[end:]
+        rows = []
+        for line, record in self._records(text[:end]):
+            self.received += 1
+            if isinstance(record, str):
+                self.errors[line] = [record]
+                continue
+            row = [line]
+            problems = []
+            for column, sql_type in self.spec.columns.items():
+                try:
+                    row.append(_parse_value(record.get(column), sql_type))
+                except ValueError as e:
+                    problems.append(f"{column}: {e}")
+            if problems:
+                self.errors[line] = problems
+            else:
+                rows.append(row)
+        return rows
+
+    def _records(self, text: str):
+        """Yield ``(line, record)`` pairs; ``record`` is a dict, or an error message for an unparsable line."""
+        if self.fmt == "csv":
+            reader = csv.reader(io.StringIO(text, newline=""))
+            for fields in reader:
+                if self._fieldnames is None:
+                    if not fields:
+                        raise ImportFormatError("CSV upload has no header row")
+                    self._fieldnames = fields
+                elif fields:
+                    yield self._lines + reader.line_num, dict(zip(self._fieldnames, fields))
+            self._lines += reader.line_num
+            return
+        lines = text.splitlines()
+        for offset, raw in enumerate(lines, start=1):
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except ValueError as e:
+                yield self._lines + offset, f"invalid JSON: {e}"
+                continue
+            yield self._lines + offset, record if isinstance(record, dict) else "expected a JSON object"
+        self._lines += len(lines)
+
+
+# ============================================
+# STAGING, VALIDATION AND MERGE
+# ============================================
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _row_checks(spec: ImportSpec) -> list:
+    """Required-field and allowed-value checks generated from the spec, followed by the spec's own checks."""
+    checks = [
+        f"SELECT s.line, {_literal(column + ' is required')} FROM {STAGING_TABLE} s WHERE s.{column} IS NULL"
+        for column in spec.required
+    ]
+    for column, allowed in spec.choices.items():
+        message = _literal(f"{column} must be one of: {', '.join(allowed)}")
+        values = ", ".join(_literal(value) for value in allowed)
+        checks.append(f"SELECT s.line, {message} FROM {STAGING_TABLE} s WHERE s.{column} NOT IN ({values})")
+    return checks + list(spec.checks)
+
+
+async def _reject(session, checks, errors: dict) -> int:
+    """Run ``checks`` in one statement, record their messages and drop the failing rows from staging."""
+    if not checks:
+        return 0
+    union = " UNION ALL ".join(f"({check})" for check in checks)
+    failures = await session.fetch_all(f"SELECT line, message FROM ({union}) AS failures(line, message) ORDER BY line")
+    for failure in failures:
+        errors.setdefault(failure["line"], []).append(failure["message"])
+    lines = sorted({failure["line"] for failure in failures})
+    if lines:
+        await session.execute(f"DELETE FROM {STAGING_TABLE} WHERE line = ANY(%s)", (lines,))
+    return len(lines)
+
+
+async def run_import(
+    db: Database, spec: ImportSpec, chunks, fmt: str, all_or_nothing: bool = False, dry_run: bool = False
+) -> dict:
+    """
+    Import an upload, read from the async iterable of byte ``chunks``, into ``spec.table`` and return the report.
+
+    The body is parsed as it arrives and staged with one ``COPY`` per
+    ``STAGING_BATCH_ROWS`` rows. Valid rows are merged even when others are
+    rejected, unless ``all_or_nothing`` is set; ``dry_run`` validates without merging.
+    """
+    timings = {"parse_s": 0.0, "copy_s": 0.0}
+    started = time.perf_counter()
+    parser = UploadParser(spec, fmt)
+    errors = parser.errors
+
+    inserted = 0
+    async with db.transaction() as tx:
+        phase = time.perf_counter()
+        # Lengths are checked while parsing, so text columns are staged unbounded
+        column_defs = ", ".join(
+            f"{column} {'TEXT' if sql_type.startswith('VARCHAR') else sql_type}"
+            for column, sql_type in {**spec.columns, **spec.derived}.items()
+        )
+        await tx.execute(
+            f"CREATE TEMP TABLE {STAGING_TABLE} (line INTEGER PRIMARY KEY, {column_defs}) ON COMMIT DROP"
+        )
+        timings["copy_s"] += time.perf_counter() - phase
+
+        staged = []
+        async for chunk in chunks:
+            phase = time.perf_counter()
+            # Parsing is CPU-bound; keep it off the event loop
+            staged += await anyio.to_thread.run_sync(parser.feed, chunk)
+            timings["parse_s"] += time.perf_counter() - phase
+            if len(staged) >= STAGING_BATCH_ROWS:
+                phase = time.perf_counter()
+                await tx.copy_rows(STAGING_TABLE, ["line", *spec.columns], staged)
+                staged = []
+                timings["copy_s"] += time.perf_counter() - phase
+        phase = time.perf_counter()
+        staged += parser.close()
+        timings["parse_s"] += time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        await tx.copy_rows(STAGING_TABLE, ["line", *spec.columns], staged)
+        for column, default in spec.defaults.items():
+            await tx.execute(f"UPDATE {STAGING_TABLE} SET {column} = {default} WHERE {column} IS NULL")
+        # Temporary tables are never auto-analyzed; the checks join them against large tables
+        await tx.execute(f"ANALYZE {STAGING_TABLE}")
+        timings["copy_s"] += time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        await _reject(tx, _row_checks(spec), errors)
+        await _reject(tx, spec.batch_checks, errors)
+        timings["validate_s"] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        if not dry_run and not (all_or_nothing and errors):
+            for statement in spec.prepare:
+                await tx.execute(statement)
+            columns = ", ".join([*spec.columns, *spec.derived])
+            inserted = await tx.execute(
+                f"INSERT INTO {spec.table} ({columns}) SELECT {columns} FROM {STAGING_TABLE} ORDER BY line"
+            )
+        timings["merge_s"] = time.perf_counter() - phase
+
+    elapsed = time.perf_counter() - started
+    received = parser.received
+    return {
+        "table": spec.table,
+        "received": received,
+        "valid": received - len(errors),
+        "inserted": inserted,
+        "rejected": len(errors),
+        "dry_run": dry_run,
+        "errors": [{"line": line, "errors": messages} for line, messages in sorted(errors.items())],
+        "timings": {name: round(seconds, 4) for name, seconds in timings.items()},
+        "elapsed_s": round(elapsed, 4),
+        "rows_per_second": round(received / elapsed, 1) if elapsed else 0.0,
+    }
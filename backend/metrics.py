@@ -0,0 +1,232 @@
+"""
+Prison Management System - Prometheus metrics
+
+A small, dependency-free implementation of the Prometheus text format:
+counters, gauges and histograms keyed by label values, each updated under
+its own lock so they can be fed from worker threads. ``MetricsMiddleware``
+times every HTTP request and, through a context variable that also follows
+the request onto anyio worker threads, adds up the database work done for it.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+import threading
+import time
+
+# Every metric, in registration order
+REGISTRY = []
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    @abstractmethod
+    def _samples(self) -> list:
+        """Sample lines of the metric in the text exposition format."""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = defaultdict(float)  # label values -> total
+
+    def inc(self, labels=(), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] += amount
+
+    def _samples(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels=(), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [count per bucket (+Inf last), sum]
+
+    def observe(self, value: float, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def _samples(self) -> list:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        names = (*self.labels, "le")
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, (*key, _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """The current value of every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ============================================
+# HTTP AND DATABASE METRICS
+# ============================================
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+ACQUIRE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route"), LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.", ("method",))
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size.", ("method", "route"), SIZE_BUCKETS
+)
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database statements run per HTTP request.", ("method", "route"), COUNT_BUCKETS
+)
+HTTP_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Database time spent per HTTP request.", ("method", "route"), LATENCY_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Duration of single database statements.", (), QUERY_BUCKETS)
+DB_ACQUIRE_SECONDS = Histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a pooled connection.", (), ACQUIRE_BUCKETS
+)
+DB_POOL = Gauge("db_pool_stat", "Connection pool statistics, as reported by /api/health.", ("stat",))
+
+
+class RequestMetrics:
+    """Database work done on behalf of one HTTP request."""
+
+    __slots__ = ("scope", "queries", "query_seconds", "statements", "repeated")
+
+    def __init__(self, scope: dict):
+        self.scope = scope  # carries the matched route once routing is done
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements = {}  # normalized sql -> executions (kept by the query log)
+        self.repeated = {}  # normalized sql -> query log entry of a statement repeated too often
+
+
+# The request being served, if any; background tasks (report refreshes, listeners) have none
+current_request = ContextVar("current_request", default=None)
+
+
+def observe_query(sql, params, seconds: float):
+    """``add_query_observer`` callback."""
+    DB_QUERY_SECONDS.observe(seconds)
+    request = current_request.get()
+    if request is not None:
+        request.queries += 1
+        request.query_seconds += seconds
+
+
+def observe_acquire(seconds: float):
+    """``add_acquire_observer`` callback."""
+    DB_ACQUIRE_SECONDS.observe(seconds)
+
+
+def update_pool_stats(stats: dict):
+    for name, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            DB_POOL.set(value, (name,))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the HTTP metrics; routes are labelled by their path template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        request = RequestMetrics(scope)
+        token = current_request.set(request)
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc((method,))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec((method,))
+            current_request.reset(token)
+            # Unmatched paths share one label, so scanners cannot inflate the number of series
+            route = scope.get("route")
+            labels = (method, getattr(route, "path", "<unmatched>"))
+            HTTP_REQUESTS.inc((*labels, str(status)))
+            HTTP_LATENCY.observe(elapsed, labels)
+            HTTP_RESPONSE_SIZE.observe(size, labels)
+            HTTP_DB_QUERIES.observe(request.queries, labels)
+            HTTP_DB_SECONDS.observe(request.query_seconds, labels)
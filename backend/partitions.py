@@ -0,0 +1,74 @@
+"""
+Prison Management System - partition maintenance
+
+``visits`` and ``incidents`` are range partitioned by month.
+``PartitionMaintainer`` runs ``manage_partitions()`` at startup and every
+``interval`` seconds; it creates the partitions of the coming months ahead
+of time, moves rows that fell into a default partition into their month and
+detaches or drops expired partitions as ``partition_policies`` directs.
+Concurrent workers coordinate through the function, which skips a run while
+another session is doing one.
+"""
+
+import asyncio
+import logging
+
+from backend.db import Database
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintainer:
+    """Background scheduler for ``manage_partitions()``; ``interval`` 0 runs it only at startup."""
+
+    def __init__(self, db: Database, interval: float = 3600.0):
+        self.db = db
+        self.interval = interval
+        self.last_run = None
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="partition-maintainer")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> list:
+        """Apply the partition policies now; returns the partitions created, detached or dropped."""
+        changes = await self.db.fetch_all("SELECT * FROM manage_partitions()")
+        for change in changes:
+            logger.info(f"Partition {change['partition_name']} of {change['parent_table']} {change['action']}")
+        self.last_run = await self.db.fetch_val("SELECT now()")
+        return changes
+
+    async def partitions(self) -> dict:
+        """The policies and every partition of the partitioned tables, with estimated sizes."""
+        policies = await self.db.fetch_all("SELECT * FROM partition_policies ORDER BY table_name")
+        partitions = await self.db.fetch_all("""
+            SELECT i.inhparent::regclass::text AS parent_table,
+                   c.relname AS partition_name,
+                   pg_get_expr(c.relpartbound, c.oid) AS bounds,
+                   GREATEST(c.reltuples, 0)::BIGINT AS estimated_rows,
+                   pg_total_relation_size(c.oid) AS total_bytes
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent IN (SELECT to_regclass(table_name) FROM partition_policies)
+            ORDER BY 1, 2
+        """)
+        return {"last_run": self.last_run, "policies": policies, "partitions": partitions}
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.warning(f"Partition maintenance failed: {e}")
+            if not self.interval:
+                return
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,99 @@
+"""
+Prison Management System - change events for clients
+
+``ChangeHub`` takes the ``row_changed`` notifications received by the
+worker's ``ChangeListener`` and fans them out to connected clients (the
+``/api/events`` Server-Sent Events stream). Clients subscribe to whole
+tables or to individual rows; matching is a dictionary lookup per event,
+so one listener serves thousands of subscribers without touching the
+database. Every subscriber has a bounded queue: one that falls behind has
+its backlog replaced by a single ``resync`` event.
+"""
+
+import asyncio
+from collections import defaultdict
+import json
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Tables whose row changes are published (the trg_notify_row_changes_* triggers)
+EVENT_TABLES = (
+    "cell_blocks", "cells", "prisoners", "sentences", "staff", "visitors",
+    "visits", "programs", "prisoner_programs", "incidents",
+)
+
+
+def sse_message(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+RESYNC = sse_message("resync", {})
+
+
+class Subscription:
+    """One client's interests and its queue of encoded SSE messages."""
+
+    def __init__(self, tables: set, entities: dict, max_queued: int):
+        self.tables = tables  # tables whose every change is wanted
+        self.entities = entities  # table -> ids whose changes are wanted
+        self.queue = asyncio.Queue(max_queued)
+
+    def offer(self, message: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind reloads everything instead of replaying the backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class ChangeHub:
+    """Registry of subscriptions, indexed by table."""
+
+    def __init__(self, max_queued: int = 1000):
+        self.max_queued = max_queued
+        self._by_table = defaultdict(set)  # table -> subscriptions interested in it
+        self._subscriptions = set()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, tables=(), entities: Optional[dict] = None) -> Subscription:
+        subscription = Subscription(set(tables), entities or {}, self.max_queued)
+        for table in subscription.tables | set(subscription.entities):
+            self._by_table[table].add(subscription)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for table in subscription.tables | set(subscription.entities):
+            self._by_table[table].discard(subscription)
+        self._subscriptions.discard(subscription)
+
+    def on_row_changed(self, payload: Optional[str]):
+        """``row_changed`` subscriber; ``None`` (missed notifications) asks every client to resync."""
+        if payload is None:
+            for subscription in self._subscriptions:
+                subscription.offer(RESYNC)
+            return
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed row_changed payload: {payload[:200]}")
+            return
+
+        table = change["table"]
+        message = None
+        for subscription in self._by_table.get(table, ()):
+            if table in subscription.tables or change["ids"] is None:
+                message = message or sse_message("change", change)
+                subscription.offer(message)
+                continue
+            wanted = subscription.entities[table]
+            ids = [row_id for row_id in change["ids"] if row_id in wanted]
+            if ids:
+                subscription.offer(sse_message("change", {**change, "ids": ids}))
@@ -0,0 +1,268 @@
+"""
+Prison Management System - query log
+
+``QueryLog`` observes every statement run through ``backend.db`` and keeps,
+in memory:
+
+* per-statement totals keyed by the normalized SQL text (literals replaced by
+  ``?``, whitespace collapsed), so each filter combination an endpoint builds
+  shows up as its own statement, with the shapes of the parameters it ran with;
+* the most recent slow statements, each with a plan captured in the background
+  (``plan`` stays null until it is ready): ``EXPLAIN (ANALYZE, BUFFERS)`` for
+  reads, a plain ``EXPLAIN`` for writes, which are never run again;
+* requests that ran the same statement ``repeat_threshold`` times or more,
+  the usual sign of an N+1 query pattern.
+
+Parameter values are only held until their statement has been explained;
+the log itself records their types, never their values.
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+import logging
+import re
+import threading
+import time
+
+from backend.db import Database, DatabaseError
+from backend.metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+# Statements EXPLAIN accepts
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "VALUES")
+# Statements run again under ANALYZE, in a read-only transaction that is always rolled back: one that
+# writes after all (a SELECT of a volatile function, a WITH holding DML) fails instead of running
+_ANALYZABLE = ("SELECT", "WITH")
+
+# Seconds before the same statement is explained again
+EXPLAIN_INTERVAL = 60.0
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql: str) -> str:
+    """``sql`` with string and number literals replaced by ``?`` and whitespace collapsed."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _type_name(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def params_shape(params) -> str:
+    """The parameter types, e.g. ``(int, str, null)``; values are never recorded."""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {_type_name(value)}" for key, value in params.items()) + "}"
+    return "(" + ", ".join(map(_type_name, params)) + ")"
+
+
+class QueryLog:
+    """In-memory statement statistics, slow query log with plans and repeated-statement detection."""
+
+    def __init__(
+        self,
+        db: Database,
+        slow_ms: float = 200.0,
+        log_size: int = 200,
+        repeat_threshold: int = 10,
+        max_statements: int = 1000,
+    ):
+        self.db = db
+        self.slow_seconds = slow_ms / 1000 if slow_ms > 0 else None
+        self.repeat_threshold = repeat_threshold
+        self.max_statements = max_statements
+        self.statements = OrderedDict()  # normalized sql -> totals, least recently run first
+        self.slow = deque(maxlen=log_size)
+        self.repeated = deque(maxlen=log_size)
+        self._lock = threading.Lock()  # statements run on worker threads in threaded mode
+        self._explained = {}  # normalized sql -> monotonic time of its last EXPLAIN
+        self._pending = None
+        self._loop = None
+        self._task = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Queue(maxsize=100)
+        self._task = asyncio.create_task(self._run(), name="query-log")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def clear(self):
+        with self._lock:
+            self.statements.clear()
+            self.slow.clear()
+            self.repeated.clear()
+            self._explained.clear()
+
+    # --------------------------------------------
+    # Recording
+    # --------------------------------------------
+
+    def on_query(self, sql, params, seconds: float):
+        """``add_query_observer`` callback; may run on a worker thread."""
+        if sql.startswith("EXPLAIN"):
+            return  # our own plan captures
+        text = normalize_sql(sql)
+        request = current_request.get()
+        route = None
+        if request is not None:
+            route = f"{request.scope['method']} {getattr(request.scope.get('route'), 'path', request.scope['path'])}"
+
+        with self._lock:
+            stats = self.statements.pop(text, None)
+            if stats is None:
+                stats = {"sql": text, "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "params": set(), "routes": set()}
+                while len(self.statements) >= self.max_statements:
+                    self.statements.popitem(last=False)
+            self.statements[text] = stats
+            stats["calls"] += 1
+            stats["total_ms"] += seconds * 1000
+            stats["max_ms"] = max(stats["max_ms"], seconds * 1000)
+            if len(stats["params"]) < 10:
+                stats["params"].add(params_shape(params))
+            if route and len(stats["routes"]) < 10:
+                stats["routes"].add(route)
+
+            if request is not None:
+                self._count_in_request(request, text, route)
+            if self.slow_seconds is not None and seconds >= self.slow_seconds:
+                self._record_slow(sql, params, text, seconds, route)
+
+    def _count_in_request(self, request, text: str, route: str):
+        count = request.statements.get(text, 0) + 1
+        request.statements[text] = count
+        if count < self.repeat_threshold:
+            return
+        entry = request.repeated.get(text)
+        if entry is None:
+            entry = {"at": datetime.now(timezone.utc), "route": route, "sql": text, "count": count}
+            request.repeated[text] = entry
+            self.repeated.append(entry)
+        entry["count"] = count
+
+    def _record_slow(self, sql, params, text: str, seconds: float, route: str):
+        entry = {
+            "at": datetime.now(timezone.utc),
+            "route": route,
+            "sql": text,
+            "params": params_shape(params),
+            "duration_ms": round(seconds * 1000, 3),
+            "plan": None,
+            "plan_error": None,
+        }
+        self.slow.append(entry)
+
+        now = time.monotonic()
+        if route is None:
+            # Background work (report refreshes) calls functions whose plans say nothing
+            entry["plan_error"] = "Not run by a request; not explained"
+        elif not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            entry["plan_error"] = "Statement cannot be explained"
+        elif now - self._explained.get(text, float("-inf")) < EXPLAIN_INTERVAL:
+            entry["plan_error"] = "Explained recently; see an earlier entry"
+        elif self._loop is not None:
+            self._explained[text] = now
+            self._loop.call_soon_threadsafe(self._enqueue, entry, sql, params)
+
+    def _enqueue(self, entry: dict, sql, params):
+        try:
+            self._pending.put_nowait((entry, sql, params))
+        except asyncio.QueueFull:
+            entry["plan_error"] = "Too many statements waiting to be explained"
+
+    # --------------------------------------------
+    # Plan capture
+    # --------------------------------------------
+
+    async def _run(self):
+        # Plans are captured one at a time, so a burst of slow statements cannot double the load
+        while True:
+            entry, sql, params = await self._pending.get()
+            try:
+                entry["plan"] = await self.explain(sql, params, analyze=sql.lstrip().upper().startswith(_ANALYZABLE))
+            except Exception as e:
+                entry["plan_error"] = str(e)
+                logger.warning(f"Could not explain slow statement: {e}")
+
+    async def explain(self, sql: str, params=None, analyze: bool = True):
+        """
+        ``EXPLAIN (FORMAT JSON)`` of a statement, with ``ANALYZE, BUFFERS`` when ``analyze``.
+
+        The statement runs in a read-only transaction that is always rolled back,
+        so only reads can be analyzed; anything that writes fails instead.
+        """
+
+        class _Rollback(Exception):
+            pass
+
+        plan = None
+        try:
+            async with self.db.transaction() as session:
+                await session.execute("SET TRANSACTION READ ONLY")
+                await session.execute("SET LOCAL statement_timeout = '30s'")
+                options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+                plan = await session.fetch_val(f"EXPLAIN ({options}) {sql}", params)
+                raise _Rollback
+        except _Rollback:
+            pass
+        except DatabaseError as e:
+            raise RuntimeError(str(e)) from e
+        return plan
+
+    # --------------------------------------------
+    # Reading
+    # --------------------------------------------
+
+    def snapshot(self, limit: int = 50, min_ms: float = 0.0, route: str = None, search: str = None) -> dict:
+        """Slowest statements by total time, recent slow statements and repeated statements, filtered."""
+
+        def matches(entry) -> bool:
+            if route and route not in (entry.get("route") or " ".join(entry.get("routes", ()))):
+                return False
+            return not search or search.lower() in entry["sql"].lower()
+
+        with self._lock:
+            statements = [
+                {**stats, "params": sorted(stats["params"]), "routes": sorted(stats["routes"])}
+                for stats in self.statements.values()
+            ]
+            slow = list(self.slow)
+            repeated = list(self.repeated)
+
+        statements = [
+            {**stats, "total_ms": round(stats["total_ms"], 3), "max_ms": round(stats["max_ms"], 3),
+             "mean_ms": round(stats["total_ms"] / stats["calls"], 3)}
+            for stats in statements
+            if stats["max_ms"] >= min_ms and matches(stats)
+        ]
+        statements.sort(key=lambda stats: stats["total_ms"], reverse=True)
+        slow = [entry for entry in reversed(slow) if entry["duration_ms"] >= min_ms and matches(entry)]
+        repeated = [entry for entry in reversed(repeated) if matches(entry)]
+        return {
+            "slow_threshold_ms": self.slow_seconds * 1000 if self.slow_seconds is not None else None,
+            "repeat_threshold": self.repeat_threshold,
+            "statements": statements[:limit],
+            "slow": slow[:limit],
+            "repeated": repeated[:limit],
+        }
@@ -0,0 +1,101 @@
+"""
+Prison Management System - materialized report views
+
+``ReportRefresher`` keeps the ``mv_*`` snapshots of the expensive report
+views current. It refreshes a view when one of its source tables announces a
+change on the ``table_changed`` channel (after a short debounce, so bursts of
+writes cost one refresh) and, optionally, every ``interval`` seconds.
+Concurrent workers coordinate through ``refresh_report_view()``, which skips
+a view another session is already refreshing.
+"""
+
+import asyncio
+import logging
+
+from backend.db import Database, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# materialized view -> tables its defining view reads
+REPORT_VIEWS = {
+    "mv_prisoner_details": {
+        "prisoners", "cells", "cell_blocks", "sentences", "crime_types",
+        "incidents", "visits", "prisoner_programs",
+    },
+    "mv_block_summary": {"cell_blocks", "cells", "prisoners", "staff", "staff_roles", "incidents"},
+}
+
+
+class ReportRefresher:
+    """Background refresh scheduler for ``REPORT_VIEWS``; ``as_of`` maps each view to its last refresh."""
+
+    def __init__(self, db: Database, interval: float = 300.0, debounce: float = 2.0):
+        self.db = db
+        self.interval = interval
+        self.debounce = debounce
+        self.as_of = {}
+        self._dirty = set()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="report-refresher")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def on_table_changed(self, table):
+        """``table_changed`` subscriber; ``None`` means notifications may have been missed."""
+        if table == "report_refreshes":
+            self._dirty.add(None)  # another worker refreshed a view: reload as_of
+        else:
+            self._dirty.update(view for view, sources in REPORT_VIEWS.items() if table is None or table in sources)
+        self._wake.set()
+
+    async def load_as_of(self):
+        rows = await self.db.fetch_all("SELECT view_name, refreshed_at FROM report_refreshes")
+        self.as_of = {row["view_name"]: row["refreshed_at"] for row in rows}
+
+    async def refresh(self, view: str) -> bool:
+        """Refresh one view now; False if another session was already refreshing it."""
+        refreshed = await self.db.fetch_val("SELECT refresh_report_view(%s)", (view,))
+        if refreshed:
+            await self.load_as_of()
+        return refreshed
+
+    async def _run(self):
+        try:
+            await self.load_as_of()
+        except DatabaseError as e:
+            logger.warning(f"Could not load report refresh times: {e}")
+        # Views never refreshed (e.g. an empty database at schema creation) are built straight away
+        self._dirty.update(view for view in REPORT_VIEWS if view not in self.as_of)
+
+        while True:
+            if not self._dirty:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.interval or None)
+                except asyncio.TimeoutError:
+                    self._dirty.update(REPORT_VIEWS)
+                # Let a burst of writes settle into a single refresh
+                await asyncio.sleep(self.debounce)
+            self._wake.clear()
+            pending, self._dirty = self._dirty, set()
+
+            try:
+                if None in pending:
+                    await self.load_as_of()
+                for view in REPORT_VIEWS:
+                    if view in pending:
+                        await self.refresh(view)
+            except Exception as e:
+                # Keep the work and retry once the database is reachable again
+                logger.warning(f"Report view refresh failed: {e}")
+                self._dirty |= pending
+                await asyncio.sleep(max(self.debounce, 1.0))
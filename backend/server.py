@@ -2,15 +2,39 @@
 Prison Management System - FastAPI Backend
 """
 
+import asyncio
+import base64
 from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+import json
 import logging
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
 from typing import Optional
 
+from backend import cache, metrics
+from backend.archive import Archiver
+from backend.cache import CachedBody, TTLCache, etag_matches, invalidate_tables, make_etag
+from backend.db import (
+    Database,
+    DatabaseError,
+    PoolTimeout,
+    add_acquire_observer,
+    add_query_observer,
+    create_database,
+    remove_query_observer,
+)
+from backend.events import ChangeListener
+from backend.exports import EXPORTS, MEDIA_TYPES, export_query, export_stream
+from backend.imports import IMPORTS, ImportFormatError, run_import
+from backend.partitions import PartitionMaintainer
+from backend.push import EVENT_TABLES, ChangeHub
+from backend.querylog import QueryLog
+from backend.reports import ReportRefresher
+
 logger = logging.getLogger(__name__)
 
 # Database connection settings
@@ -21,15 +45,73 @@ if not DB_PASSWORD:
 DB_CONFIG = {
     "host": os.getenv("DB_HOST", "localhost"),
     "port": os.getenv("DB_PORT", "5432"),
-    "database": os.getenv("DB_NAME", "prison_management"),
+    "dbname": os.getenv("DB_NAME", "prison_management"),
     "user": os.getenv("DB_USER", "prison_admin"),
     "password": DB_PASSWORD,
 }
 
+# Data access mode: "async" (psycopg 3, native asyncio) or "threaded" (psycopg2 on worker threads)
+DB_MODE = os.getenv("DB_MODE", "async")
+
+# Connection pool settings
+DB_POOL_CONFIG = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+    "acquire_timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    "max_uses": int(os.getenv("DB_POOL_MAX_USES", "5000")),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+}
+
+# Materialized report views: periodic refresh (0 = only on changes) and change debounce, in seconds
+REPORT_REFRESH_INTERVAL = float(os.getenv("REPORT_REFRESH_INTERVAL", "300"))
+REPORT_REFRESH_DEBOUNCE = float(os.getenv("REPORT_REFRESH_DEBOUNCE", "2"))
+
+# Seconds between runs of manage_partitions(), which keeps the monthly partitions of visits and
+# incidents ahead of time and applies their retention (0 = only at startup)
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+
+# Archive tier: seconds between runs (0, the default, = only on request; archiving is opt-in), prisoners
+# moved per batch, and days a released, transferred or deceased prisoner stays unmodified before archiving
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "0"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+
+# Reference data (enumerations, cell blocks): server-side safety-net TTL and client Cache-Control
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "3600"))
+REFERENCE_CACHE_MAX_AGE = int(os.getenv("REFERENCE_CACHE_MAX_AGE", "0"))
+
+# How long dashboard statistics are served from memory
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "5"))
+
+# How long a filtered prisoner total is reused while paging before it is recounted
+PRISONER_COUNT_CACHE_TTL = float(os.getenv("PRISONER_COUNT_CACHE_TTL", "10"))
+
+# Safety-net TTL for cached prisoner histories; changes to a prisoner's records evict them immediately
+PRISONER_HISTORY_CACHE_TTL = float(os.getenv("PRISONER_HISTORY_CACHE_TTL", "600"))
+
+# Largest accepted bulk import upload, in bytes
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Most operations accepted by one POST /api/batch
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "500"))
+
+# Rows fetched from the server-side cursor per chunk of a streaming export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+# Change event stream: seconds between keep-alive comments, and events buffered per client before it must resync
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_MAX_QUEUED = int(os.getenv("EVENTS_MAX_QUEUED", "1000"))
+
+# Query log: statements slower than this many milliseconds are kept with their plan (0 = off), entries
+# kept per list, and executions of one statement within a request that flag an N+1 pattern
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+QUERY_LOG_SIZE = int(os.getenv("QUERY_LOG_SIZE", "200"))
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "10"))
 
-def get_db_connection():
-    """Create a new database connection."""
-    return psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+
+async def get_db(request: Request) -> Database:
+    """Return the application's database facade."""
+    return request.app.state.db
 
 
 def handle_db_error(e: Exception) -> HTTPException:
@@ -40,16 +122,44 @@ def handle_db_error(e: Exception) -> HTTPException:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: test database connection
+    # Startup: create the connection pool and warm it up
+    app.state.db = create_database(DB_MODE, DB_CONFIG, DB_POOL_CONFIG)
     try:
-        conn = get_db_connection()
-        conn.close()
-        print("Database connection successful")
+        await app.state.db.open()
+        print(f"Database connection successful ({DB_MODE} mode)")
     except Exception as e:
         print(f"Warning: Could not connect to database: {e}")
+
+    # Change notifications drive the report view refreshes
+    app.state.listener = ChangeListener(DB_CONFIG)
+    app.state.reports = ReportRefresher(app.state.db, REPORT_REFRESH_INTERVAL, REPORT_REFRESH_DEBOUNCE)
+    app.state.listener.subscribe("table_changed", app.state.reports.on_table_changed)
+    # Writes made by other workers invalidate this worker's caches
+    app.state.listener.subscribe("table_changed", cache.on_table_changed)
+    app.state.listener.subscribe("prisoner_changed", on_prisoner_changed)
+    # Row changes are pushed to connected clients
+    app.state.hub = ChangeHub(EVENTS_MAX_QUEUED)
+    app.state.listener.subscribe("row_changed", app.state.hub.on_row_changed)
+    # Every statement is recorded; slow ones get their plan captured in the background
+    app.state.query_log = QueryLog(app.state.db, SLOW_QUERY_MS, QUERY_LOG_SIZE, QUERY_REPEAT_THRESHOLD)
+    add_query_observer(app.state.query_log.on_query)
+    await app.state.query_log.start()
+    await app.state.listener.start()
+    await app.state.reports.start()
+    app.state.partitions = PartitionMaintainer(app.state.db, PARTITION_MAINTENANCE_INTERVAL)
+    await app.state.partitions.start()
+    app.state.archiver = Archiver(app.state.db, ARCHIVE_INTERVAL, ARCHIVE_BATCH_SIZE, ARCHIVE_AFTER_DAYS)
+    await app.state.archiver.start()
+    await warm_reference_data(app.state.db)
     yield
-    # Shutdown: cleanup if needed
-    pass
+    # Shutdown: stop background tasks, then close pooled connections
+    await app.state.archiver.stop()
+    await app.state.partitions.stop()
+    await app.state.reports.stop()
+    await app.state.query_log.stop()
+    remove_query_observer(app.state.query_log.on_query)
+    await app.state.listener.stop()
+    await app.state.db.close()
 
 
 app = FastAPI(
@@ -68,98 +178,411 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-As-Of", "ETag"],
 )
 
+# Request metrics wrap everything else, so their latency covers the whole stack
+app.add_middleware(metrics.MetricsMiddleware)
+add_query_observer(metrics.observe_query)
+add_acquire_observer(metrics.observe_acquire)
+
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    logger.error(f"Connection pool exhausted: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Database is busy. Please try again."})
+
 
 # ============================================
-# PRISONERS ENDPOINTS
+# KEYSET PAGINATION HELPERS
 # ============================================
 
 
-@app.get("/api/prisoners")
-def get_prisoners(
-    status: Optional[str] = None,
-    search: Optional[str] = None,
-    limit: int = Query(100, le=1000),
-    offset: int = 0,
-):
-    """Get all prisoners with optional filtering."""
-    conn = get_db_connection()
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor token."""
+    payload = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor token produced by ``encode_cursor``."""
     try:
-        cur = conn.cursor()
-        query = """
-            SELECT p.*, c.cell_code, cb.name as block_name
-            FROM prisoners p
-            LEFT JOIN cells c ON p.cell_id = c.id
-            LEFT JOIN cell_blocks cb ON c.cell_block_id = cb.id
-            WHERE 1=1
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_condition(order: list, values: list) -> tuple:
+    """
+    Build a WHERE fragment matching rows that sort strictly after ``values``.
+
+    ``order`` is a list of ``(column, "ASC" | "DESC")`` pairs matching the
+    query's ORDER BY. Uniform directions use a row comparison so a matching
+    composite index can seek straight to the cursor position. Either way the
+    leading column is also bounded on its own, which is what prunes the
+    partitions past the cursor when it is the partition key (visits, incidents).
+    """
+    directions = {direction for _, direction in order}
+    if len(directions) == 1:
+        op = ">" if directions == {"ASC"} else "<"
+        columns = ", ".join(column for column, _ in order)
+        placeholders = ", ".join(["%s"] * len(order))
+        # Partition pruning ignores row comparisons, so the leading column's bound is repeated on its own
+        return f"{order[0][0]} {op}= %s AND ({columns}) {op} ({placeholders})", [values[0], *values]
+
+    (column, direction), *rest = order
+    op = ">" if direction == "ASC" else "<"
+    if not rest:
+        return f"{column} {op} %s", [values[0]]
+    tail_sql, tail_params = keyset_condition(rest, values[1:])
+    # The OR alone bounds no column, so the leading one is bounded on its own for the index and pruning
+    return (
+        f"{column} {op}= %s AND ({column} {op} %s OR ({column} = %s AND {tail_sql}))",
+        [values[0], values[0], values[0], *tail_params],
+    )
+
+
+def paginate(query: str, params: list, order: list, limit: int, offset: int, cursor: Optional[str]) -> tuple:
+    """
+    Append keyset (``cursor``) or OFFSET paging to a filtered query.
+
+    One extra row is requested so callers can tell whether a next page exists.
+    """
+    if cursor:
+        if offset:
+            raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+        condition, condition_params = keyset_condition(order, decode_cursor(cursor, len(order)))
+        query += f" AND {condition}"
+        params = [*params, *condition_params]
+
+    query += " ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in order)
+    query += " LIMIT %s"
+    params = [*params, limit + 1]
+    if not cursor:
+        query += " OFFSET %s"
+        params.append(offset)
+    return query, params
+
+
+def next_cursor(rows: list, order: list, limit: int) -> Optional[str]:
+    """Trim the look-ahead row and return the cursor for the following page, if any."""
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    last = rows[-1]
+    return encode_cursor([last[column.split(".")[-1]] for column, _ in order])
+
+
+# ============================================
+# REFERENCE DATA CACHE
+# ============================================
+
+# Rarely changing lookup data, kept serialized in memory: name -> (query, source tables)
+REFERENCE_DATA = {
+    "crime_types": ("SELECT * FROM crime_types ORDER BY name", ("crime_types",)),
+    "staff_roles": ("SELECT * FROM staff_roles ORDER BY access_level DESC", ("staff_roles",)),
+    "program_types": ("SELECT * FROM program_types ORDER BY name", ("program_types",)),
+    "visiting_rooms": ("SELECT * FROM visiting_rooms ORDER BY name", ("visiting_rooms",)),
+    "cell_blocks": (
         """
-        params = []
+        SELECT cb.*,
+               (SELECT COUNT(*) FROM cells c WHERE c.cell_block_id = cb.id) as total_cells,
+               cb.current_occupancy as current_prisoners
+        FROM cell_blocks cb
+        ORDER BY cb.name
+        """,
+        ("cell_blocks", "cells"),
+    ),
+}
+REFERENCE_CACHES = {name: TTLCache(REFERENCE_CACHE_TTL, tables=tables) for name, (_, tables) in REFERENCE_DATA.items()}
+# no-cache lets clients keep their copy but revalidate it (a cheap 304) on every use
+REFERENCE_CACHE_CONTROL = (
+    f"private, max-age={REFERENCE_CACHE_MAX_AGE}" if REFERENCE_CACHE_MAX_AGE else "private, no-cache"
+)
 
-        if status:
-            query += " AND p.status = %s"
-            params.append(status)
 
-        if search:
-            query += " AND (p.first_name ILIKE %s OR p.last_name ILIKE %s OR p.prisoner_number ILIKE %s)"
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
+async def load_reference_data(db: Database, name: str) -> CachedBody:
+    rows = await db.fetch_all(REFERENCE_DATA[name][0])
+    body = json.dumps(jsonable_encoder(rows)).encode()
+    return CachedBody(body, make_etag(body))
 
-        query += " ORDER BY p.last_name, p.first_name LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
 
-        cur.execute(query, params)
-        prisoners = cur.fetchall()
+async def reference_response(request: Request, db: Database, name: str) -> Response:
+    """Serve reference data from memory, answering a matching ``If-None-Match`` with 304."""
+    cached = await REFERENCE_CACHES[name].get_or_load(name, lambda: load_reference_data(db, name))
+    headers = {"ETag": cached.etag, "Cache-Control": REFERENCE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
 
-        # Get total count
-        count_query = "SELECT COUNT(*) FROM prisoners WHERE 1=1"
-        count_params = []
-        if status:
-            count_query += " AND status = %s"
-            count_params.append(status)
-        if search:
-            count_query += " AND (first_name ILIKE %s OR last_name ILIKE %s OR prisoner_number ILIKE %s)"
-            count_params.extend([f"%{search}%", f"%{search}%", f"%{search}%"])
 
-        cur.execute(count_query, count_params)
-        total = cur.fetchone()["count"]
+async def warm_reference_data(db: Database):
+    for name in REFERENCE_DATA:
+        try:
+            await REFERENCE_CACHES[name].get_or_load(name, lambda: load_reference_data(db, name))
+        except (DatabaseError, PoolTimeout) as e:
+            logger.warning(f"Could not preload {name}: {e}")
 
-        return {"data": prisoners, "total": total, "limit": limit, "offset": offset}
-    finally:
-        conn.close()
+
+# ============================================
+# CONDITIONAL GET HELPERS
+# ============================================
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Attach ``etag`` to ``response``, or return a 304 to send instead when the client's copy matches."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def check_list_validator(
+    request: Request, response: Response, db: Database, source: str, params, stamps: list, extras: list = ()
+) -> Optional[Response]:
+    """
+    Validate an unpaginated list before querying it.
+
+    ``source`` is the list's ``FROM ... WHERE`` clause and ``stamps`` the
+    ``updated_at`` columns of the tables it shows; the ETag covers the URL, the
+    row count and the newest timestamp, so inserts, deletes and updates all change it.
+    ``extras`` are scalar expressions whose values also go into the ETag, for
+    changes no timestamp records (rows deleted from a table the list aggregates).
+    """
+    row = await db.fetch_one(
+        f"SELECT COUNT(*) AS row_count, GREATEST({', '.join(f'MAX({stamp})' for stamp in stamps)}) AS last_modified"
+        f"{''.join(f', {extra} AS extra_{index}' for index, extra in enumerate(extras))} "
+        f"{source}",
+        params,
+    )
+    etag = make_etag(
+        request.url.path,
+        request.url.query,
+        row["row_count"],
+        row["last_modified"],
+        *(row[f"extra_{index}"] for index in range(len(extras))),
+    )
+    return not_modified(request, response, etag)
+
+
+def page_etag(request: Request, rows: list, *extra) -> str:
+    """
+    ETag of a paginated response, taken from the page itself.
+
+    Validating a page against its whole filtered set would need the COUNT(*)
+    that keyset pagination and ``count=none`` avoid, so the rows are hashed instead.
+    """
+    return make_etag(request.url.path, request.url.query, [tuple(row.values()) for row in rows], *extra)
+
+
+# ============================================
+# PRISONERS ENDPOINTS
+# ============================================
+
+# Sort keys used for keyset pagination; each is backed by a matching composite index
+PRISONERS_ORDER = [("p.last_name", "ASC"), ("p.first_name", "ASC"), ("p.id", "ASC")]
+
+# (status, search, include_archived) -> total matching prisoners, so paging does not recount every page
+PRISONER_COUNT_CACHE = TTLCache(PRISONER_COUNT_CACHE_TTL, tables=("prisoners", "archived_prisoners"))
+
+# Active and archived prisoners as one relation; filters and the name order push down into both
+# tables' indexes. archived_prisoners has the prisoners columns followed by archived_at
+PRISONERS_WITH_ARCHIVED = (
+    "(SELECT *, NULL::TIMESTAMP AS archived_at FROM prisoners UNION ALL SELECT * FROM archived_prisoners)"
+)
+
+
+def prisoner_source(include_archived: bool) -> str:
+    """The relation prisoner lists and lookups read, aliased ``p`` by the caller."""
+    return PRISONERS_WITH_ARCHIVED if include_archived else "prisoners"
+
+
+# Searches match these expressions through the pg_trgm GIN indexes; they must stay
+# identical to the indexed expressions (idx_prisoners_full_name_trgm, idx_visitors_full_name_trgm)
+PRISONER_FULL_NAME = "(p.first_name || ' ' || p.last_name)"
+VISITOR_FULL_NAME = "(first_name || ' ' || last_name)"
+# float8 so the rank survives the round trip through a cursor exactly (real values do not)
+PRISONER_SEARCH_RANK = (
+    f"GREATEST(word_similarity(%s, {PRISONER_FULL_NAME}), word_similarity(%s, p.prisoner_number))::float8"
+)
+
+# Searches are ordered by relevance first; the name keys keep the order total for cursors
+PRISONERS_SEARCH_ORDER = [
+    ("ranked.search_rank", "DESC"),
+    ("ranked.last_name", "ASC"),
+    ("ranked.first_name", "ASC"),
+    ("ranked.id", "ASC"),
+]
+VISITS_ORDER = [("v.visit_date", "DESC"), ("v.scheduled_start_time", "ASC"), ("v.id", "ASC")]
+INCIDENTS_ORDER = [("i.incident_date", "DESC"), ("i.id", "DESC")]
+
+
+@app.get("/api/prisoners")
+async def get_prisoners(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    limit: int = Query(100, le=1000),
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
+    include_archived: bool = False,
+    db: Database = Depends(get_db),
+):
+    """Get all prisoners with optional filtering, paged by OFFSET or by keyset ``cursor``.
+
+    ``count`` controls ``total``: ``exact`` counts in the same statement as the page
+    (and reuses a recently cached total), ``estimated`` reads the trigger-maintained
+    per-status counters or the planner's row estimate, ``none`` skips it.
+    ``include_archived`` also lists archived prisoners, with their ``archived_at``.
+    """
+    source = prisoner_source(include_archived)
+    filters = ""
+    filter_params = []
+
+    if status:
+        filters += " AND p.status = %s"
+        filter_params.append(status)
+
+    if search:
+        filters += f" AND ({PRISONER_FULL_NAME} ILIKE %s OR p.prisoner_number ILIKE %s)"
+        search_param = f"%{search}%"
+        filter_params.extend([search_param, search_param])
+
+    count_key = (status, search, include_archived)
+    total = PRISONER_COUNT_CACHE.get(count_key) if count == "exact" else None
+    count_in_page = count == "exact" and total is None
+
+    query = "SELECT p.*, c.cell_code, cb.name as block_name"
+    params = []
+    if search:
+        query += f", {PRISONER_SEARCH_RANK} AS search_rank"
+        params.extend([search, search])
+    if count_in_page:
+        query += f", (SELECT COUNT(*) FROM {source} p WHERE 1=1{filters}) AS total_count"
+        params.extend(filter_params)
+    query += f"""
+        FROM {source} p
+        LEFT JOIN cells c ON p.cell_id = c.id
+        LEFT JOIN cell_blocks cb ON c.cell_block_id = cb.id
+        WHERE 1=1{filters}
+    """
+    params.extend(filter_params)
+
+    order = PRISONERS_ORDER
+    if search:
+        # Wrap so the relevance rank can be used in the keyset condition
+        query = f"SELECT * FROM ({query}) ranked WHERE 1=1"
+        order = PRISONERS_SEARCH_ORDER
+
+    query, params = paginate(query, params, order, limit, offset, cursor)
+    prisoners = await db.fetch_all(query, params)
+    cursor_token = next_cursor(prisoners, order, limit)
+
+    if count_in_page:
+        for prisoner in prisoners:
+            total = prisoner.pop("total_count")
+        if total is None:
+            # Past the last page there is no row to carry the count
+            total = (
+                await db.fetch_val(f"SELECT COUNT(*) FROM {source} p WHERE 1=1{filters}", filter_params)
+                if offset or cursor
+                else 0
+            )
+        PRISONER_COUNT_CACHE.set(count_key, total)
+    elif count == "estimated":
+        total = await estimate_prisoner_count(db, status, search, filters, filter_params, include_archived)
+
+    unchanged = not_modified(request, response, page_etag(request, prisoners, total))
+    if unchanged:
+        return unchanged
+
+    return {
+        "data": prisoners,
+        "total": total,
+        "count": count,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": cursor_token,
+    }
+
+
+async def estimate_prisoner_count(
+    db: Database, status, search, filters: str, filter_params: list, include_archived: bool = False
+) -> int:
+    """Cheap prisoner total: exact per-status counters of active prisoners, or the planner estimate."""
+    if not search and not include_archived:
+        query = "SELECT COALESCE(SUM(prisoner_count), 0) FROM prisoner_status_counts"
+        if status:
+            return await db.fetch_val(query + " WHERE status = %s", (status,))
+        return await db.fetch_val(query)
+
+    plan = await db.fetch_val(
+        f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {prisoner_source(include_archived)} p WHERE 1=1{filters}", filter_params
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+@app.get("/api/prisoners/autocomplete")
+async def autocomplete_prisoners(
+    # pg_trgm extracts no trigram from a shorter '%q%', so the index could not narrow the match
+    q: str = Query(..., min_length=3),
+    limit: int = Query(10, ge=1, le=50),
+    include_archived: bool = False,
+    db: Database = Depends(get_db),
+):
+    """Top matches for a search box: substring or fuzzy name matches and prisoner numbers, by similarity."""
+    return await db.fetch_all(
+        f"""
+        SELECT p.id, p.prisoner_number, p.first_name, p.last_name, p.status,
+               {PRISONER_SEARCH_RANK} AS search_rank{", p.archived_at" if include_archived else ""}
+        FROM {prisoner_source(include_archived)} p
+        WHERE {PRISONER_FULL_NAME} ILIKE %s
+           OR %s <%% {PRISONER_FULL_NAME}
+           OR p.prisoner_number ILIKE %s
+        ORDER BY search_rank DESC, p.last_name, p.first_name, p.id
+        LIMIT %s
+    """,
+        (q, q, f"%{q}%", q, f"%{q}%", limit),
+    )
 
 
 @app.get("/api/prisoners/{prisoner_id}")
-def get_prisoner(prisoner_id: int):
-    """Get a single prisoner by ID."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT p.*, c.cell_code, cb.name as block_name
-            FROM prisoners p
-            LEFT JOIN cells c ON p.cell_id = c.id
-            LEFT JOIN cell_blocks cb ON c.cell_block_id = cb.id
-            WHERE p.id = %s
-        """,
-            (prisoner_id,),
-        )
-        prisoner = cur.fetchone()
-        if not prisoner:
-            raise HTTPException(status_code=404, detail="Prisoner not found")
-        return prisoner
-    finally:
-        conn.close()
+async def get_prisoner(
+    prisoner_id: int,
+    request: Request,
+    response: Response,
+    include_archived: bool = False,
+    db: Database = Depends(get_db),
+):
+    """Get a single prisoner by ID; ``include_archived`` also finds archived prisoners."""
+    prisoner = await db.fetch_one(
+        f"""
+        SELECT p.*, c.cell_code, cb.name as block_name
+        FROM {prisoner_source(include_archived)} p
+        LEFT JOIN cells c ON p.cell_id = c.id
+        LEFT JOIN cell_blocks cb ON c.cell_block_id = cb.id
+        WHERE p.id = %s
+    """,
+        (prisoner_id,),
+    )
+    if not prisoner:
+        raise HTTPException(status_code=404, detail="Prisoner not found")
+    return not_modified(request, response, make_etag(request.url.path, prisoner)) or prisoner
 
 
 @app.post("/api/prisoners")
-def create_prisoner(prisoner: dict):
+async def create_prisoner(prisoner: dict, db: Database = Depends(get_db)):
     """Create a new prisoner."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_prisoner = await db.fetch_one(
             """
             INSERT INTO prisoners (
                 prisoner_number, first_name, last_name, date_of_birth,
@@ -184,23 +607,17 @@ def create_prisoner(prisoner: dict):
                 prisoner.get("notes"),
             ),
         )
-        new_prisoner = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "prisoners", "cells", "cell_blocks")
         return new_prisoner
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.put("/api/prisoners/{prisoner_id}")
-def update_prisoner(prisoner_id: int, prisoner: dict):
+async def update_prisoner(prisoner_id: int, prisoner: dict, db: Database = Depends(get_db)):
     """Update a prisoner."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        updated = await db.fetch_one(
             """
             UPDATE prisoners SET
                 first_name = COALESCE(%s, first_name),
@@ -232,50 +649,128 @@ def update_prisoner(prisoner_id: int, prisoner: dict):
                 prisoner_id,
             ),
         )
-        updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Prisoner not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "prisoners", "cells", "cell_blocks")
+        db.after_commit(forget_prisoner_history, prisoner_id)
         return updated
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.delete("/api/prisoners/{prisoner_id}")
-def delete_prisoner(prisoner_id: int):
+async def delete_prisoner(prisoner_id: int, db: Database = Depends(get_db)):
     """Delete a prisoner."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM prisoners WHERE id = %s RETURNING id", (prisoner_id,))
-        deleted = cur.fetchone()
+        deleted = await db.fetch_one("DELETE FROM prisoners WHERE id = %s RETURNING id", (prisoner_id,))
         if not deleted:
             raise HTTPException(status_code=404, detail="Prisoner not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "prisoners", "cells", "cell_blocks")
+        db.after_commit(forget_prisoner_history, prisoner_id)
         return {"message": "Prisoner deleted", "id": prisoner_id}
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
+
+
+# Histories are evicted per prisoner (prisoner_changed notifications and local writes);
+# changes to the lookup tables whose names they embed drop them all
+PRISONER_HISTORY_CACHE = TTLCache(
+    PRISONER_HISTORY_CACHE_TTL,
+    tables=("crime_types", "staff", "visitors", "programs", "program_types"),
+    max_entries=4096,
+)
+
+# Archived records do not change once archived; each archive batch drops them all
+ARCHIVED_PRISONER_HISTORY_CACHE = TTLCache(
+    PRISONER_HISTORY_CACHE_TTL,
+    tables=("crime_types", "staff", "visitors", "programs", "program_types", "archived_prisoners"),
+    max_entries=4096,
+)
+
+# Most prisoners accepted by one POST /api/prisoners/history
+PRISONER_HISTORY_MAX_IDS = 1000
+
+
+def forget_prisoner_history(*prisoner_ids: int):
+    PRISONER_HISTORY_CACHE.discard(*prisoner_ids)
+
+
+def on_prisoner_changed(payload: Optional[str]):
+    """``prisoner_changed`` subscriber: comma-separated prisoner ids, or ``*``/``None`` for everything."""
+    if payload is None or payload == "*":
+        PRISONER_HISTORY_CACHE.clear()
+    else:
+        forget_prisoner_history(*(int(prisoner_id) for prisoner_id in payload.split(",")))
+
+
+async def load_prisoner_histories(db: Database, prisoner_ids: list, archived: bool = False) -> dict:
+    if archived:
+        # Only archived prisoners, so a prisoner_changed eviction can never miss an entry of this cache
+        rows = await db.fetch_all(
+            """
+            SELECT prisoner_id, history FROM get_prisoner_histories(%s::int[], true)
+            WHERE history->'prisoner'->>'archived_at' IS NOT NULL
+        """,
+            (list(prisoner_ids),),
+        )
+    else:
+        rows = await db.fetch_all(
+            "SELECT prisoner_id, history FROM get_prisoner_histories(%s::int[])", (list(prisoner_ids),)
+        )
+    return {row["prisoner_id"]: row["history"] for row in rows}
+
+
+async def cached_prisoner_histories(db: Database, prisoner_ids: list, include_archived: bool = False) -> dict:
+    """Histories by prisoner id; ids that are not active prisoners are looked up in the archive if asked."""
+    histories = await PRISONER_HISTORY_CACHE.get_or_load_many(
+        prisoner_ids, lambda missing: load_prisoner_histories(db, missing)
+    )
+    missing = [prisoner_id for prisoner_id in prisoner_ids if prisoner_id not in histories]
+    if include_archived and missing:
+        histories.update(
+            await ARCHIVED_PRISONER_HISTORY_CACHE.get_or_load_many(
+                missing, lambda missing: load_prisoner_histories(db, missing, archived=True)
+            )
+        )
+    return histories
 
 
 @app.get("/api/prisoners/{prisoner_id}/history")
-def get_prisoner_history(prisoner_id: int):
+async def get_prisoner_history(prisoner_id: int, include_archived: bool = False, db: Database = Depends(get_db)):
     """Get full history of a prisoner using the stored function."""
-    conn = get_db_connection()
+    histories = await cached_prisoner_histories(db, [prisoner_id], include_archived)
+    if prisoner_id not in histories:
+        raise HTTPException(status_code=404, detail="Prisoner not found")
+    return histories[prisoner_id]
+
+
+@app.post("/api/prisoners/history")
+async def get_prisoner_histories(selection: dict, db: Database = Depends(get_db)):
+    """
+    Get full histories for many prisoners at once.
+
+    Takes ``{"prisoner_ids": [...], "include_archived": false}``; cached histories are
+    reused and the rest are built in one set-based query. Unknown ids are listed under ``missing``.
+    """
+    prisoner_ids = selection.get("prisoner_ids")
+    include_archived = selection.get("include_archived", False)
+    if not isinstance(include_archived, bool):
+        raise HTTPException(status_code=400, detail="include_archived must be a boolean")
+    if not isinstance(prisoner_ids, list) or not all(
+        isinstance(prisoner_id, int) and not isinstance(prisoner_id, bool) for prisoner_id in prisoner_ids
+    ):
+        raise HTTPException(status_code=400, detail="prisoner_ids must be a list of integers")
+    if len(prisoner_ids) > PRISONER_HISTORY_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {PRISONER_HISTORY_MAX_IDS} prisoners per request")
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT get_prisoner_full_history(%s) as history", (prisoner_id,))
-        result = cur.fetchone()
-        if not result or not result["history"]:
-            raise HTTPException(status_code=404, detail="Prisoner not found")
-        return result["history"]
-    finally:
-        conn.close()
+        histories = await cached_prisoner_histories(db, prisoner_ids, include_archived)
+    except DatabaseError as e:
+        raise handle_db_error(e)
+    requested = list(dict.fromkeys(prisoner_ids))
+    return {
+        "histories": [histories[prisoner_id] for prisoner_id in requested if prisoner_id in histories],
+        "missing": [prisoner_id for prisoner_id in requested if prisoner_id not in histories],
+    }
 
 
 # ============================================
@@ -284,67 +779,58 @@ def get_prisoner_history(prisoner_id: int):
 
 
 @app.get("/api/cells")
-def get_cells(block_id: Optional[int] = None, available_only: bool = False):
+async def get_cells(
+    request: Request,
+    response: Response,
+    block_id: Optional[int] = None,
+    available_only: bool = False,
+    db: Database = Depends(get_db),
+):
     """Get all cells with optional filtering."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = """
-            SELECT c.*, cb.name as block_name, cb.security_level,
-                   (SELECT COUNT(*) FROM prisoners p WHERE p.cell_id = c.id AND p.status = 'incarcerated') as current_occupancy
-            FROM cells c
-            JOIN cell_blocks cb ON c.cell_block_id = cb.id
-            WHERE 1=1
-        """
-        params = []
+    source = """
+        FROM cells c
+        JOIN cell_blocks cb ON c.cell_block_id = cb.id
+        WHERE 1=1
+    """
+    params = []
+
+    if block_id:
+        source += " AND c.cell_block_id = %s"
+        params.append(block_id)
 
-        if block_id:
-            query += " AND c.cell_block_id = %s"
-            params.append(block_id)
+    if available_only:
+        source += " AND c.capacity > c.current_occupancy"
 
-        if available_only:
-            query += """ AND c.capacity > (
-                SELECT COUNT(*) FROM prisoners p WHERE p.cell_id = c.id AND p.status = 'incarcerated'
-            )"""
+    unchanged = await check_list_validator(request, response, db, source, params, ["c.updated_at", "cb.updated_at"])
+    if unchanged:
+        return unchanged
 
-        query += " ORDER BY cb.name, c.cell_code"
-        cur.execute(query, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    query = "SELECT c.*, cb.name as block_name, cb.security_level" + source + " ORDER BY cb.name, c.cell_code"
+    return await db.fetch_all(query, params)
 
 
 @app.get("/api/cells/{cell_id}")
-def get_cell(cell_id: int):
+async def get_cell(cell_id: int, request: Request, response: Response, db: Database = Depends(get_db)):
     """Get a single cell by ID."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT c.*, cb.name as block_name, cb.security_level,
-                   (SELECT COUNT(*) FROM prisoners p WHERE p.cell_id = c.id AND p.status = 'incarcerated') as current_occupancy
-            FROM cells c
-            JOIN cell_blocks cb ON c.cell_block_id = cb.id
-            WHERE c.id = %s
-        """,
-            (cell_id,),
-        )
-        cell = cur.fetchone()
-        if not cell:
-            raise HTTPException(status_code=404, detail="Cell not found")
-        return cell
-    finally:
-        conn.close()
+    cell = await db.fetch_one(
+        """
+        SELECT c.*, cb.name as block_name, cb.security_level
+        FROM cells c
+        JOIN cell_blocks cb ON c.cell_block_id = cb.id
+        WHERE c.id = %s
+    """,
+        (cell_id,),
+    )
+    if not cell:
+        raise HTTPException(status_code=404, detail="Cell not found")
+    return not_modified(request, response, make_etag(request.url.path, cell)) or cell
 
 
 @app.post("/api/cells")
-def create_cell(cell: dict):
+async def create_cell(cell: dict, db: Database = Depends(get_db)):
     """Create a new cell."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_cell = await db.fetch_one(
             """
             INSERT INTO cells (cell_code, cell_block_id, floor_number, capacity, cell_type, has_window)
             VALUES (%s, %s, %s, %s, %s, %s)
@@ -359,23 +845,17 @@ def create_cell(cell: dict):
                 cell.get("has_window", True),
             ),
         )
-        new_cell = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "cells", "cell_blocks")
         return new_cell
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.put("/api/cells/{cell_id}")
-def update_cell(cell_id: int, cell: dict):
+async def update_cell(cell_id: int, cell: dict, db: Database = Depends(get_db)):
     """Update a cell."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        updated = await db.fetch_one(
             """
             UPDATE cells SET
                 cell_code = COALESCE(%s, cell_code),
@@ -397,35 +877,25 @@ def update_cell(cell_id: int, cell: dict):
                 cell_id,
             ),
         )
-        updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Cell not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "cells", "cell_blocks")
         return updated
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.delete("/api/cells/{cell_id}")
-def delete_cell(cell_id: int):
+async def delete_cell(cell_id: int, db: Database = Depends(get_db)):
     """Delete a cell."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM cells WHERE id = %s RETURNING id", (cell_id,))
-        deleted = cur.fetchone()
+        deleted = await db.fetch_one("DELETE FROM cells WHERE id = %s RETURNING id", (cell_id,))
         if not deleted:
             raise HTTPException(status_code=404, detail="Cell not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "cells", "cell_blocks", "prisoners")
         return {"message": "Cell deleted", "id": cell_id}
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 # ============================================
@@ -434,32 +904,16 @@ def delete_cell(cell_id: int):
 
 
 @app.get("/api/cell-blocks")
-def get_cell_blocks():
+async def get_cell_blocks(request: Request, db: Database = Depends(get_db)):
     """Get all cell blocks."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT cb.*,
-                   (SELECT COUNT(*) FROM cells c WHERE c.cell_block_id = cb.id) as total_cells,
-                   (SELECT COUNT(*) FROM prisoners p
-                    JOIN cells c ON p.cell_id = c.id
-                    WHERE c.cell_block_id = cb.id AND p.status = 'incarcerated') as current_prisoners
-            FROM cell_blocks cb
-            ORDER BY cb.name
-        """)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    return await reference_response(request, db, "cell_blocks")
 
 
 @app.post("/api/cell-blocks")
-def create_cell_block(block: dict):
+async def create_cell_block(block: dict, db: Database = Depends(get_db)):
     """Create a new cell block."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_block = await db.fetch_one(
             """
             INSERT INTO cell_blocks (name, security_level, capacity, floor_count, description)
             VALUES (%s, %s, %s, %s, %s)
@@ -473,14 +927,41 @@ def create_cell_block(block: dict):
                 block.get("description"),
             ),
         )
-        new_block = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "cell_blocks")
         return new_block
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
+        raise handle_db_error(e)
+
+
+@app.get("/api/visiting-rooms")
+async def get_visiting_rooms(request: Request, db: Database = Depends(get_db)):
+    """Get all visiting rooms."""
+    return await reference_response(request, db, "visiting_rooms")
+
+
+@app.post("/api/visiting-rooms")
+async def create_visiting_room(room: dict, db: Database = Depends(get_db)):
+    """Create a new visiting room."""
+    try:
+        new_room = await db.fetch_one(
+            """
+            INSERT INTO visiting_rooms (name, cell_block_id, booths, opens_at, closes_at, slot_minutes)
+            VALUES (%s, %s, COALESCE(%s, 1), COALESCE(%s::TIME, '08:00'), COALESCE(%s::TIME, '17:00'), COALESCE(%s, 30))
+            RETURNING *
+        """,
+            (
+                room.get("name"),
+                room.get("cell_block_id"),
+                room.get("booths"),
+                room.get("opens_at"),
+                room.get("closes_at"),
+                room.get("slot_minutes"),
+            ),
+        )
+        db.after_commit(invalidate_tables, "visiting_rooms")
+        return new_room
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 # ============================================
@@ -489,65 +970,63 @@ def create_cell_block(block: dict):
 
 
 @app.get("/api/staff")
-def get_staff(role_id: Optional[int] = None, active_only: bool = True):
+async def get_staff(
+    request: Request,
+    response: Response,
+    role_id: Optional[int] = None,
+    active_only: bool = True,
+    db: Database = Depends(get_db),
+):
     """Get all staff members."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = """
-            SELECT s.*, sr.name as role_name, sr.access_level, cb.name as block_name
-            FROM staff s
-            JOIN staff_roles sr ON s.role_id = sr.id
-            LEFT JOIN cell_blocks cb ON s.assigned_block_id = cb.id
-            WHERE 1=1
-        """
-        params = []
+    source = """
+        FROM staff s
+        JOIN staff_roles sr ON s.role_id = sr.id
+        LEFT JOIN cell_blocks cb ON s.assigned_block_id = cb.id
+        WHERE 1=1
+    """
+    params = []
 
-        if role_id:
-            query += " AND s.role_id = %s"
-            params.append(role_id)
+    if role_id:
+        source += " AND s.role_id = %s"
+        params.append(role_id)
 
-        if active_only:
-            query += " AND s.is_active = true"
+    if active_only:
+        source += " AND s.is_active = true"
 
-        query += " ORDER BY s.last_name, s.first_name"
-        cur.execute(query, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    unchanged = await check_list_validator(
+        request, response, db, source, params, ["s.updated_at", "sr.created_at", "cb.updated_at"]
+    )
+    if unchanged:
+        return unchanged
+
+    query = "SELECT s.*, sr.name as role_name, sr.access_level, cb.name as block_name" + source
+    query += " ORDER BY s.last_name, s.first_name"
+    return await db.fetch_all(query, params)
 
 
 @app.get("/api/staff/{staff_id}")
-def get_staff_member(staff_id: int):
+async def get_staff_member(staff_id: int, request: Request, response: Response, db: Database = Depends(get_db)):
     """Get a single staff member."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT s.*, sr.name as role_name, sr.access_level, cb.name as block_name
-            FROM staff s
-            JOIN staff_roles sr ON s.role_id = sr.id
-            LEFT JOIN cell_blocks cb ON s.assigned_block_id = cb.id
-            WHERE s.id = %s
-        """,
-            (staff_id,),
-        )
-        staff = cur.fetchone()
-        if not staff:
-            raise HTTPException(status_code=404, detail="Staff member not found")
-        return staff
-    finally:
-        conn.close()
+    staff = await db.fetch_one(
+        """
+        SELECT s.*, sr.name as role_name, sr.access_level, cb.name as block_name
+        FROM staff s
+        JOIN staff_roles sr ON s.role_id = sr.id
+        LEFT JOIN cell_blocks cb ON s.assigned_block_id = cb.id
+        WHERE s.id = %s
+    """,
+        (staff_id,),
+    )
+    if not staff:
+        raise HTTPException(status_code=404, detail="Staff member not found")
+    return not_modified(request, response, make_etag(request.url.path, staff)) or staff
 
 
 @app.post("/api/staff")
-def create_staff(staff: dict):
+async def create_staff(staff: dict, db: Database = Depends(get_db)):
     """Create a new staff member."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_staff = await db.fetch_one(
             """
             INSERT INTO staff (
                 employee_id, first_name, last_name, role_id, date_of_birth,
@@ -570,23 +1049,17 @@ def create_staff(staff: dict):
                 staff.get("is_active", True),
             ),
         )
-        new_staff = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "staff")
         return new_staff
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.put("/api/staff/{staff_id}")
-def update_staff(staff_id: int, staff: dict):
+async def update_staff(staff_id: int, staff: dict, db: Database = Depends(get_db)):
     """Update a staff member."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        updated = await db.fetch_one(
             """
             UPDATE staff SET
                 first_name = COALESCE(%s, first_name),
@@ -612,35 +1085,25 @@ def update_staff(staff_id: int, staff: dict):
                 staff_id,
             ),
         )
-        updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Staff member not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "staff")
         return updated
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.delete("/api/staff/{staff_id}")
-def delete_staff(staff_id: int):
+async def delete_staff(staff_id: int, db: Database = Depends(get_db)):
     """Delete a staff member."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM staff WHERE id = %s RETURNING id", (staff_id,))
-        deleted = cur.fetchone()
+        deleted = await db.fetch_one("DELETE FROM staff WHERE id = %s RETURNING id", (staff_id,))
         if not deleted:
             raise HTTPException(status_code=404, detail="Staff member not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "staff")
         return {"message": "Staff member deleted", "id": staff_id}
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 # ============================================
@@ -649,71 +1112,126 @@ def delete_staff(staff_id: int):
 
 
 @app.get("/api/visits")
-def get_visits(
+async def get_visits(
+    request: Request,
+    response: Response,
     prisoner_id: Optional[int] = None,
     status: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     limit: int = Query(100, le=1000),
     offset: int = 0,
+    cursor: Optional[str] = None,
+    db: Database = Depends(get_db),
 ):
-    """Get all visits with optional filtering."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = """
-            SELECT v.*,
-                   p.prisoner_number, p.first_name as prisoner_first_name, p.last_name as prisoner_last_name,
-                   vr.first_name as visitor_first_name, vr.last_name as visitor_last_name, vr.relationship_type
-            FROM visits v
-            JOIN prisoners p ON v.prisoner_id = p.id
-            JOIN visitors vr ON v.visitor_id = vr.id
-            WHERE 1=1
-        """
-        params = []
-
-        if prisoner_id:
-            query += " AND v.prisoner_id = %s"
-            params.append(prisoner_id)
-
-        if status:
-            query += " AND v.status = %s"
-            params.append(status)
+    """Get all visits with optional filtering; the next page's cursor is sent in ``X-Next-Cursor``."""
+    query = """
+        SELECT v.*,
+               p.prisoner_number, p.first_name as prisoner_first_name, p.last_name as prisoner_last_name,
+               vr.first_name as visitor_first_name, vr.last_name as visitor_last_name, vr.relationship_type
+        FROM visits v
+        JOIN prisoners p ON v.prisoner_id = p.id
+        JOIN visitors vr ON v.visitor_id = vr.id
+        WHERE 1=1
+    """
+    params = []
+
+    if prisoner_id:
+        query += " AND v.prisoner_id = %s"
+        params.append(prisoner_id)
+
+    if status:
+        query += " AND v.status = %s"
+        params.append(status)
+
+    if date_from:
+        query += " AND v.visit_date >= %s"
+        params.append(date_from)
+
+    if date_to:
+        query += " AND v.visit_date <= %s"
+        params.append(date_to)
+
+    query, params = paginate(query, params, VISITS_ORDER, limit, offset, cursor)
+    visits = await db.fetch_all(query, params)
+    cursor_token = next_cursor(visits, VISITS_ORDER, limit)
+    if cursor_token:
+        response.headers["X-Next-Cursor"] = cursor_token
+    return not_modified(request, response, page_etag(request, visits)) or visits
+
+
+# Most days one availability request may cover
+VISIT_AVAILABILITY_MAX_DAYS = 31
+
+# Double bookings rejected by the visit_bookings exclusion constraints (or by trg_assign_visit_booth,
+# which raises the same SQLSTATE when a room has no free booth)
+EXCLUSION_VIOLATION = "23P01"
+VISIT_CONFLICTS = {
+    "no_overlapping_prisoner_visits": "The prisoner already has a visit at that time",
+    "no_overlapping_booth_visits": "That visiting room booth is already booked at that time",
+}
 
-        if date_from:
-            query += " AND v.visit_date >= %s"
-            params.append(date_from)
 
-        if date_to:
-            query += " AND v.visit_date <= %s"
-            params.append(date_to)
+def visit_conflict(e: DatabaseError) -> Optional[HTTPException]:
+    """A 409 for a double-booked prisoner or room, None for any other error."""
+    if e.sqlstate != EXCLUSION_VIOLATION:
+        return None
+    for constraint, detail in VISIT_CONFLICTS.items():
+        if constraint in str(e):
+            return HTTPException(status_code=409, detail=detail)
+    return HTTPException(status_code=409, detail="The visiting room has no free booth at that time")
 
-        query += " ORDER BY v.visit_date DESC, v.scheduled_start_time LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
 
-        cur.execute(query, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+@app.get("/api/visits/availability")
+async def get_visit_availability(
+    prisoner_id: Optional[int] = None,
+    visiting_room_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    duration: Optional[int] = Query(None, ge=5, le=480),
+    db: Database = Depends(get_db),
+):
+    """
+    Free visit slots from ``date_from`` (default today) to ``date_to`` (default a week on).
+
+    Slots of ``duration`` minutes (default: each room's slot length) in which the
+    room - or, without ``visiting_room_id``, any active room - has a free booth and
+    the prisoner, if given, has no other visit.
+    """
+    if prisoner_id is None and visiting_room_id is None:
+        raise HTTPException(status_code=400, detail="Give a prisoner_id, a visiting_room_id or both")
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=6)
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to is before date_from")
+    if (date_to - date_from).days >= VISIT_AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {VISIT_AVAILABILITY_MAX_DAYS} days per request")
+    try:
+        slots = await db.fetch_all(
+            "SELECT * FROM get_visit_availability(%s, %s, %s, %s, %s)",
+            (date_from, date_to, prisoner_id, visiting_room_id, duration),
+        )
+    except DatabaseError as e:
+        raise handle_db_error(e)
+    return {"date_from": date_from, "date_to": date_to, "slots": slots}
 
 
 @app.post("/api/visits")
-def create_visit(visit: dict):
+async def create_visit(visit: dict, db: Database = Depends(get_db)):
     """Create a new visit."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_visit = await db.fetch_one(
             """
             INSERT INTO visits (
-                prisoner_id, visitor_id, visit_date, scheduled_start_time,
+                prisoner_id, visitor_id, visiting_room_id, visit_date, scheduled_start_time,
                 scheduled_end_time, status, visit_type, approved_by_staff_id, notes
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING *
         """,
             (
                 visit.get("prisoner_id"),
                 visit.get("visitor_id"),
+                visit.get("visiting_room_id"),
                 visit.get("visit_date"),
                 visit.get("scheduled_start_time"),
                 visit.get("scheduled_end_time"),
@@ -723,25 +1241,21 @@ def create_visit(visit: dict):
                 visit.get("notes"),
             ),
         )
-        new_visit = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "visits")
+        db.after_commit(forget_prisoner_history, new_visit["prisoner_id"])
         return new_visit
-    except psycopg2.Error as e:
-        conn.rollback()
-        raise handle_db_error(e)
-    finally:
-        conn.close()
+    except DatabaseError as e:
+        raise visit_conflict(e) or handle_db_error(e)
 
 
 @app.put("/api/visits/{visit_id}")
-def update_visit(visit_id: int, visit: dict):
+async def update_visit(visit_id: int, visit: dict, db: Database = Depends(get_db)):
     """Update a visit."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        updated = await db.fetch_one(
             """
             UPDATE visits SET
+                visiting_room_id = COALESCE(%s, visiting_room_id),
                 visit_date = COALESCE(%s, visit_date),
                 scheduled_start_time = COALESCE(%s, scheduled_start_time),
                 scheduled_end_time = COALESCE(%s, scheduled_end_time),
@@ -754,6 +1268,7 @@ def update_visit(visit_id: int, visit: dict):
             RETURNING *
         """,
             (
+                visit.get("visiting_room_id"),
                 visit.get("visit_date"),
                 visit.get("scheduled_start_time"),
                 visit.get("scheduled_end_time"),
@@ -765,35 +1280,27 @@ def update_visit(visit_id: int, visit: dict):
                 visit_id,
             ),
         )
-        updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Visit not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "visits")
+        db.after_commit(forget_prisoner_history, updated["prisoner_id"])
         return updated
-    except psycopg2.Error as e:
-        conn.rollback()
-        raise handle_db_error(e)
-    finally:
-        conn.close()
+    except DatabaseError as e:
+        raise visit_conflict(e) or handle_db_error(e)
 
 
 @app.delete("/api/visits/{visit_id}")
-def delete_visit(visit_id: int):
+async def delete_visit(visit_id: int, db: Database = Depends(get_db)):
     """Delete a visit."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM visits WHERE id = %s RETURNING id", (visit_id,))
-        deleted = cur.fetchone()
+        deleted = await db.fetch_one("DELETE FROM visits WHERE id = %s RETURNING id, prisoner_id", (visit_id,))
         if not deleted:
             raise HTTPException(status_code=404, detail="Visit not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "visits")
+        db.after_commit(forget_prisoner_history, deleted["prisoner_id"])
         return {"message": "Visit deleted", "id": visit_id}
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 # ============================================
@@ -802,36 +1309,43 @@ def delete_visit(visit_id: int):
 
 
 @app.get("/api/visitors")
-def get_visitors(search: Optional[str] = None, blacklisted: Optional[bool] = None):
-    """Get all visitors."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = "SELECT * FROM visitors WHERE 1=1"
-        params = []
+async def get_visitors(
+    request: Request,
+    response: Response,
+    search: Optional[str] = None,
+    blacklisted: Optional[bool] = None,
+    db: Database = Depends(get_db),
+):
+    """Get all visitors; searches are ranked by name similarity."""
+    source = " FROM visitors WHERE 1=1"
+    params = []
+
+    if search:
+        source += f" AND {VISITOR_FULL_NAME} ILIKE %s"
+        params.append(f"%{search}%")
 
-        if search:
-            query += " AND (first_name ILIKE %s OR last_name ILIKE %s)"
-            params.extend([f"%{search}%", f"%{search}%"])
+    if blacklisted is not None:
+        source += " AND is_blacklisted = %s"
+        params.append(blacklisted)
 
-        if blacklisted is not None:
-            query += " AND is_blacklisted = %s"
-            params.append(blacklisted)
+    unchanged = await check_list_validator(request, response, db, source, params, ["updated_at"])
+    if unchanged:
+        return unchanged
 
-        query += " ORDER BY last_name, first_name"
-        cur.execute(query, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    if search:
+        query = f"SELECT *, word_similarity(%s, {VISITOR_FULL_NAME}) AS search_rank" + source
+        query += " ORDER BY search_rank DESC, last_name, first_name"
+        params = [search, *params]
+    else:
+        query = "SELECT *" + source + " ORDER BY last_name, first_name"
+    return await db.fetch_all(query, params)
 
 
 @app.post("/api/visitors")
-def create_visitor(visitor: dict):
+async def create_visitor(visitor: dict, db: Database = Depends(get_db)):
     """Create a new visitor."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_visitor = await db.fetch_one(
             """
             INSERT INTO visitors (
                 first_name, last_name, date_of_birth, id_document_type,
@@ -850,23 +1364,17 @@ def create_visitor(visitor: dict):
                 visitor.get("email"),
             ),
         )
-        new_visitor = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "visitors")
         return new_visitor
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.put("/api/visitors/{visitor_id}")
-def update_visitor(visitor_id: int, visitor: dict):
+async def update_visitor(visitor_id: int, visitor: dict, db: Database = Depends(get_db)):
     """Update a visitor."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        updated = await db.fetch_one(
             """
             UPDATE visitors SET
                 first_name = COALESCE(%s, first_name),
@@ -888,35 +1396,25 @@ def update_visitor(visitor_id: int, visitor: dict):
                 visitor_id,
             ),
         )
-        updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Visitor not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "visitors")
         return updated
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.delete("/api/visitors/{visitor_id}")
-def delete_visitor(visitor_id: int):
+async def delete_visitor(visitor_id: int, db: Database = Depends(get_db)):
     """Delete a visitor."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM visitors WHERE id = %s RETURNING id", (visitor_id,))
-        deleted = cur.fetchone()
+        deleted = await db.fetch_one("DELETE FROM visitors WHERE id = %s RETURNING id", (visitor_id,))
         if not deleted:
             raise HTTPException(status_code=404, detail="Visitor not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "visitors")
         return {"message": "Visitor deleted", "id": visitor_id}
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 # ============================================
@@ -925,38 +1423,39 @@ def delete_visitor(visitor_id: int):
 
 
 @app.get("/api/sentences")
-def get_sentences(prisoner_id: Optional[int] = None):
+async def get_sentences(
+    request: Request, response: Response, prisoner_id: Optional[int] = None, db: Database = Depends(get_db)
+):
     """Get all sentences."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = """
-            SELECT s.*, ct.name as crime_name, ct.severity_level,
-                   p.prisoner_number, p.first_name, p.last_name
-            FROM sentences s
-            JOIN crime_types ct ON s.crime_type_id = ct.id
-            JOIN prisoners p ON s.prisoner_id = p.id
-        """
-        params = []
-
-        if prisoner_id:
-            query += " WHERE s.prisoner_id = %s"
-            params.append(prisoner_id)
-
-        query += " ORDER BY s.sentence_start_date DESC"
-        cur.execute(query, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    source = """
+        FROM sentences s
+        JOIN crime_types ct ON s.crime_type_id = ct.id
+        JOIN prisoners p ON s.prisoner_id = p.id
+    """
+    params = []
+
+    if prisoner_id:
+        source += " WHERE s.prisoner_id = %s"
+        params.append(prisoner_id)
+
+    unchanged = await check_list_validator(
+        request, response, db, source, params, ["s.updated_at", "ct.created_at", "p.updated_at"]
+    )
+    if unchanged:
+        return unchanged
+
+    query = """
+        SELECT s.*, ct.name as crime_name, ct.severity_level,
+               p.prisoner_number, p.first_name, p.last_name
+    """ + source + " ORDER BY s.sentence_start_date DESC"
+    return await db.fetch_all(query, params)
 
 
 @app.post("/api/sentences")
-def create_sentence(sentence: dict):
+async def create_sentence(sentence: dict, db: Database = Depends(get_db)):
     """Create a new sentence."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_sentence = await db.fetch_one(
             """
             INSERT INTO sentences (
                 prisoner_id, crime_type_id, sentence_start_date, sentence_years,
@@ -980,33 +1479,25 @@ def create_sentence(sentence: dict):
                 sentence.get("notes"),
             ),
         )
-        new_sentence = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "sentences")
+        db.after_commit(forget_prisoner_history, new_sentence["prisoner_id"])
         return new_sentence
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.delete("/api/sentences/{sentence_id}")
-def delete_sentence(sentence_id: int):
+async def delete_sentence(sentence_id: int, db: Database = Depends(get_db)):
     """Delete a sentence."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM sentences WHERE id = %s RETURNING id", (sentence_id,))
-        deleted = cur.fetchone()
+        deleted = await db.fetch_one("DELETE FROM sentences WHERE id = %s RETURNING id, prisoner_id", (sentence_id,))
         if not deleted:
             raise HTTPException(status_code=404, detail="Sentence not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "sentences")
+        db.after_commit(forget_prisoner_history, deleted["prisoner_id"])
         return {"message": "Sentence deleted", "id": sentence_id}
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 # ============================================
@@ -1015,35 +1506,45 @@ def delete_sentence(sentence_id: int):
 
 
 @app.get("/api/programs")
-def get_programs(active_only: bool = True):
+async def get_programs(
+    request: Request, response: Response, active_only: bool = True, db: Database = Depends(get_db)
+):
     """Get all programs."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = """
-            SELECT p.*, pt.name as type_name,
-                   s.first_name as instructor_first_name, s.last_name as instructor_last_name,
-                   (SELECT COUNT(*) FROM prisoner_programs pp WHERE pp.program_id = p.id AND pp.status = 'enrolled') as current_enrolled
-            FROM programs p
-            JOIN program_types pt ON p.program_type_id = pt.id
-            LEFT JOIN staff s ON p.instructor_staff_id = s.id
-        """
-        if active_only:
-            query += " WHERE p.is_active = true"
-        query += " ORDER BY p.name"
-        cur.execute(query)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    source = """
+        FROM programs p
+        JOIN program_types pt ON p.program_type_id = pt.id
+        LEFT JOIN staff s ON p.instructor_staff_id = s.id
+    """
+    if active_only:
+        source += " WHERE p.is_active = true"
+
+    # current_enrolled depends on enrollments: their newest change covers inserts and updates, and
+    # the enrolled count covers deletes (prisoner deletes cascade to them, archiving moves them)
+    unchanged = await check_list_validator(
+        request,
+        response,
+        db,
+        source,
+        (),
+        ["p.updated_at", "s.updated_at", "(SELECT MAX(updated_at) FROM prisoner_programs)"],
+        ["(SELECT COUNT(*) FROM prisoner_programs WHERE status = 'enrolled')"],
+    )
+    if unchanged:
+        return unchanged
+
+    query = """
+        SELECT p.*, pt.name as type_name,
+               s.first_name as instructor_first_name, s.last_name as instructor_last_name,
+               (SELECT COUNT(*) FROM prisoner_programs pp WHERE pp.program_id = p.id AND pp.status = 'enrolled') as current_enrolled
+    """ + source + " ORDER BY p.name"
+    return await db.fetch_all(query)
 
 
 @app.post("/api/programs")
-def create_program(program: dict):
+async def create_program(program: dict, db: Database = Depends(get_db)):
     """Create a new program."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_program = await db.fetch_one(
             """
             INSERT INTO programs (
                 name, program_type_id, description, duration_weeks,
@@ -1061,55 +1562,56 @@ def create_program(program: dict):
                 program.get("is_active", True),
             ),
         )
-        new_program = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "programs")
         return new_program
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.get("/api/prisoner-programs")
-def get_prisoner_programs(prisoner_id: Optional[int] = None, program_id: Optional[int] = None):
+async def get_prisoner_programs(
+    request: Request,
+    response: Response,
+    prisoner_id: Optional[int] = None,
+    program_id: Optional[int] = None,
+    db: Database = Depends(get_db),
+):
     """Get prisoner program enrollments."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = """
-            SELECT pp.*, p.name as program_name, pt.name as program_type,
-                   pr.prisoner_number, pr.first_name, pr.last_name
-            FROM prisoner_programs pp
-            JOIN programs p ON pp.program_id = p.id
-            JOIN program_types pt ON p.program_type_id = pt.id
-            JOIN prisoners pr ON pp.prisoner_id = pr.id
-            WHERE 1=1
-        """
-        params = []
-
-        if prisoner_id:
-            query += " AND pp.prisoner_id = %s"
-            params.append(prisoner_id)
-
-        if program_id:
-            query += " AND pp.program_id = %s"
-            params.append(program_id)
-
-        query += " ORDER BY pp.enrollment_date DESC"
-        cur.execute(query, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    source = """
+        FROM prisoner_programs pp
+        JOIN programs p ON pp.program_id = p.id
+        JOIN program_types pt ON p.program_type_id = pt.id
+        JOIN prisoners pr ON pp.prisoner_id = pr.id
+        WHERE 1=1
+    """
+    params = []
+
+    if prisoner_id:
+        source += " AND pp.prisoner_id = %s"
+        params.append(prisoner_id)
+
+    if program_id:
+        source += " AND pp.program_id = %s"
+        params.append(program_id)
+
+    unchanged = await check_list_validator(
+        request, response, db, source, params, ["pp.updated_at", "p.updated_at", "pr.updated_at"]
+    )
+    if unchanged:
+        return unchanged
+
+    query = """
+        SELECT pp.*, p.name as program_name, pt.name as program_type,
+               pr.prisoner_number, pr.first_name, pr.last_name
+    """ + source + " ORDER BY pp.enrollment_date DESC"
+    return await db.fetch_all(query, params)
 
 
 @app.post("/api/prisoner-programs")
-def enroll_prisoner(enrollment: dict):
+async def enroll_prisoner(enrollment: dict, db: Database = Depends(get_db)):
     """Enroll a prisoner in a program."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_enrollment = await db.fetch_one(
             """
             INSERT INTO prisoner_programs (prisoner_id, program_id, enrollment_date, status, notes)
             VALUES (%s, %s, %s, %s, %s)
@@ -1123,23 +1625,18 @@ def enroll_prisoner(enrollment: dict):
                 enrollment.get("notes"),
             ),
         )
-        new_enrollment = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "prisoner_programs")
+        db.after_commit(forget_prisoner_history, new_enrollment["prisoner_id"])
         return new_enrollment
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.put("/api/prisoner-programs/{enrollment_id}")
-def update_enrollment(enrollment_id: int, enrollment: dict):
+async def update_enrollment(enrollment_id: int, enrollment: dict, db: Database = Depends(get_db)):
     """Update a program enrollment."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        updated = await db.fetch_one(
             """
             UPDATE prisoner_programs SET
                 status = COALESCE(%s, status),
@@ -1157,16 +1654,13 @@ def update_enrollment(enrollment_id: int, enrollment: dict):
                 enrollment_id,
             ),
         )
-        updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Enrollment not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "prisoner_programs")
+        db.after_commit(forget_prisoner_history, updated["prisoner_id"])
         return updated
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 # ============================================
@@ -1175,56 +1669,65 @@ def update_enrollment(enrollment_id: int, enrollment: dict):
 
 
 @app.get("/api/incidents")
-def get_incidents(
+async def get_incidents(
+    request: Request,
+    response: Response,
     prisoner_id: Optional[int] = None,
     severity: Optional[str] = None,
     resolved: Optional[bool] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
     limit: int = Query(100, le=1000),
     offset: int = 0,
+    cursor: Optional[str] = None,
+    db: Database = Depends(get_db),
 ):
-    """Get all incidents."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        query = """
-            SELECT i.*, p.prisoner_number, p.first_name, p.last_name,
-                   s.employee_id as reporter_employee_id,
-                   s.first_name as reporter_first_name, s.last_name as reporter_last_name
-            FROM incidents i
-            JOIN prisoners p ON i.prisoner_id = p.id
-            LEFT JOIN staff s ON i.reported_by_staff_id = s.id
-            WHERE 1=1
-        """
-        params = []
-
-        if prisoner_id:
-            query += " AND i.prisoner_id = %s"
-            params.append(prisoner_id)
-
-        if severity:
-            query += " AND i.severity = %s"
-            params.append(severity)
-
-        if resolved is not None:
-            query += " AND i.is_resolved = %s"
-            params.append(resolved)
-
-        query += " ORDER BY i.incident_date DESC LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
-
-        cur.execute(query, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+    """Get all incidents; the next page's cursor is sent in ``X-Next-Cursor``."""
+    query = """
+        SELECT i.*, p.prisoner_number, p.first_name, p.last_name,
+               s.employee_id as reporter_employee_id,
+               s.first_name as reporter_first_name, s.last_name as reporter_last_name
+        FROM incidents i
+        JOIN prisoners p ON i.prisoner_id = p.id
+        LEFT JOIN staff s ON i.reported_by_staff_id = s.id
+        WHERE 1=1
+    """
+    params = []
+
+    if prisoner_id:
+        query += " AND i.prisoner_id = %s"
+        params.append(prisoner_id)
+
+    if severity:
+        query += " AND i.severity = %s"
+        params.append(severity)
+
+    if resolved is not None:
+        query += " AND i.is_resolved = %s"
+        params.append(resolved)
+
+    # Date bounds limit the scan to the matching monthly partitions
+    if date_from:
+        query += " AND i.incident_date >= %s"
+        params.append(date_from)
+
+    if date_to:
+        query += " AND i.incident_date < %s::DATE + 1"
+        params.append(date_to)
+
+    query, params = paginate(query, params, INCIDENTS_ORDER, limit, offset, cursor)
+    incidents = await db.fetch_all(query, params)
+    cursor_token = next_cursor(incidents, INCIDENTS_ORDER, limit)
+    if cursor_token:
+        response.headers["X-Next-Cursor"] = cursor_token
+    return not_modified(request, response, page_etag(request, incidents)) or incidents
 
 
 @app.post("/api/incidents")
-def create_incident(incident: dict):
+async def create_incident(incident: dict, db: Database = Depends(get_db)):
     """Create a new incident."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        new_incident = await db.fetch_one(
             """
             INSERT INTO incidents (
                 prisoner_id, reported_by_staff_id, incident_date, incident_type,
@@ -1244,23 +1747,18 @@ def create_incident(incident: dict):
                 incident.get("solitary_days", 0),
             ),
         )
-        new_incident = cur.fetchone()
-        conn.commit()
+        db.after_commit(invalidate_tables, "incidents")
+        db.after_commit(forget_prisoner_history, new_incident["prisoner_id"])
         return new_incident
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.put("/api/incidents/{incident_id}")
-def update_incident(incident_id: int, incident: dict):
+async def update_incident(incident_id: int, incident: dict, db: Database = Depends(get_db)):
     """Update an incident."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute(
+        updated = await db.fetch_one(
             """
             UPDATE incidents SET
                 incident_type = COALESCE(%s, incident_type),
@@ -1286,35 +1784,243 @@ def update_incident(incident_id: int, incident: dict):
                 incident_id,
             ),
         )
-        updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Incident not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "incidents")
+        db.after_commit(forget_prisoner_history, updated["prisoner_id"])
         return updated
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
 
 
 @app.delete("/api/incidents/{incident_id}")
-def delete_incident(incident_id: int):
+async def delete_incident(incident_id: int, db: Database = Depends(get_db)):
     """Delete an incident."""
-    conn = get_db_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM incidents WHERE id = %s RETURNING id", (incident_id,))
-        deleted = cur.fetchone()
+        deleted = await db.fetch_one("DELETE FROM incidents WHERE id = %s RETURNING id, prisoner_id", (incident_id,))
         if not deleted:
             raise HTTPException(status_code=404, detail="Incident not found")
-        conn.commit()
+        db.after_commit(invalidate_tables, "incidents")
+        db.after_commit(forget_prisoner_history, deleted["prisoner_id"])
         return {"message": "Incident deleted", "id": incident_id}
-    except psycopg2.Error as e:
-        conn.rollback()
+    except DatabaseError as e:
         raise handle_db_error(e)
-    finally:
-        conn.close()
+
+
+# ============================================
+# BULK IMPORT ENDPOINTS
+# ============================================
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@app.post("/api/{table}/import")
+async def bulk_import(
+    table: str,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    all_or_nothing: bool = False,
+    dry_run: bool = False,
+    db: Database = Depends(get_db),
+):
+    """
+    Bulk-load prisoners, visits or incidents from a CSV (header row) or NDJSON body.
+
+    The format comes from ``format`` or the Content-Type. The body is parsed
+    and staged while it streams in; valid rows are merged in one transaction
+    and rejected ones reported by line.
+    """
+    spec = IMPORTS.get(table)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Bulk import is not available for {table}")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or IMPORT_CONTENT_TYPES.get(content_type)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+
+    async def body():
+        # Parsed and staged as it arrives; the transaction rolls back if the upload grows past the limit
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"Import is larger than {IMPORT_MAX_BYTES} bytes")
+            yield chunk
+
+    try:
+        report = await run_import(db, spec, body(), fmt, all_or_nothing=all_or_nothing, dry_run=dry_run)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DatabaseError as e:
+        raise handle_db_error(e)
+    if report["inserted"]:
+        invalidate_tables(*spec.tables)
+        PRISONER_HISTORY_CACHE.clear()
+    return report
+
+
+# ============================================
+# BATCH ENDPOINT
+# ============================================
+
+# resource -> operation -> write endpoint; batches call them with the batch's transaction as ``db``
+BATCH_HANDLERS = {
+    "prisoners": {"create": create_prisoner, "update": update_prisoner, "delete": delete_prisoner},
+    "cells": {"create": create_cell, "update": update_cell, "delete": delete_cell},
+    "cell-blocks": {"create": create_cell_block},
+    "visiting-rooms": {"create": create_visiting_room},
+    "staff": {"create": create_staff, "update": update_staff, "delete": delete_staff},
+    "visits": {"create": create_visit, "update": update_visit, "delete": delete_visit},
+    "visitors": {"create": create_visitor, "update": update_visitor, "delete": delete_visitor},
+    "sentences": {"create": create_sentence, "delete": delete_sentence},
+    "programs": {"create": create_program},
+    "prisoner-programs": {"create": enroll_prisoner, "update": update_enrollment},
+    "incidents": {"create": create_incident, "update": update_incident, "delete": delete_incident},
+}
+
+
+class BatchAborted(Exception):
+    """Raised inside an atomic batch's transaction to roll it back after a failed operation."""
+
+
+def batch_call(index: int, operation) -> tuple:
+    """Resolve one batch operation to ``(handler, args)``, or raise a 400 describing what is wrong with it."""
+    if not isinstance(operation, dict):
+        raise HTTPException(status_code=400, detail=f"Operation {index} must be an object")
+    # Both are dict keys below; an object or array there would be unhashable
+    for field in ("resource", "op"):
+        if not isinstance(operation.get(field), str):
+            raise HTTPException(status_code=400, detail=f"Operation {index}: {field} must be a string")
+    handlers = BATCH_HANDLERS.get(operation["resource"])
+    if handlers is None:
+        raise HTTPException(
+            status_code=400, detail=f"Operation {index}: unknown resource {operation.get('resource')!r}"
+        )
+    handler = handlers.get(operation["op"])
+    if handler is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Operation {index}: op must be one of {', '.join(handlers)} for {operation['resource']}",
+        )
+    data = operation.get("data") or {}
+    if operation["op"] != "delete" and not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail=f"Operation {index}: data must be an object")
+    if operation["op"] == "create":
+        return handler, (data,)
+    if not isinstance(operation.get("id"), int):
+        raise HTTPException(status_code=400, detail=f"Operation {index}: {operation['op']} needs an integer id")
+    if operation["op"] == "delete":
+        return handler, (operation["id"],)
+    return handler, (operation["id"], data)
+
+
+async def run_batch_operation(session, handler, args, savepoint: bool) -> dict:
+    try:
+        if savepoint:
+            async with session.transaction():
+                result = await handler(*args, db=session)
+        else:
+            result = await handler(*args, db=session)
+        return {"status": 200, "data": result}
+    except HTTPException as e:
+        return {"status": e.status_code, "error": e.detail}
+
+
+@app.post("/api/batch")
+async def run_batch(batch: dict, db: Database = Depends(get_db)):
+    """
+    Run an ordered list of writes over one connection in one transaction.
+
+    Each operation is ``{"op": "create"|"update"|"delete", "resource": "incidents",
+    "id": 5, "data": {...}}`` and behaves like the matching endpoint. With
+    ``"mode": "atomic"`` (the default) the first failure rolls the whole batch
+    back and its status becomes the response status; ``"savepoint"`` isolates
+    each operation in a savepoint and commits the ones that succeed. Caches
+    are invalidated once the batch commits, and only for operations it kept.
+    """
+    operations = batch.get("operations")
+    mode = batch.get("mode", "atomic")
+    if not isinstance(operations, list) or not operations:
+        raise HTTPException(status_code=400, detail="operations must be a non-empty list")
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {BATCH_MAX_OPERATIONS} operations")
+    if mode not in ("atomic", "savepoint"):
+        raise HTTPException(status_code=400, detail="mode must be 'atomic' or 'savepoint'")
+    calls = [batch_call(index, operation) for index, operation in enumerate(operations)]
+
+    results = []
+    try:
+        async with db.transaction() as tx:
+            for handler, args in calls:
+                results.append(await run_batch_operation(tx, handler, args, savepoint=mode == "savepoint"))
+                if mode == "atomic" and results[-1]["status"] >= 400:
+                    raise BatchAborted()
+    except BatchAborted:
+        return JSONResponse(
+            status_code=results[-1]["status"],
+            content=jsonable_encoder({"committed": False, "failed_index": len(results) - 1, "results": results}),
+        )
+    except DatabaseError as e:
+        raise handle_db_error(e)
+    return {"committed": True, "results": results}
+
+
+# ============================================
+# CHANGE EVENTS ENDPOINT
+# ============================================
+
+
+def parse_event_filters(tables: Optional[str], entities: Optional[str]):
+    """Parse ``tables=a,b`` and ``entities=table:id,...`` into a table set and a table -> ids dict."""
+    table_set = {table for table in (tables or "").split(",") if table}
+    entity_map = {}
+    for entity in filter(None, (entities or "").split(",")):
+        table, _, row_id = entity.partition(":")
+        if not row_id.isdigit():
+            raise HTTPException(status_code=400, detail=f"Invalid entity {entity}; expected table:id")
+        entity_map.setdefault(table, set()).add(int(row_id))
+    unknown = (table_set | set(entity_map)) - set(EVENT_TABLES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown table {sorted(unknown)[0]}")
+    if not table_set and not entity_map:
+        table_set = set(EVENT_TABLES)
+    return table_set, entity_map
+
+
+@app.get("/api/events")
+async def change_events(request: Request, tables: Optional[str] = None, entities: Optional[str] = None):
+    """
+    Server-Sent Events stream of row changes.
+
+    Subscribe to whole tables (``tables=visits,incidents``), to single rows
+    (``entities=prisoners:12,cells:3``) or, with neither, to every table.
+    Each ``change`` event carries ``{"table", "op", "ids"}``; ``ids`` is null
+    when too many rows changed to list. A ``resync`` event means changes may
+    have been missed and the client should reload what it shows.
+    """
+    table_set, entity_map = parse_event_filters(tables, entities)
+    hub = request.app.state.hub
+    subscription = hub.subscribe(table_set, entity_map)
+
+    async def body():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comment line keeping proxies and the client from timing out the idle connection
+                    yield ": keep-alive\n\n"
+        finally:
+            hub.unsubscribe(subscription)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
 
 
 # ============================================
@@ -1322,64 +2028,128 @@ def delete_incident(incident_id: int):
 # ============================================
 
 
+async def read_report(
+    request: Request, response: Response, db: Database, view: str, query: str, params=(), fresh: bool = False
+):
+    """
+    Read a report from its materialized snapshot, or live with ``fresh``.
+
+    ``query`` selects from ``{view}``, which is replaced by ``mv_<view>`` or
+    ``v_<view>``; the ``X-As-Of`` header tells the client how current the data is.
+    """
+    if fresh:
+        rows = await db.fetch_all(query.format(view=f"v_{view}"), params)
+        as_of = datetime.now(timezone.utc)
+    else:
+        rows = await db.fetch_all(query.format(view=f"mv_{view}"), params)
+        as_of = request.app.state.reports.as_of.get(f"mv_{view}")
+    if as_of:
+        response.headers["X-As-Of"] = as_of.isoformat()
+    return rows
+
+
 @app.get("/api/views/prisoner-details")
-def get_prisoner_details_view(limit: int = Query(100, le=1000), offset: int = 0):
-    """Get prisoner details view."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM v_prisoner_details LIMIT %s OFFSET %s", (limit, offset))
-        return cur.fetchall()
-    finally:
-        conn.close()
+async def get_prisoner_details_view(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, le=1000),
+    offset: int = 0,
+    fresh: bool = False,
+    db: Database = Depends(get_db),
+):
+    """Get prisoner details view (materialized snapshot unless ``fresh``)."""
+    return await read_report(
+        request,
+        response,
+        db,
+        "prisoner_details",
+        "SELECT * FROM {view} ORDER BY prisoner_id LIMIT %s OFFSET %s",
+        (limit, offset),
+        fresh,
+    )
 
 
 @app.get("/api/views/cell-occupancy")
-def get_cell_occupancy_view():
+async def get_cell_occupancy_view(db: Database = Depends(get_db)):
     """Get cell occupancy view."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM v_cell_occupancy")
-        return cur.fetchall()
-    finally:
-        conn.close()
+    return await db.fetch_all("SELECT * FROM v_cell_occupancy")
 
 
 @app.get("/api/views/upcoming-releases")
-def get_upcoming_releases_view():
-    """Get upcoming releases view."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM v_upcoming_releases")
-        return cur.fetchall()
-    finally:
-        conn.close()
+async def get_upcoming_releases_view(months: int = Query(6, ge=1, le=120), db: Database = Depends(get_db)):
+    """Get upcoming releases view: sentences ending within ``months`` months from today."""
+    return await db.fetch_all(
+        "SELECT * FROM v_upcoming_releases WHERE release_date <= (CURRENT_DATE + make_interval(months => %s))::DATE",
+        (months,),
+    )
+
+
+@app.get("/api/views/release-forecast")
+async def get_release_forecast_view(block_id: Optional[int] = None, db: Database = Depends(get_db)):
+    """Expected release of every incarcerated prisoner (or those of one block), soonest first."""
+    query = "SELECT * FROM v_release_forecast"
+    params = []
+    if block_id is not None:
+        query += " WHERE block_id = %s"
+        params.append(block_id)
+    return await db.fetch_all(query + " ORDER BY release_date NULLS LAST, prisoner_id", params)
 
 
 @app.get("/api/views/block-summary")
-def get_block_summary_view():
-    """Get block summary view."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM v_block_summary")
-        return cur.fetchall()
-    finally:
-        conn.close()
+async def get_block_summary_view(
+    request: Request, response: Response, fresh: bool = False, db: Database = Depends(get_db)
+):
+    """Get block summary view (materialized snapshot unless ``fresh``)."""
+    return await read_report(
+        request, response, db, "block_summary", "SELECT * FROM {view} ORDER BY block_name", fresh=fresh
+    )
 
 
 @app.get("/api/views/staff-overview")
-def get_staff_overview_view():
+async def get_staff_overview_view(db: Database = Depends(get_db)):
     """Get staff overview view."""
-    conn = get_db_connection()
+    return await db.fetch_all("SELECT * FROM v_staff_overview")
+
+
+@app.get("/api/export/{name}")
+async def export_data(
+    name: str,
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    fresh: bool = False,
+    months: int = Query(6, ge=1, le=120),
+    db: Database = Depends(get_db),
+):
+    """
+    Stream a whole view or table as CSV or NDJSON.
+
+    Rows are read through a server-side cursor and sent batch by batch;
+    materialized reports are exported from their snapshot unless ``fresh``.
+    ``months`` is the horizon of ``upcoming-releases``, as on its view endpoint.
+    """
+    if name not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export {name}")
+    query, params = export_query(name, fresh, months=months)
+    chunks = export_stream(db, query, params, format, EXPORT_BATCH_SIZE)
+    # Fetch the first batch before answering, so a failing query still gets a proper error status
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM v_staff_overview")
-        return cur.fetchall()
-    finally:
-        conn.close()
+        first = await anext(chunks, "")
+    except DatabaseError as e:
+        raise handle_db_error(e)
+
+    async def body():
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{format}"'}
+    report = EXPORTS[name][1]
+    if report and not fresh and f"mv_{report}" in request.app.state.reports.as_of:
+        headers["X-As-Of"] = request.app.state.reports.as_of[f"mv_{report}"].isoformat()
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[format], headers=headers)
 
 
 # ============================================
@@ -1388,39 +2158,21 @@ def get_staff_overview_view():
 
 
 @app.get("/api/crime-types")
-def get_crime_types():
+async def get_crime_types(request: Request, db: Database = Depends(get_db)):
     """Get all crime types."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM crime_types ORDER BY name")
-        return cur.fetchall()
-    finally:
-        conn.close()
+    return await reference_response(request, db, "crime_types")
 
 
 @app.get("/api/staff-roles")
-def get_staff_roles():
+async def get_staff_roles(request: Request, db: Database = Depends(get_db)):
     """Get all staff roles."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM staff_roles ORDER BY access_level DESC")
-        return cur.fetchall()
-    finally:
-        conn.close()
+    return await reference_response(request, db, "staff_roles")
 
 
 @app.get("/api/program-types")
-def get_program_types():
+async def get_program_types(request: Request, db: Database = Depends(get_db)):
     """Get all program types."""
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM program_types ORDER BY name")
-        return cur.fetchall()
-    finally:
-        conn.close()
+    return await reference_response(request, db, "program_types")
 
 
 # ============================================
@@ -1428,54 +2180,114 @@ def get_program_types():
 # ============================================
 
 
+STATS_CACHE = TTLCache(STATS_CACHE_TTL, tables=("prisoners", "cells", "cell_blocks", "staff", "visits", "incidents"))
+
+
 @app.get("/api/stats")
-def get_stats():
-    """Get overall statistics."""
-    conn = get_db_connection()
+async def get_stats(db: Database = Depends(get_db)):
+    """Get overall statistics (one statement, cached until a write touches the source tables)."""
+    return await STATS_CACHE.get_or_load("stats", lambda: load_stats(db))
+
+
+async def load_stats(db: Database) -> dict:
+    # Prisoner totals come from the trigger-maintained counters rather than counting prisoners
+    return await db.fetch_one("""
+        SELECT
+            (SELECT COALESCE(SUM(prisoner_count), 0)::BIGINT FROM prisoner_status_counts
+             WHERE status = 'incarcerated') AS total_prisoners,
+            (SELECT COUNT(*) FROM cells) AS total_cells,
+            (SELECT COUNT(*) FROM staff WHERE is_active = true) AS active_staff,
+            (SELECT COUNT(*) FROM visits WHERE status = 'scheduled') AS scheduled_visits,
+            (SELECT COUNT(*) FROM incidents WHERE is_resolved = false) AS unresolved_incidents,
+            (SELECT COALESCE(json_agg(json_build_object('name', name, 'count', current_occupancy) ORDER BY name), '[]')
+             FROM cell_blocks) AS prisoners_by_block
+    """)
+
+
+@app.get("/api/health")
+async def health_check(request: Request, db: Database = Depends(get_db)):
+    """Health check endpoint, including connection pool statistics."""
     try:
-        cur = conn.cursor()
-        stats = {}
+        await db.fetch_val("SELECT 1")
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "pool": db.stats(),
+            "listener": request.app.state.listener.connected,
+            "event_subscribers": request.app.state.hub.subscribers,
+        }
+    except Exception as e:
+        logger.error(f"Health check failed: {e}")
+        return {"status": "unhealthy", "database": "unavailable", "pool": db.stats()}
 
-        cur.execute("SELECT COUNT(*) FROM prisoners WHERE status = 'incarcerated'")
-        stats["total_prisoners"] = cur.fetchone()["count"]
 
-        cur.execute("SELECT COUNT(*) FROM cells")
-        stats["total_cells"] = cur.fetchone()["count"]
+@app.get("/api/admin/queries")
+async def get_query_log(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000),
+    min_ms: float = 0.0,
+    route: Optional[str] = None,
+    search: Optional[str] = None,
+):
+    """
+    This worker's query log: statements by total time, recent slow statements with their
+    ``EXPLAIN (ANALYZE, BUFFERS)`` plans, and requests that repeated a statement (N+1 patterns).
 
-        cur.execute("SELECT COUNT(*) FROM staff WHERE is_active = true")
-        stats["active_staff"] = cur.fetchone()["count"]
+    ``route`` and ``search`` filter by a substring of the route (e.g. ``GET /api/visits``) or SQL text.
+    """
+    return request.app.state.query_log.snapshot(limit, min_ms, route, search)
 
-        cur.execute("SELECT COUNT(*) FROM visits WHERE status = 'scheduled'")
-        stats["scheduled_visits"] = cur.fetchone()["count"]
 
-        cur.execute("SELECT COUNT(*) FROM incidents WHERE is_resolved = false")
-        stats["unresolved_incidents"] = cur.fetchone()["count"]
+@app.delete("/api/admin/queries")
+async def clear_query_log(request: Request):
+    """Reset this worker's query log."""
+    request.app.state.query_log.clear()
+    return {"message": "Query log cleared"}
 
-        cur.execute("""
-            SELECT cb.name, COUNT(p.id) as count
-            FROM cell_blocks cb
-            LEFT JOIN cells c ON c.cell_block_id = cb.id
-            LEFT JOIN prisoners p ON p.cell_id = c.id AND p.status = 'incarcerated'
-            GROUP BY cb.id, cb.name
-            ORDER BY cb.name
-        """)
-        stats["prisoners_by_block"] = cur.fetchall()
 
-        return stats
-    finally:
-        conn.close()
+@app.get("/api/admin/partitions")
+async def get_partitions(request: Request):
+    """Partition policies and the monthly partitions of visits and incidents, with estimated sizes."""
+    try:
+        return await request.app.state.partitions.partitions()
+    except DatabaseError as e:
+        raise handle_db_error(e)
 
 
-@app.get("/api/health")
-def health_check():
-    """Health check endpoint."""
+@app.post("/api/admin/partitions/maintain")
+async def maintain_partitions(request: Request):
+    """Apply the partition policies now instead of waiting for the next scheduled run."""
     try:
-        conn = get_db_connection()
-        conn.close()
-        return {"status": "healthy", "database": "connected"}
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {"status": "unhealthy", "database": "unavailable"}
+        changes = await request.app.state.partitions.run()
+    except DatabaseError as e:
+        raise handle_db_error(e)
+    return {"changes": changes}
+
+
+@app.get("/api/admin/archive")
+async def get_archive_status(request: Request):
+    """Archive settings, the last run and row counts of the hot and archive tables."""
+    try:
+        return await request.app.state.archiver.status()
+    except DatabaseError as e:
+        raise handle_db_error(e)
+
+
+@app.post("/api/admin/archive")
+async def run_archive(request: Request, max_batches: Optional[int] = Query(None, ge=1)):
+    """Archive inactive prisoners now, batch by batch, instead of waiting for the next scheduled run."""
+    try:
+        archived = await request.app.state.archiver.run(max_batches)
+    except DatabaseError as e:
+        raise handle_db_error(e)
+    return {"archived": archived}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(db: Database = Depends(get_db)):
+    """Request, database and connection pool metrics in the Prometheus text format."""
+    metrics.update_pool_stats(db.stats())
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,11 @@
 -- Prison Management Database Schema
 -- Project: Bazy Danych 2025
 
+-- Trigram indexes for substring and fuzzy name search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- B-tree equality in GiST indexes, for the visit booking exclusion constraints
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
 -- ============================================
 -- ENUMERATION TABLES
 -- ============================================
@@ -43,6 +48,7 @@ CREATE TABLE cell_blocks (
     capacity INTEGER NOT NULL CHECK (capacity > 0),
     floor_count INTEGER NOT NULL CHECK (floor_count > 0),
     description TEXT,
+    current_occupancy INTEGER NOT NULL DEFAULT 0, -- maintained by trg_propagate_block_occupancy
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -56,6 +62,7 @@ CREATE TABLE cells (
     capacity INTEGER NOT NULL DEFAULT 1 CHECK (capacity BETWEEN 1 AND 4),
     cell_type VARCHAR(30) NOT NULL DEFAULT 'standard' CHECK (cell_type IN ('standard', 'solitary', 'medical', 'protective')),
     has_window BOOLEAN NOT NULL DEFAULT true,
+    current_occupancy INTEGER NOT NULL DEFAULT 0 CHECK (current_occupancy >= 0), -- maintained by trg_maintain_cell_occupancy
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -92,6 +99,13 @@ CREATE TABLE sentences (
     is_life_sentence BOOLEAN NOT NULL DEFAULT false,
     parole_eligible BOOLEAN NOT NULL DEFAULT true,
     parole_date DATE,
+    -- Stored and indexed, so release reports range-scan idx_sentences_release instead of
+    -- working the date out for every sentence; NULL for life sentences
+    release_date DATE GENERATED ALWAYS AS (
+        CASE WHEN NOT is_life_sentence
+             THEN (sentence_start_date + make_interval(years => sentence_years, months => sentence_months))::DATE
+        END
+    ) STORED,
     court_name VARCHAR(200) NOT NULL,
     case_number VARCHAR(50) NOT NULL,
     judge_name VARCHAR(200),
@@ -140,11 +154,28 @@ CREATE TABLE visitors (
     CONSTRAINT unique_visitor_document UNIQUE (id_document_type, id_document_number)
 );
 
--- Visits
-CREATE TABLE visits (
+-- Visiting rooms; each booth hosts one visit at a time, booked in slot_minutes steps from opens_at
+CREATE TABLE visiting_rooms (
     id SERIAL PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE,
+    cell_block_id INTEGER REFERENCES cell_blocks(id) ON DELETE SET NULL,
+    booths INTEGER NOT NULL DEFAULT 1 CHECK (booths > 0),
+    opens_at TIME NOT NULL DEFAULT '08:00',
+    closes_at TIME NOT NULL DEFAULT '17:00',
+    slot_minutes INTEGER NOT NULL DEFAULT 30 CHECK (slot_minutes > 0),
+    is_active BOOLEAN NOT NULL DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT valid_opening_hours CHECK (closes_at > opens_at)
+);
+
+-- Visits, range partitioned by month of visit_date (see partition_policies)
+CREATE TABLE visits (
+    id SERIAL,
     prisoner_id INTEGER NOT NULL REFERENCES prisoners(id) ON DELETE CASCADE,
     visitor_id INTEGER NOT NULL REFERENCES visitors(id) ON DELETE CASCADE,
+    visiting_room_id INTEGER REFERENCES visiting_rooms(id) ON DELETE SET NULL,
+    booth INTEGER CHECK (booth > 0),  -- assigned by trg_assign_visit_booth
     visit_date DATE NOT NULL,
     scheduled_start_time TIME NOT NULL,
     scheduled_end_time TIME NOT NULL,
@@ -156,7 +187,26 @@ CREATE TABLE visits (
     notes TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    CONSTRAINT valid_visit_times CHECK (scheduled_end_time > scheduled_start_time)
+    CONSTRAINT valid_visit_times CHECK (scheduled_end_time > scheduled_start_time),
+    -- A partitioned table's keys must include the partition column
+    PRIMARY KEY (id, visit_date)
+) PARTITION BY RANGE (visit_date);
+
+-- Rows outside every monthly partition; manage_partitions() moves them into their month
+CREATE TABLE visits_default PARTITION OF visits DEFAULT;
+
+-- The time each scheduled or completed visit occupies, kept in step with visits by
+-- trg_sync_visit_booking. Partitioned tables cannot carry exclusion constraints, so the
+-- double-booking rules live here: a prisoner is in one visit at a time, a booth hosts one visit
+CREATE TABLE visit_bookings (
+    visit_id INTEGER PRIMARY KEY,
+    prisoner_id INTEGER NOT NULL REFERENCES prisoners(id) ON DELETE CASCADE,
+    visiting_room_id INTEGER,
+    booth INTEGER,
+    during TSRANGE NOT NULL,
+    CONSTRAINT no_overlapping_prisoner_visits EXCLUDE USING gist (prisoner_id WITH =, during WITH &&),
+    CONSTRAINT no_overlapping_booth_visits EXCLUDE USING gist (visiting_room_id WITH =, booth WITH =, during WITH &&)
+        WHERE (visiting_room_id IS NOT NULL)
 );
 
 -- Rehabilitation programs
@@ -189,9 +239,9 @@ CREATE TABLE prisoner_programs (
     CONSTRAINT valid_completion CHECK (completion_date IS NULL OR completion_date >= enrollment_date)
 );
 
--- Disciplinary incidents
+-- Disciplinary incidents, range partitioned by month of incident_date
 CREATE TABLE incidents (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     prisoner_id INTEGER NOT NULL REFERENCES prisoners(id) ON DELETE CASCADE,
     reported_by_staff_id INTEGER REFERENCES staff(id) ON DELETE SET NULL,
     incident_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
@@ -204,7 +254,87 @@ CREATE TABLE incidents (
     is_resolved BOOLEAN NOT NULL DEFAULT false,
     resolved_date DATE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, incident_date)
+) PARTITION BY RANGE (incident_date);
+
+CREATE TABLE incidents_default PARTITION OF incidents DEFAULT;
+
+-- ============================================
+-- DERIVED COUNTERS
+-- ============================================
+
+-- Prisoner totals per status, kept current by trg_prisoner_status_counts_*
+CREATE TABLE prisoner_status_counts (
+    status VARCHAR(20) PRIMARY KEY,
+    prisoner_count BIGINT NOT NULL DEFAULT 0
+);
+
+-- Last successful refresh of each materialized report view, see refresh_report_view()
+CREATE TABLE report_refreshes (
+    view_name VARCHAR(63) PRIMARY KEY,
+    refreshed_at TIMESTAMPTZ NOT NULL
+);
+
+-- Monthly partitioning of the append-mostly tables, applied by manage_partitions():
+-- partitions are kept months_ahead months beyond the current one, and partitions that
+-- ended more than retention_months before the current month are detached (left as
+-- standalone tables) or dropped; a NULL retention keeps every partition
+CREATE TABLE partition_policies (
+    table_name VARCHAR(63) PRIMARY KEY,
+    partition_column VARCHAR(63) NOT NULL,
+    months_ahead INTEGER NOT NULL DEFAULT 3 CHECK (months_ahead >= 0),
+    retention_months INTEGER CHECK (retention_months > 0),
+    retention_action VARCHAR(10) NOT NULL DEFAULT 'detach' CHECK (retention_action IN ('detach', 'drop'))
+);
+
+INSERT INTO partition_policies (table_name, partition_column) VALUES
+('visits', 'visit_date'),
+('incidents', 'incident_date');
+
+-- ============================================
+-- ARCHIVE TABLES
+-- ============================================
+
+-- Prisoners who have left (released, transferred, deceased) and every row of their records,
+-- moved out of the hot tables in batches by archive_inactive_prisoners(). Columns match the
+-- source tables (archived_prisoners adds archived_at at the end); the lookup foreign keys
+-- keep the delete rules of the source tables
+CREATE TABLE archived_prisoners (
+    LIKE prisoners INCLUDING CONSTRAINTS,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    UNIQUE (prisoner_number)
+);
+
+CREATE TABLE archived_sentences (
+    LIKE sentences INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id),
+    FOREIGN KEY (prisoner_id) REFERENCES archived_prisoners(id) ON DELETE CASCADE,
+    FOREIGN KEY (crime_type_id) REFERENCES crime_types(id) ON DELETE RESTRICT
+);
+
+CREATE TABLE archived_visits (
+    LIKE visits INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id),
+    FOREIGN KEY (prisoner_id) REFERENCES archived_prisoners(id) ON DELETE CASCADE,
+    FOREIGN KEY (visitor_id) REFERENCES visitors(id) ON DELETE CASCADE,
+    FOREIGN KEY (visiting_room_id) REFERENCES visiting_rooms(id) ON DELETE SET NULL,
+    FOREIGN KEY (approved_by_staff_id) REFERENCES staff(id) ON DELETE SET NULL
+);
+
+CREATE TABLE archived_prisoner_programs (
+    LIKE prisoner_programs INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id),
+    FOREIGN KEY (prisoner_id) REFERENCES archived_prisoners(id) ON DELETE CASCADE,
+    FOREIGN KEY (program_id) REFERENCES programs(id) ON DELETE CASCADE
+);
+
+CREATE TABLE archived_incidents (
+    LIKE incidents INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id),
+    FOREIGN KEY (prisoner_id) REFERENCES archived_prisoners(id) ON DELETE CASCADE,
+    FOREIGN KEY (reported_by_staff_id) REFERENCES staff(id) ON DELETE SET NULL
 );
 
 -- ============================================
@@ -213,16 +343,35 @@ CREATE TABLE incidents (
 
 CREATE INDEX idx_prisoners_status ON prisoners(status);
 CREATE INDEX idx_prisoners_cell ON prisoners(cell_id);
-CREATE INDEX idx_prisoners_name ON prisoners(last_name, first_name);
-CREATE INDEX idx_sentences_prisoner ON sentences(prisoner_id);
+-- Composite sort-key indexes back keyset (cursor) pagination of the list endpoints
+CREATE INDEX idx_prisoners_name ON prisoners(last_name, first_name, id);
+-- Trigram GIN indexes serve ILIKE '%term%' and similarity search; the name expression
+-- must match PRISONER_FULL_NAME / VISITOR_FULL_NAME in backend/server.py
+CREATE INDEX idx_prisoners_full_name_trgm ON prisoners USING GIN ((first_name || ' ' || last_name) gin_trgm_ops);
+CREATE INDEX idx_prisoners_number_trgm ON prisoners USING GIN (prisoner_number gin_trgm_ops);
+CREATE INDEX idx_visitors_full_name_trgm ON visitors USING GIN ((first_name || ' ' || last_name) gin_trgm_ops);
+-- Ordered by start date, so the latest sentence of a prisoner (or of every prisoner) is read without a sort
+CREATE INDEX idx_sentences_prisoner ON sentences(prisoner_id, sentence_start_date DESC);
 CREATE INDEX idx_sentences_dates ON sentences(sentence_start_date);
+CREATE INDEX idx_sentences_release ON sentences(release_date);
+-- Indexes on visits and incidents are partitioned: each monthly partition gets its own
 CREATE INDEX idx_visits_prisoner ON visits(prisoner_id);
-CREATE INDEX idx_visits_date ON visits(visit_date);
+CREATE INDEX idx_visits_date ON visits(visit_date DESC, scheduled_start_time, id);
 CREATE INDEX idx_visits_status ON visits(status);
 CREATE INDEX idx_incidents_prisoner ON incidents(prisoner_id);
-CREATE INDEX idx_incidents_date ON incidents(incident_date);
+-- A booking never spans midnight, so get_visit_availability() reads the days it covers by start time
+CREATE INDEX idx_visit_bookings_start ON visit_bookings(lower(during));
+CREATE INDEX idx_incidents_date ON incidents(incident_date DESC, id DESC);
 CREATE INDEX idx_staff_role ON staff(role_id);
 CREATE INDEX idx_staff_block ON staff(assigned_block_id);
 CREATE INDEX idx_cells_block ON cells(cell_block_id);
 CREATE INDEX idx_prisoner_programs_prisoner ON prisoner_programs(prisoner_id);
 CREATE INDEX idx_prisoner_programs_program ON prisoner_programs(program_id);
+-- Archived records are read by prisoner (histories) and archived prisoners searched like active ones
+CREATE INDEX idx_archived_prisoners_name ON archived_prisoners(last_name, first_name, id);
+CREATE INDEX idx_archived_prisoners_full_name_trgm ON archived_prisoners USING GIN ((first_name || ' ' || last_name) gin_trgm_ops);
+CREATE INDEX idx_archived_prisoners_number_trgm ON archived_prisoners USING GIN (prisoner_number gin_trgm_ops);
+CREATE INDEX idx_archived_sentences_prisoner ON archived_sentences(prisoner_id);
+CREATE INDEX idx_archived_visits_prisoner ON archived_visits(prisoner_id);
+CREATE INDEX idx_archived_prisoner_programs_prisoner ON archived_prisoner_programs(prisoner_id);
+CREATE INDEX idx_archived_incidents_prisoner ON archived_incidents(prisoner_id);
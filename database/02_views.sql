@@ -38,14 +38,9 @@ SELECT
     s.parole_date,
     s.court_name,
     s.case_number,
-    CASE
-        WHEN s.is_life_sentence THEN NULL
-        ELSE s.sentence_start_date +
-             (s.sentence_years || ' years')::INTERVAL +
-             (s.sentence_months || ' months')::INTERVAL
-    END AS expected_release_date,
-    (SELECT COUNT(*) FROM incidents i WHERE i.prisoner_id = p.id) AS total_incidents,
-    (SELECT COUNT(*) FROM visits v WHERE v.prisoner_id = p.id AND v.status = 'completed') AS total_visits,
+    s.release_date AS expected_release_date,
+    COALESCE(inc.total_incidents, 0) AS total_incidents,
+    COALESCE(vis.total_visits, 0) AS total_visits,
     (SELECT COUNT(*) FROM prisoner_programs pp WHERE pp.prisoner_id = p.id AND pp.status = 'completed') AS completed_programs
 FROM prisoners p
 LEFT JOIN cells c ON p.cell_id = c.id
@@ -56,7 +51,15 @@ LEFT JOIN LATERAL (
     ORDER BY sentence_start_date DESC
     LIMIT 1
 ) s ON true
-LEFT JOIN crime_types ct ON s.crime_type_id = ct.id;
+LEFT JOIN crime_types ct ON s.crime_type_id = ct.id
+-- visits and incidents are partitioned by date: counting them once per prisoner in a
+-- subquery would probe every partition for every prisoner
+LEFT JOIN (
+    SELECT prisoner_id, COUNT(*) AS total_incidents FROM incidents GROUP BY prisoner_id
+) inc ON inc.prisoner_id = p.id
+LEFT JOIN (
+    SELECT prisoner_id, COUNT(*) AS total_visits FROM visits WHERE status = 'completed' GROUP BY prisoner_id
+) vis ON vis.prisoner_id = p.id;
 
 -- ============================================
 -- VIEW 2: Cell Occupancy Report
@@ -74,25 +77,26 @@ SELECT
     c.cell_type,
     c.floor_number,
     c.capacity AS cell_capacity,
-    COUNT(p.id) AS current_occupancy,
-    c.capacity - COUNT(p.id) AS available_spots,
-    ROUND(COUNT(p.id)::NUMERIC / c.capacity * 100, 1) AS occupancy_percentage,
+    COALESCE(c.current_occupancy, 0) AS current_occupancy,
+    c.capacity - c.current_occupancy AS available_spots,
+    ROUND(COALESCE(c.current_occupancy, 0)::NUMERIC / c.capacity * 100, 1) AS occupancy_percentage,
     CASE
-        WHEN COUNT(p.id) = 0 THEN 'empty'
-        WHEN COUNT(p.id) < c.capacity THEN 'available'
+        WHEN COALESCE(c.current_occupancy, 0) = 0 THEN 'empty'
+        WHEN c.current_occupancy < c.capacity THEN 'available'
         ELSE 'full'
     END AS cell_status,
-    STRING_AGG(p.prisoner_number, ', ' ORDER BY p.last_name) AS prisoner_numbers
+    (SELECT STRING_AGG(p.prisoner_number, ', ' ORDER BY p.last_name)
+     FROM prisoners p
+     WHERE p.cell_id = c.id AND p.status = 'incarcerated') AS prisoner_numbers
 FROM cell_blocks cb
 LEFT JOIN cells c ON c.cell_block_id = cb.id
-LEFT JOIN prisoners p ON p.cell_id = c.id AND p.status = 'incarcerated'
-GROUP BY cb.id, cb.name, cb.security_level, cb.capacity,
-         c.id, c.cell_code, c.cell_type, c.floor_number, c.capacity
 ORDER BY cb.name, c.cell_code;
 
 -- ============================================
--- VIEW 3: Upcoming Releases (within 6 months)
--- Shows prisoners due for release soon
+-- VIEW 3: Upcoming Releases
+-- Shows prisoners due for release from today on, soonest first; readers
+-- bound the horizon (release_date <= ...), which together with the
+-- lower bound becomes a range scan of idx_sentences_release
 -- ============================================
 
 CREATE OR REPLACE VIEW v_upcoming_releases AS
@@ -105,17 +109,13 @@ SELECT
     s.sentence_start_date,
     s.sentence_years,
     s.sentence_months,
-    s.sentence_start_date +
-        (s.sentence_years || ' years')::INTERVAL +
-        (s.sentence_months || ' months')::INTERVAL AS release_date,
-    (s.sentence_start_date +
-        (s.sentence_years || ' years')::INTERVAL +
-        (s.sentence_months || ' months')::INTERVAL - CURRENT_DATE) AS days_until_release,
+    s.release_date,
+    s.release_date - CURRENT_DATE AS days_until_release,
     s.parole_eligible,
     s.parole_date,
     c.cell_code,
     cb.name AS block_name,
-    (SELECT COUNT(*) FROM incidents i WHERE i.prisoner_id = p.id) AS incident_count,
+    COALESCE(inc.incident_count, 0) AS incident_count,
     (SELECT COUNT(*) FROM prisoner_programs pp
      WHERE pp.prisoner_id = p.id AND pp.status = 'completed') AS programs_completed
 FROM prisoners p
@@ -123,14 +123,15 @@ JOIN sentences s ON s.prisoner_id = p.id
 JOIN crime_types ct ON s.crime_type_id = ct.id
 LEFT JOIN cells c ON p.cell_id = c.id
 LEFT JOIN cell_blocks cb ON c.cell_block_id = cb.id
+-- Counted once for all prisoners, as in v_prisoner_details: a count per row would probe
+-- every monthly partition of incidents for every release
+LEFT JOIN (
+    SELECT prisoner_id, COUNT(*) AS incident_count FROM incidents GROUP BY prisoner_id
+) inc ON inc.prisoner_id = p.id
 WHERE
     p.status = 'incarcerated'
-    AND s.is_life_sentence = false
-    AND (s.sentence_start_date +
-         (s.sentence_years || ' years')::INTERVAL +
-         (s.sentence_months || ' months')::INTERVAL)
-        BETWEEN CURRENT_DATE AND CURRENT_DATE + INTERVAL '6 months'
-ORDER BY release_date ASC;
+    AND s.release_date >= CURRENT_DATE
+ORDER BY s.release_date ASC;
 
 -- ============================================
 -- VIEW 4: Block Summary Statistics
@@ -145,12 +146,15 @@ SELECT
     cb.floor_count,
     COUNT(DISTINCT c.id) AS total_cells,
     SUM(c.capacity) AS total_bed_capacity,
-    COUNT(DISTINCT p.id) FILTER (WHERE p.status = 'incarcerated') AS current_prisoners,
+    cb.current_occupancy AS current_prisoners,
     ROUND(
-        COUNT(DISTINCT p.id) FILTER (WHERE p.status = 'incarcerated')::NUMERIC /
+        cb.current_occupancy::NUMERIC /
         NULLIF(SUM(c.capacity), 0) * 100, 1
     ) AS occupancy_rate,
-    COUNT(DISTINCT s.id) FILTER (WHERE s.role_id IN (SELECT id FROM staff_roles WHERE name = 'Guard')) AS assigned_guards,
+    (SELECT COUNT(*) FROM staff s
+     WHERE s.assigned_block_id = cb.id
+     AND s.is_active = true
+     AND s.role_id IN (SELECT id FROM staff_roles WHERE name = 'Guard')) AS assigned_guards,
     (SELECT COUNT(*) FROM incidents i
      JOIN prisoners pr ON i.prisoner_id = pr.id
      JOIN cells ce ON pr.cell_id = ce.id
@@ -158,9 +162,7 @@ SELECT
      AND i.incident_date >= CURRENT_DATE - INTERVAL '30 days') AS incidents_last_30_days
 FROM cell_blocks cb
 LEFT JOIN cells c ON c.cell_block_id = cb.id
-LEFT JOIN prisoners p ON p.cell_id = c.id
-LEFT JOIN staff s ON s.assigned_block_id = cb.id AND s.is_active = true
-GROUP BY cb.id, cb.name, cb.security_level, cb.floor_count
+GROUP BY cb.id, cb.name, cb.security_level, cb.floor_count, cb.current_occupancy
 ORDER BY cb.name;
 
 -- ============================================
@@ -186,3 +188,50 @@ FROM staff s
 JOIN staff_roles sr ON s.role_id = sr.id
 LEFT JOIN cell_blocks cb ON s.assigned_block_id = cb.id
 ORDER BY sr.access_level DESC, s.last_name;
+
+-- ============================================
+-- VIEW 6: Release Forecast
+-- Expected release of every incarcerated prisoner from the stored
+-- release_date of their latest sentence: one ordered pass over
+-- idx_sentences_prisoner instead of calculate_release_date() per prisoner
+-- ============================================
+
+CREATE OR REPLACE VIEW v_release_forecast AS
+SELECT
+    p.id AS prisoner_id,
+    p.prisoner_number,
+    p.first_name || ' ' || p.last_name AS full_name,
+    cb.id AS block_id,
+    cb.name AS block_name,
+    s.id AS sentence_id,
+    s.is_life_sentence,
+    s.release_date,
+    s.release_date - CURRENT_DATE AS days_until_release,
+    s.parole_eligible,
+    s.parole_date
+FROM prisoners p
+JOIN (
+    SELECT DISTINCT ON (prisoner_id) *
+    FROM sentences
+    ORDER BY prisoner_id, sentence_start_date DESC
+) s ON s.prisoner_id = p.id
+LEFT JOIN cells c ON p.cell_id = c.id
+LEFT JOIN cell_blocks cb ON c.cell_block_id = cb.id
+WHERE p.status = 'incarcerated';
+
+-- ============================================
+-- MATERIALIZED REPORT VIEWS
+-- Snapshots of the expensive report views, served by the API and
+-- refreshed concurrently by the backend (see refresh_report_view());
+-- the unique indexes are required for REFRESH ... CONCURRENTLY
+-- ============================================
+
+CREATE MATERIALIZED VIEW mv_prisoner_details AS
+SELECT * FROM v_prisoner_details;
+
+CREATE UNIQUE INDEX idx_mv_prisoner_details_id ON mv_prisoner_details(prisoner_id);
+
+CREATE MATERIALIZED VIEW mv_block_summary AS
+SELECT * FROM v_block_summary;
+
+CREATE UNIQUE INDEX idx_mv_block_summary_id ON mv_block_summary(block_id);
@@ -3,138 +3,147 @@
 
 -- ============================================
 -- FUNCTION 1: Calculate Release Date
--- Returns expected release date for a prisoner
+-- Returns expected release date for a prisoner: the stored release_date
+-- of the latest sentence (NULL for a life sentence); v_release_forecast
+-- has it for every prisoner at once
 -- ============================================
 
 CREATE OR REPLACE FUNCTION calculate_release_date(p_prisoner_id INTEGER)
 RETURNS DATE AS $$
-DECLARE
-    v_release_date DATE;
-    v_is_life BOOLEAN;
-BEGIN
-    SELECT
-        s.is_life_sentence,
-        CASE
-            WHEN s.is_life_sentence THEN NULL
-            ELSE (s.sentence_start_date +
-                  (s.sentence_years || ' years')::INTERVAL +
-                  (s.sentence_months || ' months')::INTERVAL)::DATE
-        END
-    INTO v_is_life, v_release_date
+    SELECT s.release_date
     FROM sentences s
     WHERE s.prisoner_id = p_prisoner_id
     ORDER BY s.sentence_start_date DESC
     LIMIT 1;
-
-    IF v_is_life THEN
-        RETURN NULL; -- Life sentence, no release date
-    END IF;
-
-    RETURN v_release_date;
-END;
-$$ LANGUAGE plpgsql;
+$$ LANGUAGE sql STABLE;
 
 -- ============================================
 -- FUNCTION 2: Get Prisoner Full History
 -- Returns comprehensive prisoner history as JSON
+-- get_prisoner_histories() builds it for many prisoners at once:
+-- every child table is read once and aggregated per prisoner,
+-- and the statistics come out of the same aggregates;
+-- p_include_archived also reads the archive tables
 -- ============================================
 
-CREATE OR REPLACE FUNCTION get_prisoner_full_history(p_prisoner_id INTEGER)
-RETURNS JSON AS $$
-DECLARE
-    v_result JSON;
-BEGIN
-    SELECT json_build_object(
-        'prisoner', (
-            SELECT row_to_json(p.*)
-            FROM prisoners p
-            WHERE p.id = p_prisoner_id
-        ),
-        'sentences', (
-            SELECT COALESCE(json_agg(row_to_json(s.*) ORDER BY s.sentence_start_date DESC), '[]'::json)
-            FROM (
-                SELECT
-                    sen.id,
-                    sen.sentence_start_date,
-                    sen.sentence_years,
-                    sen.sentence_months,
-                    sen.is_life_sentence,
-                    sen.parole_eligible,
-                    sen.parole_date,
-                    sen.court_name,
-                    sen.case_number,
-                    ct.name AS crime_type,
-                    ct.severity_level
-                FROM sentences sen
-                JOIN crime_types ct ON sen.crime_type_id = ct.id
-                WHERE sen.prisoner_id = p_prisoner_id
-            ) s
-        ),
-        'incidents', (
-            SELECT COALESCE(json_agg(row_to_json(i.*) ORDER BY i.incident_date DESC), '[]'::json)
-            FROM (
-                SELECT
-                    inc.id,
-                    inc.incident_date,
-                    inc.incident_type,
-                    inc.severity,
-                    inc.location,
-                    inc.description,
-                    inc.action_taken,
-                    inc.solitary_days,
-                    inc.is_resolved,
-                    st.first_name || ' ' || st.last_name AS reported_by
-                FROM incidents inc
-                LEFT JOIN staff st ON inc.reported_by_staff_id = st.id
-                WHERE inc.prisoner_id = p_prisoner_id
-            ) i
-        ),
-        'visits', (
-            SELECT COALESCE(json_agg(row_to_json(v.*) ORDER BY v.visit_date DESC), '[]'::json)
-            FROM (
-                SELECT
-                    vis.id,
-                    vis.visit_date,
-                    vis.scheduled_start_time,
-                    vis.scheduled_end_time,
-                    vis.status,
-                    vis.visit_type,
-                    vr.first_name || ' ' || vr.last_name AS visitor_name,
-                    vr.relationship_type
-                FROM visits vis
-                JOIN visitors vr ON vis.visitor_id = vr.id
-                WHERE vis.prisoner_id = p_prisoner_id
-            ) v
-        ),
-        'programs', (
-            SELECT COALESCE(json_agg(row_to_json(pr.*) ORDER BY pr.enrollment_date DESC), '[]'::json)
-            FROM (
-                SELECT
-                    pp.id,
-                    prog.name AS program_name,
-                    pt.name AS program_type,
-                    pp.enrollment_date,
-                    pp.completion_date,
-                    pp.status,
-                    pp.grade
-                FROM prisoner_programs pp
-                JOIN programs prog ON pp.program_id = prog.id
-                JOIN program_types pt ON prog.program_type_id = pt.id
-                WHERE pp.prisoner_id = p_prisoner_id
-            ) pr
-        ),
-        'statistics', json_build_object(
-            'total_sentences', (SELECT COUNT(*) FROM sentences WHERE prisoner_id = p_prisoner_id),
-            'total_incidents', (SELECT COUNT(*) FROM incidents WHERE prisoner_id = p_prisoner_id),
-            'total_visits', (SELECT COUNT(*) FROM visits WHERE prisoner_id = p_prisoner_id AND status = 'completed'),
-            'programs_completed', (SELECT COUNT(*) FROM prisoner_programs WHERE prisoner_id = p_prisoner_id AND status = 'completed'),
-            'total_solitary_days', (SELECT COALESCE(SUM(solitary_days), 0) FROM incidents WHERE prisoner_id = p_prisoner_id)
+CREATE OR REPLACE FUNCTION get_prisoner_histories(p_prisoner_ids INTEGER[], p_include_archived BOOLEAN DEFAULT false)
+RETURNS TABLE (prisoner_id INTEGER, history JSON) AS $$
+    WITH sentence_history AS (
+        SELECT
+            sen.prisoner_id,
+            json_agg(json_build_object(
+                'id', sen.id,
+                'sentence_start_date', sen.sentence_start_date,
+                'sentence_years', sen.sentence_years,
+                'sentence_months', sen.sentence_months,
+                'is_life_sentence', sen.is_life_sentence,
+                'parole_eligible', sen.parole_eligible,
+                'parole_date', sen.parole_date,
+                'release_date', sen.release_date,
+                'court_name', sen.court_name,
+                'case_number', sen.case_number,
+                'crime_type', ct.name,
+                'severity_level', ct.severity_level
+            ) ORDER BY sen.sentence_start_date DESC) AS items,
+            COUNT(*) AS total_sentences
+        FROM (SELECT * FROM sentences UNION ALL SELECT * FROM archived_sentences WHERE p_include_archived) sen
+        JOIN crime_types ct ON sen.crime_type_id = ct.id
+        WHERE sen.prisoner_id = ANY(p_prisoner_ids)
+        GROUP BY sen.prisoner_id
+    ),
+    incident_history AS (
+        SELECT
+            inc.prisoner_id,
+            json_agg(json_build_object(
+                'id', inc.id,
+                'incident_date', inc.incident_date,
+                'incident_type', inc.incident_type,
+                'severity', inc.severity,
+                'location', inc.location,
+                'description', inc.description,
+                'action_taken', inc.action_taken,
+                'solitary_days', inc.solitary_days,
+                'is_resolved', inc.is_resolved,
+                'reported_by', st.first_name || ' ' || st.last_name
+            ) ORDER BY inc.incident_date DESC) AS items,
+            COUNT(*) AS total_incidents,
+            COALESCE(SUM(inc.solitary_days), 0) AS total_solitary_days
+        FROM (SELECT * FROM incidents UNION ALL SELECT * FROM archived_incidents WHERE p_include_archived) inc
+        LEFT JOIN staff st ON inc.reported_by_staff_id = st.id
+        WHERE inc.prisoner_id = ANY(p_prisoner_ids)
+        GROUP BY inc.prisoner_id
+    ),
+    visit_history AS (
+        SELECT
+            vis.prisoner_id,
+            json_agg(json_build_object(
+                'id', vis.id,
+                'visit_date', vis.visit_date,
+                'scheduled_start_time', vis.scheduled_start_time,
+                'scheduled_end_time', vis.scheduled_end_time,
+                'status', vis.status,
+                'visit_type', vis.visit_type,
+                'visitor_name', vr.first_name || ' ' || vr.last_name,
+                'relationship_type', vr.relationship_type
+            ) ORDER BY vis.visit_date DESC) AS items,
+            COUNT(*) FILTER (WHERE vis.status = 'completed') AS total_visits
+        FROM (SELECT * FROM visits UNION ALL SELECT * FROM archived_visits WHERE p_include_archived) vis
+        JOIN visitors vr ON vis.visitor_id = vr.id
+        WHERE vis.prisoner_id = ANY(p_prisoner_ids)
+        GROUP BY vis.prisoner_id
+    ),
+    program_history AS (
+        SELECT
+            pp.prisoner_id,
+            json_agg(json_build_object(
+                'id', pp.id,
+                'program_name', prog.name,
+                'program_type', pt.name,
+                'enrollment_date', pp.enrollment_date,
+                'completion_date', pp.completion_date,
+                'status', pp.status,
+                'grade', pp.grade
+            ) ORDER BY pp.enrollment_date DESC) AS items,
+            COUNT(*) FILTER (WHERE pp.status = 'completed') AS programs_completed
+        FROM (SELECT * FROM prisoner_programs UNION ALL SELECT * FROM archived_prisoner_programs WHERE p_include_archived) pp
+        JOIN programs prog ON pp.program_id = prog.id
+        JOIN program_types pt ON prog.program_type_id = pt.id
+        WHERE pp.prisoner_id = ANY(p_prisoner_ids)
+        GROUP BY pp.prisoner_id
+    )
+    SELECT
+        p.id,
+        json_build_object(
+            'prisoner', row_to_json(p.*),
+            'sentences', COALESCE(sh.items, '[]'::json),
+            'incidents', COALESCE(ih.items, '[]'::json),
+            'visits', COALESCE(vh.items, '[]'::json),
+            'programs', COALESCE(ph.items, '[]'::json),
+            'statistics', json_build_object(
+                'total_sentences', COALESCE(sh.total_sentences, 0),
+                'total_incidents', COALESCE(ih.total_incidents, 0),
+                'total_visits', COALESCE(vh.total_visits, 0),
+                'programs_completed', COALESCE(ph.programs_completed, 0),
+                'total_solitary_days', COALESCE(ih.total_solitary_days, 0)
+            )
         )
-    ) INTO v_result;
+    FROM (
+        SELECT *, NULL::TIMESTAMP AS archived_at FROM prisoners
+        UNION ALL
+        SELECT * FROM archived_prisoners WHERE p_include_archived
+    ) p
+    LEFT JOIN sentence_history sh ON sh.prisoner_id = p.id
+    LEFT JOIN incident_history ih ON ih.prisoner_id = p.id
+    LEFT JOIN visit_history vh ON vh.prisoner_id = p.id
+    LEFT JOIN program_history ph ON ph.prisoner_id = p.id
+    WHERE p.id = ANY(p_prisoner_ids);
+$$ LANGUAGE sql STABLE;
 
-    RETURN v_result;
-END;
-$$ LANGUAGE plpgsql;
+-- NULL when the prisoner does not exist
+CREATE OR REPLACE FUNCTION get_prisoner_full_history(p_prisoner_id INTEGER, p_include_archived BOOLEAN DEFAULT false)
+RETURNS JSON AS $$
+    SELECT history FROM get_prisoner_histories(ARRAY[p_prisoner_id], p_include_archived);
+$$ LANGUAGE sql STABLE;
 
 -- ============================================
 -- FUNCTION 3: Get Cell Current Occupancy
@@ -144,17 +153,16 @@ $$ LANGUAGE plpgsql;
 CREATE OR REPLACE FUNCTION get_cell_occupancy(p_cell_id INTEGER)
 RETURNS INTEGER AS $$
 BEGIN
-    RETURN (
-        SELECT COUNT(*)
-        FROM prisoners
-        WHERE cell_id = p_cell_id AND status = 'incarcerated'
-    );
+    RETURN COALESCE((SELECT current_occupancy FROM cells WHERE id = p_cell_id), 0);
 END;
 $$ LANGUAGE plpgsql;
 
 -- ============================================
--- TRIGGER 1: Check Cell Capacity Before Insert/Update
+-- TRIGGER 1: Check Cell Capacity After Insert/Update
 -- Prevents assigning more prisoners than cell capacity
+-- Runs as an AFTER trigger ahead of trg_maintain_cell_occupancy
+-- (triggers fire in name order), so the counter already includes
+-- earlier rows of the same statement but not this one
 -- ============================================
 
 CREATE OR REPLACE FUNCTION check_cell_capacity()
@@ -162,29 +170,26 @@ RETURNS TRIGGER AS $$
 DECLARE
     v_capacity INTEGER;
     v_current_occupancy INTEGER;
+    v_cell_code TEXT;
 BEGIN
-    -- Only check if cell_id is being set and prisoner is being incarcerated
-    IF NEW.cell_id IS NOT NULL AND NEW.status = 'incarcerated' THEN
-        -- Get cell capacity
-        SELECT capacity INTO v_capacity
+    -- Only check if the prisoner is being placed into a cell as incarcerated
+    IF NEW.cell_id IS NOT NULL AND NEW.status = 'incarcerated'
+       AND NOT (TG_OP = 'UPDATE' AND OLD.cell_id IS NOT DISTINCT FROM NEW.cell_id AND OLD.status = 'incarcerated') THEN
+        -- Lock the cell so concurrent placements are checked one at a time
+        SELECT capacity, current_occupancy, cell_code
+        INTO v_capacity, v_current_occupancy, v_cell_code
         FROM cells
-        WHERE id = NEW.cell_id;
+        WHERE id = NEW.cell_id
+        FOR UPDATE;
 
         IF v_capacity IS NULL THEN
             RAISE EXCEPTION 'Cell with ID % does not exist', NEW.cell_id;
         END IF;
 
-        -- Count current occupancy (excluding the current prisoner if updating)
-        SELECT COUNT(*) INTO v_current_occupancy
-        FROM prisoners
-        WHERE cell_id = NEW.cell_id
-          AND status = 'incarcerated'
-          AND id != COALESCE(OLD.id, -1);
-
         -- Check if there's room
         IF v_current_occupancy >= v_capacity THEN
             RAISE EXCEPTION 'Cell % is at full capacity (% of %)',
-                (SELECT cell_code FROM cells WHERE id = NEW.cell_id),
+                v_cell_code,
                 v_current_occupancy,
                 v_capacity;
         END IF;
@@ -195,7 +200,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER trg_check_cell_capacity
-    BEFORE INSERT OR UPDATE ON prisoners
+    AFTER INSERT OR UPDATE OF cell_id, status ON prisoners
     FOR EACH ROW
     EXECUTE FUNCTION check_cell_capacity();
 
@@ -243,6 +248,11 @@ CREATE TRIGGER trg_update_timestamp_visitors
     FOR EACH ROW
     EXECUTE FUNCTION update_timestamp();
 
+CREATE TRIGGER trg_update_timestamp_visiting_rooms
+    BEFORE UPDATE ON visiting_rooms
+    FOR EACH ROW
+    EXECUTE FUNCTION update_timestamp();
+
 CREATE TRIGGER trg_update_timestamp_visits
     BEFORE UPDATE ON visits
     FOR EACH ROW
@@ -329,3 +339,898 @@ BEGIN
     RETURN TRUE;
 END;
 $$ LANGUAGE plpgsql;
+
+-- ============================================
+-- TRIGGER 4: Maintain per-status prisoner counts
+-- Statement-level, so bulk loads apply one delta per status
+-- ============================================
+
+CREATE OR REPLACE FUNCTION maintain_prisoner_status_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO prisoner_status_counts AS c (status, prisoner_count)
+        SELECT status, COUNT(*) FROM new_rows GROUP BY status ORDER BY status
+        ON CONFLICT (status) DO UPDATE SET prisoner_count = c.prisoner_count + EXCLUDED.prisoner_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO prisoner_status_counts AS c (status, prisoner_count)
+        SELECT status, -COUNT(*) FROM old_rows GROUP BY status ORDER BY status
+        ON CONFLICT (status) DO UPDATE SET prisoner_count = c.prisoner_count + EXCLUDED.prisoner_count;
+    ELSE
+        INSERT INTO prisoner_status_counts AS c (status, prisoner_count)
+        SELECT status, SUM(delta)
+        FROM (
+            SELECT status, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT status, -1 AS delta FROM old_rows
+        ) d
+        GROUP BY status
+        HAVING SUM(delta) <> 0
+        ORDER BY status
+        ON CONFLICT (status) DO UPDATE SET prisoner_count = c.prisoner_count + EXCLUDED.prisoner_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables require one trigger per event
+CREATE TRIGGER trg_prisoner_status_counts_insert
+    AFTER INSERT ON prisoners
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION maintain_prisoner_status_counts();
+
+CREATE TRIGGER trg_prisoner_status_counts_update
+    AFTER UPDATE ON prisoners
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION maintain_prisoner_status_counts();
+
+CREATE TRIGGER trg_prisoner_status_counts_delete
+    AFTER DELETE ON prisoners
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION maintain_prisoner_status_counts();
+
+-- ============================================
+-- TRIGGER 5: Maintain cell and block occupancy counters
+-- Keeps cells.current_occupancy and cell_blocks.current_occupancy
+-- equal to the number of incarcerated prisoners they hold
+-- ============================================
+
+CREATE OR REPLACE FUNCTION maintain_cell_occupancy()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_old_cell_id INTEGER;
+    v_new_cell_id INTEGER;
+BEGIN
+    -- OLD is NULL on INSERT and NEW is NULL on DELETE
+    IF TG_OP <> 'INSERT' AND OLD.status = 'incarcerated' THEN
+        v_old_cell_id := OLD.cell_id;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.status = 'incarcerated' THEN
+        v_new_cell_id := NEW.cell_id;
+    END IF;
+
+    IF v_old_cell_id IS DISTINCT FROM v_new_cell_id THEN
+        UPDATE cells
+        SET current_occupancy = current_occupancy + CASE WHEN id = v_new_cell_id THEN 1 ELSE -1 END
+        WHERE id IN (v_old_cell_id, v_new_cell_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_maintain_cell_occupancy
+    AFTER INSERT OR UPDATE OF cell_id, status OR DELETE ON prisoners
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_cell_occupancy();
+
+CREATE OR REPLACE FUNCTION propagate_block_occupancy()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.cell_block_id = NEW.cell_block_id
+       AND OLD.current_occupancy = NEW.current_occupancy THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE cell_blocks
+        SET current_occupancy = current_occupancy - OLD.current_occupancy
+        WHERE id = OLD.cell_block_id;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        UPDATE cell_blocks
+        SET current_occupancy = current_occupancy + NEW.current_occupancy
+        WHERE id = NEW.cell_block_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_propagate_block_occupancy
+    AFTER INSERT OR UPDATE OF current_occupancy, cell_block_id OR DELETE ON cells
+    FOR EACH ROW
+    EXECUTE FUNCTION propagate_block_occupancy();
+
+-- ============================================
+-- FUNCTION 5: Recompute occupancy counters
+-- Rebuilds both counters from prisoners, e.g. after a bulk load
+-- that bypassed the triggers
+-- ============================================
+
+CREATE OR REPLACE FUNCTION refresh_occupancy_counters()
+RETURNS VOID AS $$
+BEGIN
+    UPDATE cells c
+    SET current_occupancy = COALESCE(o.occupancy, 0)
+    FROM cells c2
+    LEFT JOIN (
+        SELECT cell_id, COUNT(*)::INTEGER AS occupancy
+        FROM prisoners
+        WHERE status = 'incarcerated' AND cell_id IS NOT NULL
+        GROUP BY cell_id
+    ) o ON o.cell_id = c2.id
+    WHERE c.id = c2.id
+      AND c.current_occupancy IS DISTINCT FROM COALESCE(o.occupancy, 0);
+
+    UPDATE cell_blocks cb
+    SET current_occupancy = o.occupancy
+    FROM (
+        SELECT cb2.id, COALESCE(SUM(c.current_occupancy), 0)::INTEGER AS occupancy
+        FROM cell_blocks cb2
+        LEFT JOIN cells c ON c.cell_block_id = cb2.id
+        GROUP BY cb2.id
+    ) o
+    WHERE cb.id = o.id
+      AND cb.current_occupancy <> o.occupancy;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- TRIGGER 6: Publish table changes
+-- Sends the table name on the table_changed channel after every
+-- modifying statement; NOTIFY is delivered on commit and identical
+-- payloads within a transaction are collapsed into one
+-- ============================================
+
+CREATE OR REPLACE FUNCTION notify_table_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('table_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_notify_table_change_crime_types
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON crime_types
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_staff_roles
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON staff_roles
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_program_types
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON program_types
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_cell_blocks
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON cell_blocks
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_cells
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON cells
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_prisoners
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON prisoners
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_sentences
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sentences
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_staff
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON staff
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_visitors
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON visitors
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_visiting_rooms
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON visiting_rooms
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_visits
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON visits
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_programs
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON programs
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_prisoner_programs
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON prisoner_programs
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_incidents
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON incidents
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_report_refreshes
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON report_refreshes
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+CREATE TRIGGER trg_notify_table_change_archived_prisoners
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON archived_prisoners
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_table_change();
+
+-- ============================================
+-- TRIGGER 7: Publish changed prisoners
+-- Sends the ids of the prisoners whose history a statement touched
+-- (comma-separated) on the prisoner_changed channel, or '*' when the
+-- list would not fit in a notification payload
+-- TG_ARGV[0] names the column holding the prisoner id
+-- ============================================
+
+CREATE OR REPLACE FUNCTION notify_prisoner_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ids TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format('SELECT string_agg(DISTINCT %I::text, '','') FROM new_rows', TG_ARGV[0]) INTO v_ids;
+    ELSIF TG_OP = 'DELETE' THEN
+        EXECUTE format('SELECT string_agg(DISTINCT %I::text, '','') FROM old_rows', TG_ARGV[0]) INTO v_ids;
+    ELSE
+        EXECUTE format(
+            'SELECT string_agg(DISTINCT id::text, '','') FROM (SELECT %1$I AS id FROM new_rows UNION SELECT %1$I FROM old_rows) changed',
+            TG_ARGV[0]
+        ) INTO v_ids;
+    END IF;
+
+    IF v_ids IS NOT NULL THEN
+        PERFORM pg_notify('prisoner_changed', CASE WHEN length(v_ids) > 7000 THEN '*' ELSE v_ids END);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables require one trigger per event
+CREATE TRIGGER trg_notify_prisoner_change_prisoners_insert
+    AFTER INSERT ON prisoners
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('id');
+
+CREATE TRIGGER trg_notify_prisoner_change_prisoners_update
+    AFTER UPDATE ON prisoners
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('id');
+
+CREATE TRIGGER trg_notify_prisoner_change_prisoners_delete
+    AFTER DELETE ON prisoners
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('id');
+
+CREATE TRIGGER trg_notify_prisoner_change_sentences_insert
+    AFTER INSERT ON sentences
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_sentences_update
+    AFTER UPDATE ON sentences
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_sentences_delete
+    AFTER DELETE ON sentences
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_incidents_insert
+    AFTER INSERT ON incidents
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_incidents_update
+    AFTER UPDATE ON incidents
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_incidents_delete
+    AFTER DELETE ON incidents
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_visits_insert
+    AFTER INSERT ON visits
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_visits_update
+    AFTER UPDATE ON visits
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_visits_delete
+    AFTER DELETE ON visits
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_prisoner_programs_insert
+    AFTER INSERT ON prisoner_programs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_prisoner_programs_update
+    AFTER UPDATE ON prisoner_programs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+CREATE TRIGGER trg_notify_prisoner_change_prisoner_programs_delete
+    AFTER DELETE ON prisoner_programs
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_prisoner_change('prisoner_id');
+
+-- ============================================
+-- TRIGGER 8: Publish changed rows
+-- Sends {"table", "op", "ids"} on the row_changed channel after every
+-- modifying statement on the core tables, for clients that refresh
+-- individual rows; ids is null when the list would not fit in a
+-- notification payload
+-- ============================================
+
+CREATE OR REPLACE FUNCTION notify_row_changes()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ids JSON;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT json_agg(id ORDER BY id) INTO v_ids FROM (SELECT id FROM new_rows) r;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT json_agg(id ORDER BY id) INTO v_ids FROM (SELECT id FROM old_rows) r;
+    ELSE
+        SELECT json_agg(id ORDER BY id) INTO v_ids FROM (SELECT id FROM new_rows UNION SELECT id FROM old_rows) r;
+    END IF;
+
+    IF v_ids IS NOT NULL THEN
+        IF length(v_ids::text) > 7000 THEN
+            v_ids := NULL;
+        END IF;
+        PERFORM pg_notify('row_changed', json_build_object('table', TG_TABLE_NAME, 'op', lower(TG_OP), 'ids', v_ids)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables require one trigger per event
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY[
+        'cell_blocks', 'cells', 'prisoners', 'sentences', 'staff', 'visitors',
+        'visits', 'programs', 'prisoner_programs', 'incidents'
+    ] LOOP
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()',
+            'trg_notify_row_changes_' || v_table || '_insert', v_table
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()',
+            'trg_notify_row_changes_' || v_table || '_update', v_table
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()',
+            'trg_notify_row_changes_' || v_table || '_delete', v_table
+        );
+    END LOOP;
+END;
+$$;
+
+-- ============================================
+-- FUNCTION 6: Refresh a materialized report view
+-- Returns false without waiting if another session is already
+-- refreshing the same view
+-- ============================================
+
+CREATE OR REPLACE FUNCTION refresh_report_view(p_view_name TEXT)
+RETURNS BOOLEAN AS $$
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_report_view'), hashtext(p_view_name)) THEN
+        RETURN FALSE;
+    END IF;
+
+    EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %I', p_view_name);
+
+    -- now() is the transaction start, so the snapshot is at least this fresh
+    INSERT INTO report_refreshes (view_name, refreshed_at)
+    VALUES (p_view_name, now())
+    ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- FUNCTION 7: Monthly partitions
+-- create_month_partition() adds the partition for one month of a table
+-- in partition_policies, moving that month's rows out of the default
+-- partition; returns its name, or NULL if it already exists
+-- ============================================
+
+CREATE OR REPLACE FUNCTION create_month_partition(p_table TEXT, p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month);
+    v_end DATE := date_trunc('month', p_month) + INTERVAL '1 month';
+    v_partition TEXT := p_table || '_' || to_char(p_month, 'YYYY_MM');
+    v_default TEXT := p_table || '_default';
+    v_column TEXT;
+    v_enable TEXT[];
+    v_statement TEXT;
+BEGIN
+    IF to_regclass(v_partition) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT partition_column INTO STRICT v_column FROM partition_policies WHERE table_name = p_table;
+
+    -- ATTACH needs this lock anyway; taking it first keeps new rows for the month out of
+    -- the default partition until the month has its own
+    EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', v_default);
+
+    -- Filled while still detached; the bounds check lets ATTACH skip scanning the new table
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_partition, p_table);
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I CHECK (%I >= %L AND %I < %L)',
+        v_partition, v_partition || '_bounds', v_column, v_start, v_column, v_end
+    );
+    -- The rows only change partition: the default partition's triggers must not see them
+    -- deleted (nor publish the deletes, nor drop their visit bookings). Only the triggers
+    -- enabled now are switched back on, in their mode, so ones a caller disabled stay off
+    SELECT array_agg(format(
+        'ALTER TABLE %I ENABLE %s TRIGGER %I',
+        v_default, CASE tgenabled WHEN 'A' THEN 'ALWAYS' WHEN 'R' THEN 'REPLICA' ELSE '' END, tgname
+    ))
+    INTO v_enable
+    FROM pg_trigger
+    WHERE tgrelid = v_default::regclass AND NOT tgisinternal AND tgenabled <> 'D';
+    EXECUTE format('ALTER TABLE %I DISABLE TRIGGER USER', v_default);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+        v_default, v_column, v_start, v_column, v_end, v_partition
+    );
+    FOREACH v_statement IN ARRAY COALESCE(v_enable, '{}') LOOP
+        EXECUTE v_statement;
+    END LOOP;
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', p_table, v_partition, v_start, v_end);
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', v_partition, v_partition || '_bounds');
+    RETURN v_partition;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Monthly partitions for every month from p_from to p_to, e.g. before a bulk load
+CREATE OR REPLACE FUNCTION create_month_partitions(p_table TEXT, p_from DATE, p_to DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    v_month DATE;
+    v_created INTEGER := 0;
+BEGIN
+    FOR v_month IN
+        SELECT generate_series(date_trunc('month', p_from), p_to, INTERVAL '1 month')::DATE
+    LOOP
+        IF create_month_partition(p_table, v_month) IS NOT NULL THEN
+            v_created := v_created + 1;
+        END IF;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- FUNCTION 8: Apply the partition policies
+-- Moves rows that landed in a default partition into their month,
+-- creates the partitions months_ahead months in advance and detaches or
+-- drops the partitions past retention_months. Returns one row per
+-- partition created, detached or dropped; returns nothing without
+-- waiting if another session is already running it
+-- ============================================
+
+CREATE OR REPLACE FUNCTION manage_partitions()
+RETURNS TABLE (parent_table TEXT, partition_name TEXT, action TEXT) AS $$
+DECLARE
+    v_policy RECORD;
+    v_month DATE;
+    v_months DATE[];
+    v_current DATE := date_trunc('month', CURRENT_DATE);
+    v_removed BOOLEAN;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('manage_partitions')) THEN
+        RETURN;
+    END IF;
+
+    FOR v_policy IN SELECT * FROM partition_policies ORDER BY table_name LOOP
+        parent_table := v_policy.table_name;
+
+        action := 'created';
+        -- Collected up front: no query may still be reading the default partition while it is altered
+        EXECUTE format(
+            'SELECT array_agg(month ORDER BY month) FROM (
+                 SELECT date_trunc(''month'', %I)::DATE AS month FROM %I
+                 UNION
+                 SELECT generate_series(%L::DATE, %L::DATE + %s * INTERVAL ''1 month'', INTERVAL ''1 month'')::DATE
+             ) months',
+            v_policy.partition_column, v_policy.table_name || '_default', v_current, v_current, v_policy.months_ahead
+        ) INTO v_months;
+        FOREACH v_month IN ARRAY v_months LOOP
+            partition_name := create_month_partition(v_policy.table_name, v_month);
+            IF partition_name IS NOT NULL THEN
+                RETURN NEXT;
+            END IF;
+        END LOOP;
+
+        CONTINUE WHEN v_policy.retention_months IS NULL;
+
+        v_removed := false;
+        action := CASE v_policy.retention_action WHEN 'drop' THEN 'dropped' ELSE 'detached' END;
+        FOR partition_name IN
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = v_policy.table_name::regclass
+              AND c.relname ~ '_\d{4}_\d{2}$'
+              AND to_date(right(c.relname, 7), 'YYYY_MM') < v_current - make_interval(months => v_policy.retention_months)
+            ORDER BY c.relname
+        LOOP
+            IF v_policy.retention_action = 'drop' THEN
+                EXECUTE format('DROP TABLE %I', partition_name);
+            ELSE
+                EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', v_policy.table_name, partition_name);
+            END IF;
+            v_removed := true;
+            RETURN NEXT;
+        END LOOP;
+
+        -- Rows left the table without a DELETE, so no trigger announced them
+        IF v_removed THEN
+            PERFORM pg_notify('table_changed', v_policy.table_name);
+            PERFORM pg_notify('prisoner_changed', '*');
+            PERFORM pg_notify(
+                'row_changed', json_build_object('table', v_policy.table_name, 'op', 'delete', 'ids', NULL)::text
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- FUNCTION 9: Archive inactive prisoners
+-- Moves up to p_batch_size prisoners who were released, transferred
+-- or deceased and not modified for p_inactive_for, with all of their
+-- sentences, visits, programs and incidents, into the archive tables.
+-- Returns the number of prisoners archived; rows locked by another
+-- session are left for the next batch
+-- ============================================
+
+CREATE OR REPLACE FUNCTION archive_inactive_prisoners(
+    p_batch_size INTEGER DEFAULT 1000,
+    p_inactive_for INTERVAL DEFAULT '90 days'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_ids INTEGER[];
+BEGIN
+    SELECT array_agg(id) INTO v_ids
+    FROM (
+        SELECT id
+        FROM prisoners
+        WHERE status IN ('released', 'transferred', 'deceased')
+          AND updated_at < CURRENT_TIMESTAMP - p_inactive_for
+        ORDER BY id
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ) batch;
+
+    IF v_ids IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    -- Columns are listed, so a column added to a hot table later cannot shift the archive's
+    INSERT INTO archived_prisoners (
+        id, prisoner_number, first_name, last_name, date_of_birth, gender, nationality, cell_id,
+        admission_date, status, blood_type, emergency_contact_name, emergency_contact_phone, notes,
+        photo_url, created_at, updated_at, archived_at
+    )
+    SELECT id, prisoner_number, first_name, last_name, date_of_birth, gender, nationality, cell_id,
+           admission_date, status, blood_type, emergency_contact_name, emergency_contact_phone, notes,
+           photo_url, created_at, updated_at, CURRENT_TIMESTAMP
+    FROM prisoners WHERE id = ANY(v_ids);
+
+    INSERT INTO archived_sentences (
+        id, prisoner_id, crime_type_id, sentence_start_date, sentence_years, sentence_months,
+        is_life_sentence, parole_eligible, parole_date, release_date, court_name, case_number,
+        judge_name, notes, created_at, updated_at
+    )
+    SELECT id, prisoner_id, crime_type_id, sentence_start_date, sentence_years, sentence_months,
+           is_life_sentence, parole_eligible, parole_date, release_date, court_name, case_number,
+           judge_name, notes, created_at, updated_at
+    FROM sentences WHERE prisoner_id = ANY(v_ids);
+
+    INSERT INTO archived_visits (
+        id, prisoner_id, visitor_id, visiting_room_id, booth, visit_date, scheduled_start_time,
+        scheduled_end_time, actual_start_time, actual_end_time, status, visit_type,
+        approved_by_staff_id, notes, created_at, updated_at
+    )
+    SELECT id, prisoner_id, visitor_id, visiting_room_id, booth, visit_date, scheduled_start_time,
+           scheduled_end_time, actual_start_time, actual_end_time, status, visit_type,
+           approved_by_staff_id, notes, created_at, updated_at
+    FROM visits WHERE prisoner_id = ANY(v_ids);
+
+    INSERT INTO archived_prisoner_programs (
+        id, prisoner_id, program_id, enrollment_date, completion_date, status, grade, notes,
+        created_at, updated_at
+    )
+    SELECT id, prisoner_id, program_id, enrollment_date, completion_date, status, grade, notes,
+           created_at, updated_at
+    FROM prisoner_programs WHERE prisoner_id = ANY(v_ids);
+
+    INSERT INTO archived_incidents (
+        id, prisoner_id, reported_by_staff_id, incident_date, incident_type, severity, location,
+        description, action_taken, solitary_days, is_resolved, resolved_date, created_at, updated_at
+    )
+    SELECT id, prisoner_id, reported_by_staff_id, incident_date, incident_type, severity, location,
+           description, action_taken, solitary_days, is_resolved, resolved_date, created_at, updated_at
+    FROM incidents WHERE prisoner_id = ANY(v_ids);
+
+    -- One set-based delete per child table, so the cascades from prisoners find nothing left
+    DELETE FROM sentences WHERE prisoner_id = ANY(v_ids);
+    DELETE FROM visits WHERE prisoner_id = ANY(v_ids);
+    DELETE FROM prisoner_programs WHERE prisoner_id = ANY(v_ids);
+    DELETE FROM incidents WHERE prisoner_id = ANY(v_ids);
+    DELETE FROM prisoners WHERE id = ANY(v_ids);
+
+    RETURN cardinality(v_ids);
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- TRIGGER 9: Keep prisoner numbers unique across the archive
+-- ============================================
+
+CREATE OR REPLACE FUNCTION check_archived_prisoner_number()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM archived_prisoners WHERE prisoner_number = NEW.prisoner_number) THEN
+        RAISE EXCEPTION 'Prisoner number % belongs to an archived prisoner', NEW.prisoner_number;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_check_archived_prisoner_number
+    BEFORE INSERT OR UPDATE OF prisoner_number ON prisoners
+    FOR EACH ROW
+    EXECUTE FUNCTION check_archived_prisoner_number();
+
+-- ============================================
+-- TRIGGER 10: Assign visiting room booths
+-- Checks the room is open for the visit and gives a visit that
+-- occupies it (scheduled or completed) the lowest free booth; an
+-- explicitly given booth is kept and checked by visit_bookings
+-- ============================================
+
+CREATE OR REPLACE FUNCTION assign_visit_booth()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_room visiting_rooms%ROWTYPE;
+    v_moved BOOLEAN := TG_OP = 'INSERT'
+        OR NEW.visiting_room_id IS DISTINCT FROM OLD.visiting_room_id
+        OR NEW.visit_date <> OLD.visit_date
+        OR NEW.scheduled_start_time <> OLD.scheduled_start_time
+        OR NEW.scheduled_end_time <> OLD.scheduled_end_time;
+BEGIN
+    IF NEW.visiting_room_id IS NULL THEN
+        NEW.booth := NULL;
+        RETURN NEW;
+    END IF;
+    IF NEW.status NOT IN ('scheduled', 'completed') THEN
+        RETURN NEW;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        IF NOT v_moved AND OLD.status IN ('scheduled', 'completed') THEN
+            RETURN NEW;
+        END IF;
+        -- Moved or reinstated: the old booth may be taken by now
+        IF NEW.booth IS NOT DISTINCT FROM OLD.booth THEN
+            NEW.booth := NULL;
+        END IF;
+    END IF;
+
+    SELECT * INTO v_room FROM visiting_rooms WHERE id = NEW.visiting_room_id;
+    IF NOT v_room.is_active THEN
+        RAISE EXCEPTION 'Visiting room % is closed', v_room.name;
+    END IF;
+    IF NEW.scheduled_start_time < v_room.opens_at OR NEW.scheduled_end_time > v_room.closes_at THEN
+        RAISE EXCEPTION 'Visiting room % is open from % to %', v_room.name, v_room.opens_at, v_room.closes_at;
+    END IF;
+    IF NEW.booth > v_room.booths THEN
+        RAISE EXCEPTION 'Visiting room % has % booths', v_room.name, v_room.booths;
+    END IF;
+
+    IF NEW.booth IS NULL THEN
+        -- One booking of the room at a time, so concurrent bookings do not pick the same booth
+        PERFORM pg_advisory_xact_lock(hashtext('visiting_room'), NEW.visiting_room_id);
+        SELECT booth INTO NEW.booth
+        FROM generate_series(1, v_room.booths) AS booth
+        WHERE NOT EXISTS (
+            SELECT 1 FROM visit_bookings b
+            WHERE b.visiting_room_id = NEW.visiting_room_id
+              AND b.booth = booth.booth
+              AND b.during && tsrange(NEW.visit_date + NEW.scheduled_start_time, NEW.visit_date + NEW.scheduled_end_time)
+              AND b.visit_id <> NEW.id
+        )
+        ORDER BY booth
+        LIMIT 1;
+        IF NEW.booth IS NULL THEN
+            RAISE EXCEPTION 'Visiting room % has no free booth at that time', v_room.name
+                USING ERRCODE = 'exclusion_violation';
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_assign_visit_booth
+    BEFORE INSERT OR UPDATE OF visiting_room_id, booth, visit_date, scheduled_start_time, scheduled_end_time, status
+    ON visits
+    FOR EACH ROW
+    EXECUTE FUNCTION assign_visit_booth();
+
+-- ============================================
+-- TRIGGER 11: Keep visit_bookings in step with visits
+-- A visit holds a booking while it is scheduled or completed; the
+-- exclusion constraints of visit_bookings reject double bookings.
+-- A visit moved to another month's partition is deleted and inserted
+-- ============================================
+
+CREATE OR REPLACE FUNCTION sync_visit_booking()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR NEW.status NOT IN ('scheduled', 'completed') THEN
+        DELETE FROM visit_bookings WHERE visit_id = OLD.id;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO visit_bookings (visit_id, prisoner_id, visiting_room_id, booth, during)
+    VALUES (
+        NEW.id, NEW.prisoner_id, NEW.visiting_room_id, NEW.booth,
+        tsrange(NEW.visit_date + NEW.scheduled_start_time, NEW.visit_date + NEW.scheduled_end_time)
+    )
+    ON CONFLICT (visit_id) DO UPDATE SET
+        prisoner_id = EXCLUDED.prisoner_id,
+        visiting_room_id = EXCLUDED.visiting_room_id,
+        booth = EXCLUDED.booth,
+        during = EXCLUDED.during;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_sync_visit_booking
+    AFTER INSERT
+        OR UPDATE OF prisoner_id, visiting_room_id, booth, visit_date, scheduled_start_time, scheduled_end_time, status
+        OR DELETE
+    ON visits
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_visit_booking();
+
+-- Rebuilds visit_bookings from visits, e.g. after a bulk load that bypassed the triggers
+CREATE OR REPLACE FUNCTION rebuild_visit_bookings()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM visit_bookings;
+    INSERT INTO visit_bookings (visit_id, prisoner_id, visiting_room_id, booth, during)
+    SELECT id, prisoner_id, visiting_room_id, booth,
+           tsrange(visit_date + scheduled_start_time, visit_date + scheduled_end_time)
+    FROM visits
+    WHERE status IN ('scheduled', 'completed');
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- FUNCTION 10: Free visit slots
+-- Slots of p_minutes (default: the room's slot length), starting every
+-- slot_minutes from opening time, from p_from to p_to, not yet started,
+-- in which the room (or every active room) has a free booth and, when
+-- p_prisoner_id is given, the prisoner has no other visit. The bookings
+-- of the whole range are read once, by idx_visit_bookings_start, and
+-- joined to the slots of their room and day instead of probed per slot
+-- ============================================
+
+CREATE OR REPLACE FUNCTION get_visit_availability(
+    p_from DATE,
+    p_to DATE,
+    p_prisoner_id INTEGER DEFAULT NULL,
+    p_room_id INTEGER DEFAULT NULL,
+    p_minutes INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+    visiting_room_id INTEGER,
+    room_name VARCHAR,
+    slot_start TIMESTAMP,
+    slot_end TIMESTAMP,
+    free_booths INTEGER
+) AS $$
+    WITH booked AS MATERIALIZED (
+        SELECT b.prisoner_id, b.visiting_room_id, b.booth, b.during, lower(b.during)::DATE AS day
+        FROM visit_bookings b
+        WHERE lower(b.during) >= p_from AND lower(b.during) < p_to + 1
+    ),
+    slots AS MATERIALIZED (
+        SELECT r.id, s.slot, s.slot + make_interval(mins => COALESCE(p_minutes, r.slot_minutes)) AS slot_end
+        FROM visiting_rooms r
+        CROSS JOIN generate_series(p_from::TIMESTAMP, p_to::TIMESTAMP, INTERVAL '1 day') AS d(day)
+        CROSS JOIN LATERAL generate_series(
+            d.day + r.opens_at,
+            d.day + r.closes_at - make_interval(mins => COALESCE(p_minutes, r.slot_minutes)),
+            make_interval(mins => r.slot_minutes)
+        ) AS s(slot)
+        WHERE r.is_active
+          AND (p_room_id IS NULL OR r.id = p_room_id)
+          AND s.slot >= LOCALTIMESTAMP
+    ),
+    taken AS (
+        SELECT s.id, s.slot, s.slot_end, COUNT(DISTINCT b.booth)::INTEGER AS booths
+        FROM slots s
+        LEFT JOIN booked b
+          ON b.visiting_room_id = s.id AND b.day = s.slot::DATE AND b.during && tsrange(s.slot, s.slot_end)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM booked p
+            WHERE p.prisoner_id = p_prisoner_id AND p.day = s.slot::DATE AND p.during && tsrange(s.slot, s.slot_end)
+        )
+        GROUP BY s.id, s.slot, s.slot_end
+    )
+    SELECT r.id, r.name, t.slot, t.slot_end, r.booths - t.booths
+    FROM taken t
+    JOIN visiting_rooms r ON r.id = t.id
+    WHERE r.booths > t.booths
+    ORDER BY t.slot, r.id;
+$$ LANGUAGE sql STABLE;
@@ -259,6 +259,15 @@ INSERT INTO visitors (first_name, last_name, date_of_birth, id_document_type, id
 ('Kamila', 'Jankowska', '1998-08-01', 'national_id', 'OPQ345678', 'child', '+48729012345', 'kamila.j@email.pl', false, NULL),
 ('Marek', 'Wisniewicz', '1975-11-28', 'passport', 'MN7890123', 'lawyer', '+48730123456', 'marek.w@adwokat.pl', false, NULL);
 
+-- ============================================
+-- VISITING ROOMS (3 rooms)
+-- ============================================
+
+INSERT INTO visiting_rooms (name, cell_block_id, booths, opens_at, closes_at, slot_minutes) VALUES
+('Block A Visiting Room', 1, 4, '08:00', '17:00', 30),
+('Block B Visiting Room', 2, 6, '08:00', '17:00', 30),
+('Legal Consultation Room', NULL, 2, '09:00', '16:00', 60);
+
 -- ============================================
 -- VISITS (100 visits)
 -- ============================================
@@ -485,3 +494,10 @@ ALTER TABLE visits ENABLE TRIGGER trg_check_visitor_blacklist;
 
 -- Commit transaction (rollback on any error will restore trigger states)
 COMMIT;
+
+-- Move the sample visits and incidents out of the default partitions into monthly ones
+SELECT * FROM manage_partitions();
+
+-- Populate the materialized report views with the seed data
+SELECT refresh_report_view('mv_prisoner_details');
+SELECT refresh_report_view('mv_block_summary');
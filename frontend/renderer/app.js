@@ -12,7 +12,8 @@ let staffRoles = [];
 let crimeTypes = [];
 let programTypes = [];
 let visitors = [];
-let prisonersPagination = { limit: 20, offset: 0, total: 0 };
+// Prisoners are fetched in keyset pages of `limit` while the table is scrolled
+let prisonersPagination = { limit: 100, nextCursor: null, total: 0, loading: false, request: 0 };
 
 // ============================================
 // UTILITY FUNCTIONS
@@ -35,8 +36,24 @@ function escapeAttr(text) {
         .replace(/>/g, '&gt;');
 }
 
+// GET responses are kept as JSON text (every caller parses its own copy, so mutating a result
+// never corrupts the cache) in an LRU bounded by total size. Entries younger than
+// API_CACHE_FRESH_MS are served as they are; older ones are served at once and revalidated in
+// the background with If-None-Match. Writes and change events drop the entries of the resource.
+const API_CACHE_MAX_BYTES = 8 * 1024 * 1024;
+const API_CACHE_FRESH_MS = 2000;
+
+const apiCache = new Map();  // endpoint -> { text, etag, storedAt }, least recently used first
+let apiCacheBytes = 0;
+let apiCacheGeneration = 0;  // bumped by every invalidation
+const apiInFlight = new Map();  // endpoint -> promise of the entry being fetched
+
 async function api(endpoint, options = {}) {
     try {
+        if ((options.method || 'GET') === 'GET' && options.cache !== false) {
+            return JSON.parse((await cachedGet(endpoint)).text);
+        }
+
         const response = await fetch(`${API_URL}${endpoint}`, {
             ...options,
             headers: {
@@ -50,6 +67,7 @@ async function api(endpoint, options = {}) {
             throw new Error(error.detail || 'Request failed');
         }
 
+        if (options.method && options.method !== 'GET') invalidateApiCache(endpoint);
         return await response.json();
     } catch (error) {
         console.error('API Error:', error);
@@ -57,6 +75,110 @@ async function api(endpoint, options = {}) {
     }
 }
 
+async function cachedGet(endpoint) {
+    const entry = apiCache.get(endpoint);
+    if (entry) {
+        // Refresh its LRU position
+        apiCache.delete(endpoint);
+        apiCache.set(endpoint, entry);
+        if (Date.now() - entry.storedAt > API_CACHE_FRESH_MS) {
+            revalidate(endpoint, entry).catch(error => {
+                dropEntry(endpoint);
+                console.error('API Error:', error);
+            });
+        }
+        return entry;
+    }
+    return fetchEntry(endpoint, null);
+}
+
+async function revalidate(endpoint, entry) {
+    const fresh = await fetchEntry(endpoint, entry);
+    // Whatever shows the old data is stale now; reloading is served from the updated cache
+    if (fresh.text !== entry.text) reloadCurrentPage();
+}
+
+// Identical concurrent GETs share one request
+function fetchEntry(endpoint, previous) {
+    let request = apiInFlight.get(endpoint);
+    if (!request) {
+        request = loadEntry(endpoint, previous).finally(() => apiInFlight.delete(endpoint));
+        apiInFlight.set(endpoint, request);
+    }
+    return request;
+}
+
+async function loadEntry(endpoint, previous) {
+    const headers = { 'Content-Type': 'application/json' };
+    if (previous?.etag) headers['If-None-Match'] = previous.etag;
+    const generation = apiCacheGeneration;
+    const response = await fetch(`${API_URL}${endpoint}`, { headers });
+
+    if (response.status === 304) {
+        previous.storedAt = Date.now();
+        return previous;
+    }
+    if (!response.ok) {
+        const error = await response.json().catch(() => ({ detail: 'Request failed' }));
+        throw new Error(error.detail || 'Request failed');
+    }
+
+    const entry = { text: await response.text(), etag: response.headers.get('ETag'), storedAt: Date.now() };
+    // A response that raced with an invalidation may predate the write; use it once but do not keep it
+    if (generation === apiCacheGeneration) storeEntry(endpoint, entry);
+    return entry;
+}
+
+function storeEntry(endpoint, entry) {
+    dropEntry(endpoint);
+    if (entry.text.length > API_CACHE_MAX_BYTES) return;
+    apiCache.set(endpoint, entry);
+    apiCacheBytes += entry.text.length;
+    for (const oldest of apiCache.keys()) {
+        if (apiCacheBytes <= API_CACHE_MAX_BYTES) break;
+        dropEntry(oldest);
+    }
+}
+
+function dropEntry(endpoint) {
+    const entry = apiCache.get(endpoint);
+    if (!entry) return;
+    apiCache.delete(endpoint);
+    apiCacheBytes -= entry.text.length;
+}
+
+// Written resource -> other resources whose responses show its data, after the server's invalidate_tables
+// sets: occupancy counts of cells and blocks follow prisoners, and prisoner histories (under /api/prisoners)
+// embed the records and the names of the staff, visitors and programs they reference
+const API_CACHE_DEPENDENTS = {
+    prisoners: ['cells', 'cell-blocks'],
+    cells: ['cell-blocks', 'prisoners'],
+    visits: ['prisoners'],
+    sentences: ['prisoners'],
+    'prisoner-programs': ['prisoners', 'programs'],
+    incidents: ['prisoners'],
+    programs: ['prisoners', 'prisoner-programs'],
+    staff: ['prisoners'],
+    visitors: ['prisoners', 'visits'],
+};
+
+// Drops everything cached under the written resource (`/api/cells/3` -> `/api/cells...`) and its dependents,
+// plus the statistics and report views derived from it; a batch may touch anything, so it clears everything
+function invalidateApiCache(endpoint) {
+    const resource = endpoint.split('?')[0].split('/')[2];
+    const dropped = new Set([resource, ...(API_CACHE_DEPENDENTS[resource] || []), 'stats', 'views']);
+    apiCacheGeneration++;
+    for (const key of [...apiCache.keys()]) {
+        if (resource === 'batch' || dropped.has(key.split('?')[0].split('/')[2])) dropEntry(key);
+    }
+}
+
+function clearApiCache() {
+    apiCacheGeneration++;
+    apiCache.clear();
+    apiCacheBytes = 0;
+}
+
 function showToast(message, type = 'info') {
     const container = document.getElementById('toast-container');
     const toast = document.createElement('div');
@@ -115,6 +237,136 @@ function translateIncidentType(type) {
     return translations[type] || type;
 }
 
+// ============================================
+// VIRTUAL TABLES
+// ============================================
+
+// Keeps only the rows inside the scrolled viewport (plus an overscan margin) in the DOM,
+// between two spacer rows standing in for the rows above and below. Row nodes leaving the
+// window are reused for rows entering it, so a scroll step rewrites a few rows whatever
+// the row count. Rows must have a uniform height; cells do not wrap in virtual tables.
+class VirtualTable {
+    constructor(table, { rowHtml, emptyHtml, onNearEnd = null, overscan = 10 }) {
+        this.table = table;
+        this.tbody = table.querySelector('tbody');
+        this.viewport = table.closest('.table-container');
+        this.viewport.classList.add('virtual');
+        this.rowHtml = rowHtml;  // row -> the <td> cells of its <tr>
+        this.emptyHtml = emptyHtml;
+        this.onNearEnd = onNearEnd;  // called when the window reaches the last rows
+        this.overscan = overscan;
+        this.rows = [];
+        this.rowHeight = 45;  // estimate until a rendered row is measured
+        this.measured = false;
+        this.visible = new Map();  // row index -> <tr> showing it
+        this.free = [];  // detached <tr> nodes ready for reuse
+        this.frame = null;
+        this.topSpacer = this.createSpacer();
+        this.bottomSpacer = this.createSpacer();
+        this.viewport.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleRender());
+    }
+
+    createSpacer() {
+        const tr = document.createElement('tr');
+        tr.className = 'virtual-spacer';
+        tr.appendChild(document.createElement('td'));
+        return tr;
+    }
+
+    setRows(rows) {
+        this.rows = rows;
+        // Rows may have changed in place, so every node is rewritten
+        for (const tr of this.visible.values()) {
+            tr.remove();
+            this.free.push(tr);
+        }
+        this.visible.clear();
+        this.render();
+    }
+
+    scrollToTop() {
+        this.viewport.scrollTop = 0;
+    }
+
+    // Let the columns size themselves again (e.g. after the header changed)
+    resetColumns() {
+        this.table.querySelectorAll('thead th').forEach(th => { th.style.width = ''; });
+        this.table.style.tableLayout = '';
+        this.columnsLocked = false;
+    }
+
+    // Freeze the column widths of the first rendered rows, so recycled rows do not make them jump
+    lockColumns() {
+        const headers = [...this.table.querySelectorAll('thead th')];
+        const widths = headers.map(th => th.offsetWidth);
+        headers.forEach((th, i) => { th.style.width = `${widths[i]}px`; });
+        this.table.style.tableLayout = 'fixed';
+        this.columnsLocked = true;
+    }
+
+    scheduleRender() {
+        if (this.frame !== null) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    render() {
+        const count = this.rows.length;
+        if (count === 0) {
+            this.tbody.innerHTML = this.emptyHtml;
+            return;
+        }
+        if (!this.topSpacer.isConnected) {
+            this.tbody.replaceChildren(this.topSpacer, this.bottomSpacer);
+        }
+
+        // scrollTop may still reflect a longer list until the spacers are resized
+        const top = Math.min(this.viewport.scrollTop, (count - 1) * this.rowHeight);
+        const first = Math.max(0, Math.floor(top / this.rowHeight) - this.overscan);
+        const last = Math.min(count, Math.ceil((top + this.viewport.clientHeight) / this.rowHeight) + this.overscan);
+
+        for (const [index, tr] of this.visible) {
+            if (index < first || index >= last) {
+                this.visible.delete(index);
+                tr.remove();
+                this.free.push(tr);
+            }
+        }
+        let previous = this.topSpacer;
+        for (let index = first; index < last; index++) {
+            let tr = this.visible.get(index);
+            if (!tr) {
+                tr = this.free.pop() || document.createElement('tr');
+                tr.innerHTML = this.rowHtml(this.rows[index]);
+                this.visible.set(index, tr);
+            }
+            if (previous.nextSibling !== tr) previous.after(tr);
+            previous = tr;
+        }
+
+        const columns = this.table.querySelectorAll('thead th').length || 1;
+        this.topSpacer.firstChild.colSpan = this.bottomSpacer.firstChild.colSpan = columns;
+        this.topSpacer.firstChild.style.height = `${first * this.rowHeight}px`;
+        this.bottomSpacer.firstChild.style.height = `${(count - last) * this.rowHeight}px`;
+
+        // Hidden tables (inactive pages) measure as zero; measure once they are shown
+        if (!this.measured && this.topSpacer.nextSibling.offsetHeight) {
+            this.rowHeight = this.topSpacer.nextSibling.offsetHeight;
+            this.measured = true;
+            this.scheduleRender();
+        }
+        if (!this.columnsLocked && this.viewport.offsetWidth) {
+            this.lockColumns();
+        }
+        if (this.onNearEnd && last >= count - this.overscan) {
+            this.onNearEnd();
+        }
+    }
+}
+
 // ============================================
 // NAVIGATION
 // ============================================
@@ -213,77 +465,80 @@ async function loadDashboard() {
 // PRISONERS
 // ============================================
 
-async function loadPrisoners() {
+async function loadPrisoners(append = false) {
     const search = document.getElementById('prisoner-search').value;
     const status = document.getElementById('prisoner-status-filter').value;
 
-    let url = `/api/prisoners?limit=${prisonersPagination.limit}&offset=${prisonersPagination.offset}`;
+    // Reloads fetch as many rows as are already loaded (up to the API maximum), so the scroll position holds
+    const limit = append
+        ? prisonersPagination.limit
+        : Math.min(Math.max(prisonersPagination.limit, prisoners.length), 1000);
+    let url = `/api/prisoners?limit=${limit}`;
+    if (append) url += `&cursor=${encodeURIComponent(prisonersPagination.nextCursor)}`;
     if (search) url += `&search=${encodeURIComponent(search)}`;
     if (status) url += `&status=${status}`;
 
+    // A newer load (search, filter, refresh) supersedes this one
+    const request = ++prisonersPagination.request;
     const result = await api(url);
-    prisoners = result.data;
+    if (request !== prisonersPagination.request) return;
+
+    prisoners = append ? prisoners.concat(result.data) : result.data;
     prisonersPagination.total = result.total;
+    prisonersPagination.nextCursor = result.next_cursor;
 
     renderPrisoners();
     renderPrisonersPagination();
 }
 
-function renderPrisoners() {
-    const tbody = document.querySelector('#prisoners-table tbody');
+// Fetches the next keyset page when the table is scrolled near its last loaded row
+function loadMorePrisoners() {
+    if (!prisonersPagination.nextCursor || prisonersPagination.loading) return;
+    prisonersPagination.loading = true;
+    loadPrisoners(true)
+        .catch(error => showToast('Błąd ładowania danych: ' + error.message, 'error'))
+        .finally(() => { prisonersPagination.loading = false; });
+}
 
-    if (prisoners.length === 0) {
-        tbody.innerHTML = `<tr><td colspan="7" class="empty-state">Brak więźniów do wyświetlenia</td></tr>`;
-        return;
-    }
+const prisonersTable = new VirtualTable(document.getElementById('prisoners-table'), {
+    rowHtml: p => `
+        <td>${escapeHtml(p.prisoner_number)}</td>
+        <td>${escapeHtml(p.first_name)} ${escapeHtml(p.last_name)}</td>
+        <td>${formatDate(p.date_of_birth)}</td>
+        <td>${escapeHtml(p.cell_code) || '-'}</td>
+        <td>${escapeHtml(p.block_name) || '-'}</td>
+        <td><span class="status-badge ${escapeHtml(p.status)}">${translateStatus(p.status)}</span></td>
+        <td class="action-buttons">
+            <button class="btn btn-sm btn-secondary" onclick="viewPrisoner(${parseInt(p.id)})">Szczegóły</button>
+            <button class="btn btn-sm btn-secondary" onclick="editPrisoner(${parseInt(p.id)})">Edytuj</button>
+            <button class="btn btn-sm btn-danger" onclick="deletePrisoner(${parseInt(p.id)})">Usuń</button>
+        </td>
+    `,
+    emptyHtml: `<tr><td colspan="7" class="empty-state">Brak więźniów do wyświetlenia</td></tr>`,
+    onNearEnd: loadMorePrisoners,
+});
 
-    tbody.innerHTML = prisoners.map(p => `
-        <tr>
-            <td>${escapeHtml(p.prisoner_number)}</td>
-            <td>${escapeHtml(p.first_name)} ${escapeHtml(p.last_name)}</td>
-            <td>${formatDate(p.date_of_birth)}</td>
-            <td>${escapeHtml(p.cell_code) || '-'}</td>
-            <td>${escapeHtml(p.block_name) || '-'}</td>
-            <td><span class="status-badge ${escapeHtml(p.status)}">${translateStatus(p.status)}</span></td>
-            <td class="action-buttons">
-                <button class="btn btn-sm btn-secondary" onclick="viewPrisoner(${parseInt(p.id)})">Szczegóły</button>
-                <button class="btn btn-sm btn-secondary" onclick="editPrisoner(${parseInt(p.id)})">Edytuj</button>
-                <button class="btn btn-sm btn-danger" onclick="deletePrisoner(${parseInt(p.id)})">Usuń</button>
-            </td>
-        </tr>
-    `).join('');
+function renderPrisoners() {
+    prisonersTable.setRows(prisoners);
 }
 
 function renderPrisonersPagination() {
     const container = document.getElementById('prisoners-pagination');
-    const totalPages = Math.ceil(prisonersPagination.total / prisonersPagination.limit);
-    const currentPageNum = Math.floor(prisonersPagination.offset / prisonersPagination.limit) + 1;
 
-    if (totalPages <= 1) {
+    if (prisoners.length === 0) {
         container.innerHTML = '';
         return;
     }
 
-    let html = `
-        <button ${currentPageNum === 1 ? 'disabled' : ''} onclick="changePrisonersPage(${currentPageNum - 1})">&lt;</button>
-    `;
-
-    for (let i = 1; i <= totalPages; i++) {
-        if (i === 1 || i === totalPages || (i >= currentPageNum - 2 && i <= currentPageNum + 2)) {
-            html += `<button class="${i === currentPageNum ? 'active' : ''}" onclick="changePrisonersPage(${i})">${i}</button>`;
-        } else if (i === currentPageNum - 3 || i === currentPageNum + 3) {
-            html += `<span>...</span>`;
-        }
-    }
-
-    html += `<button ${currentPageNum === totalPages ? 'disabled' : ''} onclick="changePrisonersPage(${currentPageNum + 1})">&gt;</button>`;
-
-    container.innerHTML = html;
+    // Further rows are fetched while scrolling, so this only reports progress
+    const total = Math.max(prisonersPagination.total, prisoners.length);
+    container.innerHTML = `<span>Wyświetlono ${prisoners.length} z ${total}</span>`;
 }
 
-function changePrisonersPage(page) {
-    prisonersPagination.offset = (page - 1) * prisonersPagination.limit;
-    loadPrisoners();
+function resetPrisonersPagination() {
+    prisoners = [];
+    prisonersPagination.nextCursor = null;
+    prisonersTable.scrollToTop();
 }
 
 async function showPrisonerForm(prisonerId = null) {
@@ -430,7 +685,7 @@ async function savePrisoner(event, prisonerId) {
             showToast('Więzień dodany', 'success');
         }
         closeModal();
-        loadPrisoners();
+        refreshAfterWrite(loadPrisoners);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -496,7 +751,7 @@ async function deletePrisoner(id) {
     try {
         await api(`/api/prisoners/${id}`, { method: 'DELETE' });
         showToast('Więzień usunięty', 'success');
-        loadPrisoners();
+        refreshAfterWrite(loadPrisoners);
     } catch (error) {
         showToast('Błąd usuwania: ' + error.message, 'error');
     }
@@ -504,12 +759,12 @@ async function deletePrisoner(id) {
 
 // Search and filter handlers for prisoners
 document.getElementById('prisoner-search')?.addEventListener('input', debounce(() => {
-    prisonersPagination.offset = 0;
+    resetPrisonersPagination();
     loadPrisoners();
 }, 300));
 
 document.getElementById('prisoner-status-filter')?.addEventListener('change', () => {
-    prisonersPagination.offset = 0;
+    resetPrisonersPagination();
     loadPrisoners();
 });
 
@@ -657,7 +912,7 @@ async function saveCell(event, cellId) {
             showToast('Cela dodana', 'success');
         }
         closeModal();
-        loadCells();
+        refreshAfterWrite(loadCells);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -673,7 +928,7 @@ async function deleteCell(id) {
     try {
         await api(`/api/cells/${id}`, { method: 'DELETE' });
         showToast('Cela usunięta', 'success');
-        loadCells();
+        refreshAfterWrite(loadCells);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -839,7 +1094,7 @@ async function saveStaff(event, staffId) {
             showToast('Pracownik dodany', 'success');
         }
         closeModal();
-        loadStaff();
+        refreshAfterWrite(loadStaff);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -855,7 +1110,7 @@ async function deleteStaff(id) {
     try {
         await api(`/api/staff/${id}`, { method: 'DELETE' });
         showToast('Pracownik usunięty', 'success');
-        loadStaff();
+        refreshAfterWrite(loadStaff);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -995,7 +1250,7 @@ async function saveVisit(event, visitId) {
             showToast('Wizyta zaplanowana', 'success');
         }
         closeModal();
-        loadVisits();
+        refreshAfterWrite(loadVisits);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -1011,7 +1266,7 @@ async function deleteVisit(id) {
     try {
         await api(`/api/visits/${id}`, { method: 'DELETE' });
         showToast('Wizyta usunięta', 'success');
-        loadVisits();
+        refreshAfterWrite(loadVisits);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -1132,7 +1387,7 @@ async function saveProgram(event) {
         await api('/api/programs', { method: 'POST', body: JSON.stringify(data) });
         showToast('Program dodany', 'success');
         closeModal();
-        loadPrograms();
+        refreshAfterWrite(loadPrograms);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -1196,7 +1451,7 @@ async function saveEnrollment(event, id) {
         await api(`/api/prisoner-programs/${id}`, { method: 'PUT', body: JSON.stringify(data) });
         showToast('Zapis zaktualizowany', 'success');
         closeModal();
-        loadPrograms();
+        refreshAfterWrite(loadPrograms);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -1346,7 +1601,7 @@ async function saveIncident(event, incidentId) {
             showToast('Incydent zgłoszony', 'success');
         }
         closeModal();
-        loadIncidents();
+        refreshAfterWrite(loadIncidents);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -1362,7 +1617,7 @@ async function deleteIncident(id) {
     try {
         await api(`/api/incidents/${id}`, { method: 'DELETE' });
         showToast('Incydent usunięty', 'success');
-        loadIncidents();
+        refreshAfterWrite(loadIncidents);
     } catch (error) {
         showToast('Błąd: ' + error.message, 'error');
     }
@@ -1389,47 +1644,71 @@ document.querySelectorAll('.report-tab').forEach(tab => {
     });
 });
 
+let reportStream = null;
+
+// Reports are streamed as NDJSON from the export endpoint and shown while they arrive, however large
 async function loadReport(reportName) {
-    const endpoints = {
-        'prisoner-details': '/api/views/prisoner-details',
-        'cell-occupancy': '/api/views/cell-occupancy',
-        'upcoming-releases': '/api/views/upcoming-releases',
-        'block-summary': '/api/views/block-summary',
-        'staff-overview': '/api/views/staff-overview'
-    };
+    reportStream?.abort();
+    const controller = new AbortController();
+    reportStream = controller;
 
+    const data = [];
     try {
-        const data = await api(endpoints[reportName]);
+        const url = `${API_URL}/api/export/${reportName}?format=ndjson`;
+        const response = await fetch(url, { signal: controller.signal });
+        if (!response.ok) throw new Error('Request failed');
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            const lines = (buffer + value).split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (line) data.push(JSON.parse(line));
+            }
+            // Rows only grow while streaming, so the visible window is redrawn at most once per frame
+            if (reportViews[reportName]?.table.rows === data) {
+                reportViews[reportName].table.scheduleRender();
+            } else if (data.length) {
+                renderReportTable(reportName, data);
+            }
+        }
         renderReportTable(reportName, data);
     } catch (error) {
-        showToast('Błąd ładowania raportu', 'error');
+        if (error.name !== 'AbortError') showToast('Błąd ładowania raportu', 'error');
     }
 }
 
+// report name -> { table: VirtualTable, columns }
+const reportViews = {};
+
 function renderReportTable(reportName, data) {
     const table = document.getElementById(`report-${reportName}-table`);
-
-    if (data.length === 0) {
-        table.innerHTML = '<tr><td>Brak danych do wyświetlenia</td></tr>';
-        return;
+    let view = reportViews[reportName];
+    if (!view) {
+        view = { columns: [] };
+        view.table = new VirtualTable(table, {
+            rowHtml: row => view.columns.map(col => `<td>${formatCellValue(row[col])}</td>`).join(''),
+            emptyHtml: '<tr><td>Brak danych do wyświetlenia</td></tr>',
+        });
+        reportViews[reportName] = view;
     }
 
     // Get column names from first row
-    const columns = Object.keys(data[0]);
-
-    // Build header
-    table.querySelector('thead').innerHTML = `
-        <tr>
-            ${columns.map(col => `<th>${formatColumnName(col)}</th>`).join('')}
-        </tr>
-    `;
+    const columns = data.length ? Object.keys(data[0]) : [];
+    if (columns.join() !== view.columns.join()) {
+        view.columns = columns;
+        table.querySelector('thead').innerHTML = columns.length ? `
+            <tr>
+                ${columns.map(col => `<th>${formatColumnName(col)}</th>`).join('')}
+            </tr>
+        ` : '';
+        view.table.resetColumns();
+    }
 
-    // Build body
-    table.querySelector('tbody').innerHTML = data.map(row => `
-        <tr>
-            ${columns.map(col => `<td>${formatCellValue(row[col])}</td>`).join('')}
-        </tr>
-    `).join('');
+    view.table.setRows(data);
 }
 
 function formatColumnName(name) {
@@ -1494,6 +1773,98 @@ function formatCellValue(value) {
     return escapeHtml(value);
 }
 
+// ============================================
+// CHANGE EVENTS
+// ============================================
+
+// Tables whose changes affect each page. Moving prisoners also updates the cell occupancy
+// counters, so the prisoners page deliberately ignores cells.
+const PAGE_TABLES = {
+    dashboard: ['prisoners', 'cells', 'cell_blocks', 'staff', 'visits', 'incidents'],
+    prisoners: ['prisoners'],
+    cells: ['cells', 'cell_blocks'],
+    staff: ['staff'],
+    visits: ['visits', 'visitors'],
+    programs: ['programs', 'prisoner_programs'],
+    incidents: ['incidents'],
+};
+
+// Lists refreshed row by row on updates: the loaded rows, the detail endpoint returning a
+// row of the same shape, and whether a filter is active (a changed row may no longer match it)
+const LIVE_ROWS = {
+    prisoners: {
+        rows: () => prisoners,
+        url: id => `/api/prisoners/${id}`,
+        render: renderPrisoners,
+        filtered: () => Boolean(document.getElementById('prisoner-search').value ||
+            document.getElementById('prisoner-status-filter').value),
+    },
+    cells: {
+        rows: () => cells,
+        url: id => `/api/cells/${id}`,
+        render: renderCells,
+        filtered: () => Boolean(document.getElementById('cell-block-filter').value),
+    },
+    staff: {
+        rows: () => staff,
+        url: id => `/api/staff/${id}`,
+        render: renderStaff,
+        filtered: () => Boolean(document.getElementById('staff-role-filter').value),
+    },
+};
+
+let changeEvents = null;
+
+// Bursts of changes (imports, batches) reload the page once
+const reloadCurrentPage = debounce(() => loadPageData(currentPage), 500);
+
+function connectChangeEvents() {
+    changeEvents = new EventSource(`${API_URL}/api/events`);
+    changeEvents.addEventListener('change', (e) => handleChange(JSON.parse(e.data)));
+    // Sent when changes may have been missed (reconnect, slow client); EventSource reconnects by itself
+    changeEvents.addEventListener('resync', () => {
+        clearApiCache();
+        reloadCurrentPage();
+    });
+}
+
+function handleChange(change) {
+    invalidateApiCache(`/api/${change.table.replace(/_/g, '-')}`);
+    if (!(PAGE_TABLES[currentPage] || []).includes(change.table)) return;
+
+    const live = LIVE_ROWS[change.table];
+    if (currentPage === change.table && live && change.op === 'update' && change.ids && !live.filtered()) {
+        refreshRows(live, change.ids);
+    } else {
+        reloadCurrentPage();
+    }
+}
+
+async function refreshRows(live, ids) {
+    const visible = ids.filter(id => live.rows().some(row => row.id === id));
+    if (visible.length === 0) return;
+
+    const fresh = await Promise.all(visible.map(id => api(live.url(id)).catch(() => null)));
+    const rows = live.rows();
+    visible.forEach((id, i) => {
+        const index = rows.findIndex(row => row.id === id);
+        if (index === -1) return;
+        if (fresh[i]) {
+            rows[index] = fresh[i];
+        } else {
+            rows.splice(index, 1);
+        }
+    });
+    live.render();
+}
+
+// After the user's own writes: the change event refreshes the page, unless the stream is down
+function refreshAfterWrite(loader) {
+    if (!changeEvents || changeEvents.readyState !== EventSource.OPEN) {
+        loader();
+    }
+}
+
 // ============================================
 // MODAL
 // ============================================
@@ -1526,4 +1897,5 @@ document.addEventListener('keydown', (e) => {
 
 document.addEventListener('DOMContentLoaded', () => {
     loadDashboard();
+    connectChangeEvents();
 });
@@ -0,0 +1,138 @@
+"""
+Prison Management System - async vs threaded database benchmark
+
+Starts the backend once per DB_MODE, drives the same endpoints at the same
+concurrency, and prints throughput and latency percentiles side by side.
+
+Usage:
+    uv run python scripts/benchmark_db_modes.py --concurrency 200 --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+DEFAULT_ENDPOINTS = [
+    "/api/views/block-summary",
+    "/api/prisoners?limit=50",
+    "/api/stats",
+]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get("/api/health")
+                if response.status_code == 200 and response.json().get("status") == "healthy":
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Backend at {base_url} did not become healthy within {timeout}s")
+
+
+async def run_load(base_url: str, endpoints: list, concurrency: int, total_requests: int) -> dict:
+    """Issue ``total_requests`` GETs round-robin over ``endpoints`` with ``concurrency`` workers."""
+    latencies = []
+    errors = 0
+    next_request = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def worker():
+            nonlocal next_request, errors
+            while next_request < total_requests:
+                endpoint = endpoints[next_request % len(endpoints)]
+                next_request += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(endpoint)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def start_backend(mode: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "DB_MODE": mode}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.server:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def benchmark_mode(mode: str, args) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    process = start_backend(mode, args.port)
+    try:
+        await wait_until_healthy(base_url)
+        # Warm up pools and caches so both modes start from the same state
+        await run_load(base_url, args.endpoints, min(args.concurrency, 10), min(args.requests, 100))
+        return await run_load(base_url, args.endpoints, args.concurrency, args.requests)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare DB_MODE=threaded and DB_MODE=async under identical load")
+    parser.add_argument("--concurrency", type=int, default=200, help="Concurrent in-flight requests")
+    parser.add_argument("--requests", type=int, default=5000, help="Total requests per mode")
+    parser.add_argument("--port", type=int, default=8100, help="Port used for the temporary backend")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS, help="Endpoints to request round-robin")
+    parser.add_argument("--modes", nargs="+", default=["threaded", "async"], choices=["threaded", "async"])
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        print(f"Benchmarking DB_MODE={mode} at concurrency {args.concurrency}...")
+        results[mode] = await benchmark_mode(mode, args)
+
+    columns = ["requests", "errors", "elapsed_s", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print()
+    print(f"{'mode':<10}" + "".join(f"{c:>16}" for c in columns))
+    for mode, result in results.items():
+        print(f"{mode:<10}" + "".join(f"{result[c]:>16}" for c in columns))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"concurrency": args.concurrency, "endpoints": args.endpoints, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,351 @@
+"""
+Prison Management System - fast database reset
+
+Rebuilds the database with generated data (see generate_data.py) at sizes
+where replaying row-wise INSERTs through the normal triggers and indexes
+would take hours. The work runs in timed phases:
+
+1. schema    - recreate the public schema from database/01-03 and load
+               04_seed_data.sql for its reference tables (the sample rows
+               are truncated again)
+2. generate  - write one COPY file per table (skipped when ``--data`` already
+               holds them, so the same dataset can be reloaded quickly)
+3. prepare   - create the monthly partitions of the partitioned tables, drop
+               the primary keys, unique and exclusion constraints, foreign
+               keys and indexes of the loaded tables and disable their
+               triggers, remembering every definition
+4. load      - ``COPY ... FREEZE`` each file right after a TRUNCATE in the
+               same transaction, ``--jobs`` tables at a time (partitioned
+               tables cannot be frozen on load and are copied plainly)
+5. keys, indexes - rebuild them from the saved definitions, in parallel; on
+               partitioned tables each partition is built as its own job
+               and the parent's key or index then adopts them
+6. foreign keys - re-add them ``NOT VALID`` and validate each with one scan
+               (added validated on partitioned tables, which refuse NOT VALID)
+7. validate  - set-based checks of what the disabled triggers enforce row by
+               row (cell capacity, blacklisted visitors, overlapping visits),
+               then rebuild the counters and visit bookings they maintain
+8. analyze   - VACUUM ANALYZE and refresh the report views
+
+The backend should be stopped while the schema is rebuilt.
+
+Usage:
+    uv run python scripts/fast_reset.py --prisoners 1000000 --visits 10000000 --data /tmp/prison-data --jobs 4
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+import psycopg
+
+from generate_data import (
+    COLUMNS, PARTITIONED_TABLES, TABLES, add_count_arguments, connection_info, create_generator, create_partitions,
+    reset_sequences, write_files,
+)
+
+SQL_FILES = ("01_schema.sql", "02_views.sql", "03_functions.sql", "04_seed_data.sql")
+
+# name -> query counting the rows that break a rule a disabled trigger enforces on every write
+TRIGGER_CHECKS = {
+    "cells over capacity (trg_check_cell_capacity)": """
+        SELECT COUNT(*)
+        FROM (
+            SELECT p.cell_id
+            FROM prisoners p
+            JOIN cells c ON c.id = p.cell_id
+            WHERE p.status = 'incarcerated'
+            GROUP BY p.cell_id, c.capacity
+            HAVING COUNT(*) > c.capacity
+        ) over_capacity
+    """,
+    "visits by blacklisted visitors (trg_check_visitor_blacklist)": """
+        SELECT COUNT(*) FROM visits v JOIN visitors vr ON vr.id = v.visitor_id WHERE vr.is_blacklisted
+    """,
+}
+
+
+class Phases:
+    """Prints each phase as it finishes and a summary of all of them at the end."""
+
+    def __init__(self):
+        self.timings = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        print(f"{name}...", flush=True)
+        yield
+        elapsed = time.perf_counter() - started
+        self.timings.append((name, elapsed))
+        print(f"{name} done in {elapsed:.1f}s", flush=True)
+
+    def summary(self):
+        print()
+        for name, elapsed in self.timings:
+            print(f"{name:<16} {elapsed:>9.1f}s")
+        print(f"{'total':<16} {time.perf_counter() - self.started:>9.1f}s")
+
+
+def connect(maintenance_work_mem: str = None) -> psycopg.Connection:
+    conn = psycopg.connect(connection_info(), autocommit=True)
+    if maintenance_work_mem:
+        conn.execute(f"SET maintenance_work_mem = '{maintenance_work_mem}'")
+    return conn
+
+
+def run_parallel(jobs: int, func, items) -> list:
+    """``func(item)`` for every item on up to ``jobs`` threads; the first error is raised."""
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(func, items))
+
+
+# ============================================
+# PHASES
+# ============================================
+
+
+def create_schema(conn, sql_dir: Path):
+    conn.execute("DROP SCHEMA public CASCADE")
+    conn.execute("CREATE SCHEMA public")
+    conn.execute("GRANT ALL ON SCHEMA public TO public")
+    for name in SQL_FILES:
+        conn.execute((sql_dir / name).read_text(encoding="utf-8"))
+    # Keep the reference tables of the seed, drop its sample rows
+    conn.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+
+
+def saved_definitions(conn) -> dict:
+    """Constraint, index and trigger definitions of the loaded tables, to drop and later restore."""
+    tables = list(TABLES)
+    keys = conn.execute(
+        """
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype IN ('p', 'u', 'x') AND conrelid = ANY(%s::regclass[])
+        ORDER BY conrelid::regclass::text, contype, conname
+        """,
+        (tables,),
+    ).fetchall()
+    foreign_keys = conn.execute(
+        """
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND (conrelid = ANY(%s::regclass[]) OR confrelid = ANY(%s::regclass[]))
+          AND conparentid = 0  -- partitions' copies come and go with the parent's
+        ORDER BY conrelid::regclass::text, conname
+        """,
+        (tables, tables),
+    ).fetchall()
+    indexes = conn.execute(
+        """
+        SELECT i.indrelid::regclass::text, c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = ANY(%s::regclass[])
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint k
+              WHERE k.conindid = i.indexrelid AND k.conrelid = i.indrelid AND k.contype IN ('p', 'u', 'x')
+          )
+        ORDER BY 1, 2
+        """,
+        (tables,),
+    ).fetchall()
+    partitions = {}
+    for parent, partition in conn.execute(
+        """
+        SELECT i.inhparent::regclass::text, i.inhrelid::regclass::text
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = ANY(%s::regclass[]) AND c.relkind = 'r'
+        ORDER BY 1, 2
+        """,
+        (tables,),
+    ):
+        partitions.setdefault(parent, []).append(partition)
+    return {"keys": keys, "foreign_keys": foreign_keys, "indexes": indexes, "partitions": partitions}
+
+
+def drop_definitions(conn, definitions: dict):
+    with conn.transaction():
+        for table, name, _ in definitions["foreign_keys"]:
+            conn.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+        for table, name, _ in definitions["keys"]:
+            conn.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+        for _, name, _ in definitions["indexes"]:
+            conn.execute(f'DROP INDEX "{name}"')
+        for table in TABLES:
+            conn.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+
+
+def load_file(table: str, path: Path) -> int:
+    # FREEZE writes the rows already frozen, sparing VACUUM a rewrite of every page; it
+    # needs the table to be emptied in the same transaction and is refused on partitioned tables
+    with connect() as conn, conn.transaction():
+        conn.execute(f"TRUNCATE {table}")
+        statement = f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN"
+        if table not in PARTITIONED_TABLES:
+            statement += " WITH (FREEZE)"
+        with conn.cursor().copy(statement) as copy, open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                copy.write(chunk)
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def run_ddl(args, statements: list):
+    with connect(args.maintenance_work_mem) as conn:
+        for statement in statements:
+            conn.execute(statement)
+
+
+def restore_keys(args, definitions: dict):
+    # Constraints on one table lock it exclusively, so each table's keys are one job; a partitioned
+    # table's keys are added to every partition first, which the parent's constraint then adopts
+    partitions = definitions["partitions"]
+    by_table, parents = {}, []
+    for table, name, definition in definitions["keys"]:
+        for partition in partitions.get(table, ()):
+            by_table.setdefault(partition, []).append(f"ALTER TABLE {partition} ADD {definition}")
+        statement = f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'
+        (parents if table in partitions else by_table.setdefault(table, [])).append(statement)
+    run_parallel(args.jobs, lambda statements: run_ddl(args, statements), list(by_table.values()))
+    run_ddl(args, parents)
+
+
+def restore_indexes(args, definitions: dict):
+    # CREATE INDEX only blocks writes, so indexes of the same table build side by side. Indexes of a
+    # partitioned table are saved as "... ON ONLY parent ...": they are built on each partition,
+    # then created on the parent without ONLY, which attaches the matching partition indexes
+    partitions = definitions["partitions"]
+    statements, parents = [], []
+    for table, _, definition in definitions["indexes"]:
+        if table not in partitions:
+            statements.append(definition)
+            continue
+        head, tail = definition.split(" ON ONLY ", 1)
+        create, method = head.rsplit(" ", 1)[0], tail.split(" ", 1)[1]
+        statements.extend(f"{create} ON {partition} {method}" for partition in partitions[table])
+        parents.append(f"{head} ON {tail}")
+    run_parallel(args.jobs, lambda statement: run_ddl(args, [statement]), statements)
+    run_ddl(args, parents)
+
+
+def restore_foreign_keys(args, conn, definitions: dict):
+    # NOT VALID adds a constraint without checking existing rows; VALIDATE then checks them
+    # with one join per constraint instead of one lookup per row. Partitioned tables refuse
+    # NOT VALID foreign keys, but adding one checks each partition with the same kind of join
+    statements = []
+    with conn.transaction():
+        for table, name, definition in definitions["foreign_keys"]:
+            if table in definitions["partitions"]:
+                statements.append(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+            else:
+                conn.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition} NOT VALID')
+                statements.append(f'ALTER TABLE {table} VALIDATE CONSTRAINT "{name}"')
+    run_parallel(args.jobs, lambda statement: run_ddl(args, [statement]), statements)
+
+
+def validate(conn) -> list:
+    """Run ``TRIGGER_CHECKS``, rebuild the counters the triggers keep and re-enable them; returns failures."""
+    failures = []
+    for name, query in TRIGGER_CHECKS.items():
+        count = conn.execute(query).fetchone()[0]
+        print(f"  {name}: {count} violation(s)")
+        if count:
+            failures.append(name)
+
+    # trg_sync_visit_booking was off during the load; the bookings' exclusion
+    # constraints reject overlapping visits as the table is rebuilt in one statement
+    try:
+        conn.execute("SELECT rebuild_visit_bookings()")
+    except psycopg.errors.ExclusionViolation as e:
+        print(f"  overlapping visits (visit_bookings): {e.diag.message_detail}")
+        failures.append("overlapping visits (visit_bookings)")
+
+    with conn.transaction():
+        # Before the triggers are back, so updating cells does not also update their block row by row
+        conn.execute("SELECT refresh_occupancy_counters()")
+        conn.execute("""
+            INSERT INTO prisoner_status_counts AS c (status, prisoner_count)
+            SELECT s.status, COUNT(p.id)
+            FROM (SELECT DISTINCT status FROM prisoners UNION SELECT status FROM prisoner_status_counts) s
+            LEFT JOIN prisoners p ON p.status = s.status
+            GROUP BY s.status
+            ON CONFLICT (status) DO UPDATE SET prisoner_count = EXCLUDED.prisoner_count
+        """)
+        reset_sequences(conn)
+        for table in TABLES:
+            conn.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the database with generated data, loaded with COPY")
+    add_count_arguments(parser)
+    parser.add_argument("--data", type=Path, help="Directory of COPY files; reused if complete, else generated")
+    parser.add_argument("--sql-dir", type=Path, default=Path(__file__).resolve().parent.parent / "database")
+    parser.add_argument("--jobs", type=int, default=4, help="Tables loaded and indexes built at the same time")
+    parser.add_argument("--maintenance-work-mem", default="512MB", help="Memory per index build")
+    args = parser.parse_args()
+
+    phases = Phases()
+    temporary = None
+    data = args.data
+    if data is None:
+        temporary = tempfile.TemporaryDirectory(prefix="prison-data-")
+        data = Path(temporary.name)
+
+    with connect() as conn:
+        with phases.phase("schema"):
+            create_schema(conn, args.sql_dir)
+
+        if all((data / f"{table}.tsv").exists() for table in TABLES):
+            print(f"Reusing the COPY files in {data}")
+        else:
+            with phases.phase("generate"):
+                write_files(create_generator(conn, args), data)
+
+        with phases.phase("prepare"):
+            create_partitions(conn)
+            definitions = saved_definitions(conn)
+            drop_definitions(conn, definitions)
+
+        with phases.phase("load"):
+            counts = run_parallel(args.jobs, lambda table: load_file(table, data / f"{table}.tsv"), TABLES)
+            for table, rows in zip(TABLES, counts):
+                print(f"  {table:<18} {rows:>12,} rows")
+            # Files generated on an earlier day can hold months no partition covered yet
+            for parent, partition, action in conn.execute("SELECT * FROM manage_partitions()"):
+                print(f"  {partition} of {parent} {action}")
+
+        with phases.phase("keys"):
+            restore_keys(args, definitions)
+        with phases.phase("indexes"):
+            restore_indexes(args, definitions)
+        with phases.phase("foreign keys"):
+            restore_foreign_keys(args, conn, definitions)
+
+        with phases.phase("validate"):
+            failures = validate(conn)
+
+        with phases.phase("analyze"):
+            conn.execute("VACUUM ANALYZE")
+            conn.execute("SELECT refresh_report_view('mv_prisoner_details')")
+            conn.execute("SELECT refresh_report_view('mv_block_summary')")
+
+    if temporary:
+        temporary.cleanup()
+    phases.summary()
+    if failures:
+        print(f"\nThe loaded data breaks {len(failures)} trigger rule(s): {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
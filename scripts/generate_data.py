@@ -0,0 +1,587 @@
+"""
+Prison Management System - synthetic data generator
+
+Fills an empty database (the reference tables from 04_seed_data.sql are
+kept) with referentially valid data at any scale: every foreign key points
+at a generated row, every CHECK constraint holds, no cell holds more
+incarcerated prisoners than its capacity, blacklisted visitors have no
+visits, no prisoner or visiting room booth has overlapping visits and no
+program has more active enrollments than participants.
+Output is deterministic for a given ``--seed`` and set of counts.
+
+Rows are streamed to the database with COPY in table order, with explicit
+ids, so memory stays flat apart from a few bytes per prisoner and visit.
+Triggers stay enabled (occupancy counters, visit bookings and notifications
+are maintained as for any write) and each COPY statement commits, so rerun
+with ``--truncate`` after an interrupted run.
+
+Usage:
+    uv run python scripts/generate_data.py --prisoners 1000000 --visits 10000000 --truncate
+"""
+
+import argparse
+from array import array
+from datetime import date
+from functools import lru_cache
+from itertools import islice
+import math
+import os
+from pathlib import Path
+import random
+import sys
+import time
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+
+# Load order; every table only references tables before it
+TABLES = (
+    "cell_blocks", "cells", "staff", "prisoners", "sentences",
+    "visitors", "visiting_rooms", "visits", "programs", "prisoner_programs", "incidents",
+)
+
+COLUMNS = {
+    "cell_blocks": ("id", "name", "security_level", "capacity", "floor_count", "description"),
+    "cells": ("id", "cell_code", "cell_block_id", "floor_number", "capacity", "cell_type", "has_window"),
+    "staff": (
+        "id", "employee_id", "first_name", "last_name", "role_id", "date_of_birth", "gender", "hire_date",
+        "termination_date", "email", "phone", "assigned_block_id", "salary", "is_active",
+    ),
+    "prisoners": (
+        "id", "prisoner_number", "first_name", "last_name", "date_of_birth", "gender", "nationality", "cell_id",
+        "admission_date", "status", "blood_type", "emergency_contact_name", "emergency_contact_phone",
+    ),
+    "sentences": (
+        "id", "prisoner_id", "crime_type_id", "sentence_start_date", "sentence_years", "sentence_months",
+        "is_life_sentence", "parole_eligible", "parole_date", "court_name", "case_number", "judge_name",
+    ),
+    "visitors": (
+        "id", "first_name", "last_name", "date_of_birth", "id_document_type", "id_document_number",
+        "relationship_type", "phone", "email", "is_blacklisted", "blacklist_reason",
+    ),
+    "visiting_rooms": ("id", "name", "cell_block_id", "booths", "opens_at", "closes_at", "slot_minutes"),
+    "visits": (
+        "id", "prisoner_id", "visitor_id", "visiting_room_id", "booth", "visit_date", "scheduled_start_time",
+        "scheduled_end_time", "actual_start_time", "actual_end_time", "status", "visit_type", "approved_by_staff_id",
+    ),
+    "programs": (
+        "id", "name", "program_type_id", "description", "duration_weeks", "max_participants",
+        "instructor_staff_id", "is_active",
+    ),
+    "prisoner_programs": ("id", "prisoner_id", "program_id", "enrollment_date", "completion_date", "status", "grade"),
+    "incidents": (
+        "id", "prisoner_id", "reported_by_staff_id", "incident_date", "incident_type", "severity", "location",
+        "description", "action_taken", "solitary_days", "is_resolved", "resolved_date",
+    ),
+}
+
+MALE_FIRST_NAMES = (
+    "Adam", "Bartosz", "Cezary", "Damian", "Emil", "Filip", "Grzegorz", "Henryk", "Igor", "Jakub",
+    "Kamil", "Lukasz", "Marek", "Norbert", "Oskar", "Pawel", "Rafal", "Szymon", "Tomasz", "Wojciech",
+)
+FEMALE_FIRST_NAMES = (
+    "Agnieszka", "Barbara", "Celina", "Dorota", "Ewa", "Franciszka", "Grazyna", "Halina", "Irena", "Joanna",
+    "Katarzyna", "Monika", "Natalia", "Olga", "Patrycja", "Renata", "Sylwia", "Teresa", "Urszula", "Zofia",
+)
+LAST_NAMES = (
+    "Nowak", "Kowalczyk", "Wisniewski", "Wojcik", "Kaminski", "Lewandowski", "Zielinski", "Szymanski",
+    "Wozniak", "Dabrowski", "Kozlowski", "Jankowski", "Mazur", "Krawczyk", "Piotrowski", "Grabowski",
+    "Nowakowski", "Pawlowski", "Michalski", "Adamczyk", "Dudek", "Zajac", "Wieczorek", "Jablonski",
+)
+NATIONALITIES = ("Polish",) * 17 + ("Ukrainian", "German", "Lithuanian")
+BLOOD_TYPES = ("A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-", None)
+COURTS = (
+    "Sad Okregowy w Warszawie", "Sad Okregowy w Krakowie", "Sad Okregowy w Gdansku",
+    "Sad Okregowy we Wroclawiu", "Sad Okregowy w Poznaniu", "Sad Rejonowy w Lodzi",
+)
+SECURITY_LEVELS = ("minimum", "medium", "maximum", "supermax")
+INCIDENT_LOCATIONS = ("Cell", "Corridor", "Yard", "Canteen", "Workshop", "Visiting room", "Shower block")
+
+PRISONER_STATUSES = ("incarcerated", "released", "transferred", "deceased", "escaped")
+CELL_CAPACITIES = (1, 2, 3, 4)
+CELL_CAPACITY_WEIGHTS = (0.2, 0.5, 0.2, 0.1)
+CELL_TYPES = ("standard", "solitary", "medical", "protective")
+CELL_TYPE_WEIGHTS = (0.85, 0.05, 0.05, 0.05)
+FLOORS_PER_BLOCK = 4
+VISIT_TYPES = ("regular", "family", "legal", "conjugal")
+VISIT_TYPE_WEIGHTS = (0.6, 0.25, 0.1, 0.05)
+RELATIONSHIPS = ("spouse", "parent", "child", "sibling", "friend", "lawyer", "other")
+DOCUMENT_TYPES = (("national_id", "ID"), ("passport", "PA"), ("drivers_license", "DL"))
+INCIDENT_TYPES = ("fight", "contraband", "escape_attempt", "assault_staff", "property_damage", "disobedience", "other")
+SEVERITIES = ("minor", "moderate", "major", "critical")
+SEVERITY_WEIGHTS = (0.5, 0.3, 0.15, 0.05)
+GRADES = ("A", "B", "C", "D", "F")
+
+# Admissions go back this many years; visits are booked up to this many days ahead
+HISTORY_YEARS = 15
+VISIT_DAYS_AHEAD = 30
+
+# Visiting rooms are open 08:00 - 17:00, booked in half-hour slots
+VISITING_HOURS = (8, 17)
+VISIT_SLOT_MINUTES = 30
+
+# Tables range partitioned by month (see partition_policies)
+PARTITIONED_TABLES = ("visits", "incidents")
+
+# Archived copies of the prisoner tables; emptied with them, so archived ids never collide with generated ones
+ARCHIVE_TABLES = (
+    "archived_prisoners", "archived_sentences", "archived_visits", "archived_prisoner_programs", "archived_incidents",
+)
+
+NULL = "\\N"
+COPY_STATEMENT_ROWS = 5000
+
+
+@lru_cache(maxsize=None)
+def iso_day(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def copy_value(value) -> str:
+    """One field in COPY text format; generated strings never contain tabs, newlines or backslashes."""
+    if value is None:
+        return NULL
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    return str(value)
+
+
+class DataGenerator:
+    """
+    Row generators for every table, one method per table yielding tuples in ``COLUMNS`` order.
+
+    Tables must be generated in ``TABLES`` order: later tables draw on what
+    earlier ones recorded (cell slots, admission dates, statuses, visitors
+    allowed to visit).
+    """
+
+    def __init__(self, counts: dict, crime_type_ids, role_ids, program_type_ids, seed: int = 1, today=None):
+        self.counts = counts
+        self.crime_type_ids = list(crime_type_ids)
+        self.role_ids = list(role_ids)
+        self.program_type_ids = list(program_type_ids)
+        self.seed = seed
+        self.today = (today or date.today()).toordinal()
+
+        rng = random.Random(f"{seed}:cells")
+        self.cell_capacities = array("B", rng.choices(CELL_CAPACITIES, CELL_CAPACITY_WEIGHTS, k=counts["cells"]))
+        self.admissions = array("I")  # prisoner id - 1 -> admission date ordinal
+        self.incarcerated = bytearray()  # prisoner id - 1 -> 1 if incarcerated
+        self.allowed_visitors = array("I")  # ids of visitors who are not blacklisted
+
+    def rng(self, table: str) -> random.Random:
+        # One stream per table, so changing one count does not reshuffle the other tables
+        return random.Random(f"{self.seed}:{table}")
+
+    def block_of(self, cell_index: int) -> int:
+        return cell_index * self.counts["cell_blocks"] // self.counts["cells"] + 1
+
+    def person(self, rng: random.Random, min_age: int = 19, max_age: int = 75):
+        gender = "male" if rng.random() < 0.85 else "female"
+        first_name = rng.choice(MALE_FIRST_NAMES if gender == "male" else FEMALE_FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        if gender == "female" and last_name.endswith("ski"):
+            last_name = last_name[:-1] + "a"
+        date_of_birth = self.today - rng.randint(min_age * 366, max_age * 365)
+        return gender, first_name, last_name, date_of_birth
+
+    def phone(self, rng: random.Random) -> str:
+        return f"+48{rng.randint(500000000, 899999999)}"
+
+    def cell_blocks(self):
+        rng = self.rng("cell_blocks")
+        capacities = [0] * self.counts["cell_blocks"]
+        for index, capacity in enumerate(self.cell_capacities):
+            capacities[self.block_of(index) - 1] += capacity
+        for block_id, capacity in enumerate(capacities, start=1):
+            yield (
+                block_id, f"Block {block_id:03d}", rng.choice(SECURITY_LEVELS), max(capacity, 1), FLOORS_PER_BLOCK,
+                f"Generated block {block_id}",
+            )
+
+    def cells(self):
+        rng = self.rng("cells")
+        first_cell = {}
+        for index, capacity in enumerate(self.cell_capacities):
+            block_id = self.block_of(index)
+            number = index - first_cell.setdefault(block_id, index)
+            cell_type = rng.choices(CELL_TYPES, CELL_TYPE_WEIGHTS)[0]
+            floor = number % FLOORS_PER_BLOCK + 1
+            yield (
+                index + 1, f"B{block_id:03d}-{floor}{number:05d}", block_id, floor, capacity, cell_type,
+                rng.random() < 0.9,
+            )
+
+    def staff(self):
+        rng = self.rng("staff")
+        for staff_id in range(1, self.counts["staff"] + 1):
+            gender, first_name, last_name, date_of_birth = self.person(rng, 21, 64)
+            hire_date = rng.randint(date_of_birth + 21 * 366, self.today)
+            active = rng.random() < 0.9
+            termination = None if active else iso_day(rng.randint(hire_date, self.today))
+            block_id = rng.randint(1, self.counts["cell_blocks"]) if rng.random() < 0.8 else None
+            yield (
+                staff_id, f"G{staff_id:07d}", first_name, last_name, rng.choice(self.role_ids), iso_day(date_of_birth),
+                gender, iso_day(hire_date), termination, f"staff{staff_id}@prison.example", self.phone(rng),
+                block_id, f"{rng.randint(3500, 12000)}.00", active,
+            )
+
+    def prisoners(self):
+        rng = self.rng("prisoners")
+        # Every bed once, shuffled; incarcerated prisoners take them in order until none are left
+        slots = [cell_id for cell_id, capacity in enumerate(self.cell_capacities, start=1) for _ in range(capacity)]
+        rng.shuffle(slots)
+        next_slot = 0
+        share = self.counts["incarcerated_share"]
+        other_weights = (0.7, 0.2, 0.03, 0.07)  # released, transferred, deceased, escaped
+        for prisoner_id in range(1, self.counts["prisoners"] + 1):
+            gender, first_name, last_name, date_of_birth = self.person(rng)
+            adult_since = date_of_birth + 18 * 366
+            admission = self.today - rng.randint(0, min(HISTORY_YEARS * 365, self.today - adult_since))
+            if rng.random() < share:
+                status = "incarcerated"
+            else:
+                status = rng.choices(PRISONER_STATUSES[1:], other_weights)[0]
+            cell_id = None
+            if status == "incarcerated" and next_slot < len(slots):
+                cell_id = slots[next_slot]
+                next_slot += 1
+            self.admissions.append(admission)
+            self.incarcerated.append(status == "incarcerated")
+            yield (
+                prisoner_id, f"P{prisoner_id:08d}", first_name, last_name, iso_day(date_of_birth), gender,
+                rng.choice(NATIONALITIES), cell_id, iso_day(admission), status, rng.choice(BLOOD_TYPES),
+                f"{rng.choice(FEMALE_FIRST_NAMES)} {last_name}", self.phone(rng),
+            )
+
+    def sentences(self):
+        rng = self.rng("sentences")
+        prisoners = self.counts["prisoners"]
+        for sentence_id in range(1, self.counts["sentences"] + 1):
+            # The first pass gives every prisoner one sentence, the rest go to random prisoners
+            prisoner_id = sentence_id if sentence_id <= prisoners else rng.randint(1, prisoners)
+            start = max(self.admissions[prisoner_id - 1] - rng.randint(0, 90), 1)
+            life = rng.random() < 0.01
+            years = 25 if life else rng.choices((0, 1, 2, 3, 5, 8, 10, 15), (3, 5, 5, 4, 3, 2, 1, 1))[0]
+            months = 0 if life else rng.randint(0 if years else 1, 11)
+            parole_eligible = not life and rng.random() < 0.7
+            parole = iso_day(start + (years * 12 + months) * 15) if parole_eligible and rng.random() < 0.5 else None
+            yield (
+                sentence_id, prisoner_id, rng.choice(self.crime_type_ids), iso_day(start), years, months, life,
+                parole_eligible, parole, rng.choice(COURTS), f"K {sentence_id}/{date.fromordinal(start).year}",
+                f"{rng.choice(MALE_FIRST_NAMES + FEMALE_FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            )
+
+    def visitors(self):
+        rng = self.rng("visitors")
+        for visitor_id in range(1, self.counts["visitors"] + 1):
+            gender, first_name, last_name, date_of_birth = self.person(rng, 19, 85)
+            document_type, prefix = rng.choice(DOCUMENT_TYPES)
+            blacklisted = rng.random() < 0.02
+            if not blacklisted:
+                self.allowed_visitors.append(visitor_id)
+            yield (
+                visitor_id, first_name, last_name, iso_day(date_of_birth), document_type, f"{prefix}{visitor_id:09d}",
+                rng.choice(RELATIONSHIPS), self.phone(rng), f"visitor{visitor_id}@mail.example", blacklisted,
+                "Contraband smuggling attempt" if blacklisted else None,
+            )
+
+    def visiting_rooms(self):
+        # One room per block. Visit dates are drawn between admission and the last bookable day, so the
+        # days ahead are the busiest: each prisoner adds visits / prisoners / (days in that range) to them
+        rooms = self.counts["visiting_rooms"]
+        last_day = self.today + VISIT_DAYS_AHEAD
+        busiest_day = self.counts["visits"] / self.counts["prisoners"] * sum(
+            1 / (last_day - admission + 1) for admission in self.admissions
+        )
+        self.room_booths = max(2, math.ceil(busiest_day / rooms / 4))
+        opens, closes = VISITING_HOURS
+        for room_id in range(1, rooms + 1):
+            yield (
+                room_id, f"Visiting Room {room_id}", room_id, self.room_booths, f"{opens:02d}:00:00",
+                f"{closes:02d}:00:00", VISIT_SLOT_MINUTES,
+            )
+
+    def visits(self):
+        rng = self.rng("visits")
+        if not self.allowed_visitors:
+            return
+        prisoners = self.counts["prisoners"]
+        staff = self.counts["staff"]
+        rooms = self.counts["visiting_rooms"]
+        opens, closes = VISITING_HOURS
+        # Half-hour slots taken, as bitmasks: per booth of each room and day, and per prisoner and day
+        # in a fixed-size hash table, where a collision can only cancel a visit that would have fit
+        booths_taken = {}
+        prisoner_slots = array("I", bytes(4 * (2 * self.counts["visits"] + 1)))
+        for visit_id in range(1, self.counts["visits"] + 1):
+            prisoner_id = rng.randint(1, prisoners)
+            visit_date = rng.randint(self.admissions[prisoner_id - 1], self.today + VISIT_DAYS_AHEAD)
+            start = rng.randint(opens * 2, closes * 2 - 3) * 30  # minutes since midnight, 08:00 - 15:30
+            end = min(start + rng.choice((30, 60, 90)), closes * 60)
+            if visit_date > self.today:
+                status = "scheduled"
+            else:
+                status = rng.choices(("completed", "cancelled", "no_show"), (0.8, 0.12, 0.08))[0]
+            room_id = rng.randint(1, rooms)
+            booth = None
+            if status in ("scheduled", "completed"):
+                slots = ((1 << ((end - start) // 30)) - 1) << (start // 30 - opens * 2)
+                key = hash((prisoner_id, visit_date)) % len(prisoner_slots)
+                taken = booths_taken.setdefault((room_id, visit_date), [0] * self.room_booths)
+                free = [i for i, mask in enumerate(taken) if not mask & slots]
+                if prisoner_slots[key] & slots or not free:
+                    status = "cancelled"
+                else:
+                    prisoner_slots[key] |= slots
+                    taken[free[0]] |= slots
+                    booth = free[0] + 1
+            actual_start = actual_end = None
+            if status == "completed":
+                actual_start = f"{start // 60:02d}:{start % 60 + rng.randint(0, 10):02d}:00"
+                actual_end = f"{end // 60:02d}:{end % 60:02d}:00"
+            yield (
+                visit_id, prisoner_id, rng.choice(self.allowed_visitors), room_id, booth, iso_day(visit_date),
+                f"{start // 60:02d}:{start % 60:02d}:00", f"{end // 60:02d}:{end % 60:02d}:00",
+                actual_start, actual_end, status, rng.choices(VISIT_TYPES, VISIT_TYPE_WEIGHTS)[0],
+                rng.randint(1, staff),
+            )
+
+    def programs(self):
+        rng = self.rng("programs")
+        self.program_sizes = []
+        for program_id in range(1, self.counts["programs"] + 1):
+            duration = rng.choice((4, 8, 12, 16, 24, 52))
+            max_participants = rng.randint(10, 40)
+            self.program_sizes.append((duration, max_participants))
+            yield (
+                program_id, f"Program {program_id:05d}", rng.choice(self.program_type_ids),
+                f"Generated program {program_id}", duration, max_participants, rng.randint(1, self.counts["staff"]),
+                rng.random() < 0.9,
+            )
+
+    def prisoner_programs(self):
+        rng = self.rng("prisoner_programs")
+        prisoners = self.counts["prisoners"]
+        programs = self.counts["programs"]
+        enrolled = [0] * programs
+        for enrollment_id in range(1, self.counts["enrollments"] + 1):
+            # Pass n enrolls every prisoner in the n-th program after its own offset, so
+            # (prisoner, program) pairs never repeat while there are fewer passes than programs
+            index = enrollment_id - 1
+            prisoner_id = index % prisoners + 1
+            program_index = (prisoner_id * 7919 + index // prisoners) % programs
+            duration, max_participants = self.program_sizes[program_index]
+            enrollment = rng.randint(self.admissions[prisoner_id - 1], self.today)
+            if self.incarcerated[prisoner_id - 1] and enrolled[program_index] < max_participants and rng.random() < 0.5:
+                enrolled[program_index] += 1
+                status, completion, grade = "enrolled", None, None
+            else:
+                status = rng.choices(("completed", "dropped", "expelled"), (0.6, 0.3, 0.1))[0]
+                completion = iso_day(min(enrollment + rng.randint(7, duration * 7), self.today))
+                grade = rng.choice(GRADES) if status == "completed" else None
+            yield (enrollment_id, prisoner_id, program_index + 1, iso_day(enrollment), completion, status, grade)
+
+    def incidents(self):
+        rng = self.rng("incidents")
+        prisoners = self.counts["prisoners"]
+        staff = self.counts["staff"]
+        for incident_id in range(1, self.counts["incidents"] + 1):
+            prisoner_id = rng.randint(1, prisoners)
+            day = rng.randint(self.admissions[prisoner_id - 1], self.today)
+            severity = rng.choices(SEVERITIES, SEVERITY_WEIGHTS)[0]
+            incident_type = rng.choice(INCIDENT_TYPES)
+            solitary_days = rng.randint(1, 30) if severity in ("major", "critical") and rng.random() < 0.6 else 0
+            resolved = day < self.today - 30 or rng.random() < 0.5
+            yield (
+                incident_id, prisoner_id, rng.randint(1, staff),
+                f"{iso_day(day)} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00", incident_type, severity,
+                rng.choice(INCIDENT_LOCATIONS), f"Generated {incident_type.replace('_', ' ')} incident",
+                f"Solitary confinement, {solitary_days} days" if solitary_days else "Written warning",
+                solitary_days, resolved, iso_day(rng.randint(day, self.today)) if resolved else None,
+            )
+
+
+def default_counts(args) -> dict:
+    """Counts for every table, derived from ``--prisoners`` where not given explicitly."""
+    prisoners = args.prisoners
+    share = args.incarcerated_share
+    average_capacity = sum(c * w for c, w in zip(CELL_CAPACITIES, CELL_CAPACITY_WEIGHTS))
+    cells = args.cells or max(1, math.ceil(prisoners * share * args.headroom / average_capacity))
+    enrollments = prisoners if args.enrollments is None else args.enrollments
+    programs = args.programs or max(10, math.ceil(enrollments / 200))
+    if enrollments > prisoners * programs:
+        raise SystemExit("--enrollments cannot exceed prisoners x programs (enrollments must be unique)")
+    return {
+        "cell_blocks": min(args.blocks, cells),
+        "cells": cells,
+        "staff": args.staff or max(20, prisoners // 20),
+        "prisoners": prisoners,
+        "incarcerated_share": share,
+        "sentences": max(prisoners, args.sentences if args.sentences is not None else prisoners * 3 // 2),
+        "visitors": args.visitors or max(10, prisoners // 2),
+        "visiting_rooms": min(args.blocks, cells),
+        "visits": prisoners * 10 if args.visits is None else args.visits,
+        "programs": programs,
+        "enrollments": enrollments,
+        "incidents": prisoners if args.incidents is None else args.incidents,
+    }
+
+
+def add_count_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--prisoners", type=int, default=10000)
+    parser.add_argument("--blocks", type=int, default=8, help="Cell blocks (cells are spread evenly)")
+    parser.add_argument("--cells", type=int, help="Default: enough beds for the incarcerated, plus --headroom")
+    parser.add_argument("--headroom", type=float, default=1.15, help="Beds per incarcerated prisoner")
+    parser.add_argument("--incarcerated-share", type=float, default=0.7, help="Share of prisoners incarcerated")
+    parser.add_argument("--staff", type=int, help="Default: prisoners / 20")
+    parser.add_argument("--sentences", type=int, help="Default: 1.5 per prisoner (at least one each)")
+    parser.add_argument("--visitors", type=int, help="Default: prisoners / 2")
+    parser.add_argument("--visits", type=int, help="Default: 10 per prisoner")
+    parser.add_argument("--programs", type=int, help="Default: enrollments / 200")
+    parser.add_argument("--enrollments", type=int, help="Default: 1 per prisoner")
+    parser.add_argument("--incidents", type=int, help="Default: 1 per prisoner")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def create_generator(conn, args) -> DataGenerator:
+    """A generator for the counts in ``args``, drawing on the reference rows already in the database."""
+    if args.prisoners < 1:
+        raise SystemExit("--prisoners must be at least 1")
+    return DataGenerator(
+        default_counts(args),
+        reference_ids(conn, "crime_types"),
+        reference_ids(conn, "staff_roles"),
+        reference_ids(conn, "program_types"),
+        seed=args.seed,
+    )
+
+
+def connection_info() -> str:
+    """Connection string from the same environment variables the backend reads."""
+    return make_conninfo(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=os.getenv("DB_PORT", "5432"),
+        dbname=os.getenv("DB_NAME", "prison_management"),
+        user=os.getenv("DB_USER", "prison_admin"),
+        password=os.getenv("DB_PASSWORD"),
+    )
+
+
+def reference_ids(conn, table: str) -> list:
+    ids = [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+    if not ids:
+        raise SystemExit(f"{table} is empty; run the reset script first")
+    return ids
+
+
+def copy_table(conn, table: str, rows) -> int:
+    """COPY ``rows`` into ``table``, committing every ``COPY_STATEMENT_ROWS`` rows; returns the number of rows."""
+    statement = f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN"
+    rows = iter(rows)
+    written = 0
+    with conn.cursor() as cursor:
+        while True:
+            # Short statements keep the transition tables of the statement-level triggers small, and
+            # committing each lets the occupancy counters the row triggers update be pruned as it goes
+            chunk = list(islice(rows, COPY_STATEMENT_ROWS))
+            if not chunk:
+                return written
+            with cursor.copy(statement) as copy:
+                copy.write("".join(copy_lines(chunk)))
+            conn.commit()
+            written += len(chunk)
+
+
+def copy_lines(rows):
+    """``rows`` as lines of COPY text format."""
+    for row in rows:
+        yield "\t".join(map(copy_value, row)) + "\n"
+
+
+def write_files(generator: DataGenerator, directory: Path) -> dict:
+    """Write every table to ``<directory>/<table>.tsv`` in COPY text format; returns the row counts."""
+    directory.mkdir(parents=True, exist_ok=True)
+    written = {}
+    for table in TABLES:
+        with open(directory / f"{table}.tsv", "w", encoding="utf-8", buffering=1 << 20) as f:
+            written[table] = 0
+            for line in copy_lines(getattr(generator, table)()):
+                f.write(line)
+                written[table] += 1
+    return written
+
+
+def create_partitions(conn, today: date = None):
+    """Monthly partitions for every date the generator produces, so no row lands in a default partition."""
+    today = (today or date.today()).toordinal()
+    first = date.fromordinal(today - HISTORY_YEARS * 365)
+    last = date.fromordinal(today + VISIT_DAYS_AHEAD)
+    for table in PARTITIONED_TABLES:
+        conn.execute("SELECT create_month_partitions(%s, %s, %s)", (table, first, last))
+
+
+def generated_tables_empty(conn) -> bool:
+    return not conn.execute(
+        "SELECT " + " OR ".join(f"EXISTS (SELECT 1 FROM {table})" for table in TABLES + ARCHIVE_TABLES)
+    ).fetchone()[0]
+
+
+def truncate(conn):
+    conn.execute(f"TRUNCATE {', '.join(TABLES + ARCHIVE_TABLES)} RESTART IDENTITY CASCADE")
+    # TRUNCATE skips the row-level counter triggers
+    conn.execute("UPDATE prisoner_status_counts SET prisoner_count = 0")
+
+
+def reset_sequences(conn):
+    for table in TABLES:
+        conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, "
+            "false)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with generated, referentially valid data")
+    add_count_arguments(parser)
+    parser.add_argument("--truncate", action="store_true", help="Delete existing (non-reference) data first")
+    parser.add_argument("--output", type=Path, help="Write COPY files to this directory instead of loading them")
+    args = parser.parse_args()
+
+    with psycopg.connect(connection_info()) as conn:
+        generator = create_generator(conn, args)
+        if args.output:
+            started = time.perf_counter()
+            for table, rows in write_files(generator, args.output).items():
+                print(f"{table:<18} {rows:>12,} rows")
+            print(f"Wrote {args.output} in {time.perf_counter() - started:.1f}s")
+            return
+
+        if args.truncate:
+            truncate(conn)
+        elif not generated_tables_empty(conn):
+            raise SystemExit("The database already holds data; pass --truncate to replace it")
+
+        started = time.perf_counter()
+        create_partitions(conn)
+        conn.commit()
+        for table in TABLES:
+            table_started = time.perf_counter()
+            rows = copy_table(conn, table, getattr(generator, table)())
+            elapsed = time.perf_counter() - table_started
+            print(f"{table:<18} {rows:>12,} rows {elapsed:>9.1f}s {rows / elapsed if elapsed else 0:>12,.0f} rows/s")
+        reset_sequences(conn)
+        conn.commit()
+
+        # Autocommit: the report views refresh concurrently and VACUUM cannot run in a transaction
+        conn.autocommit = True
+        conn.execute("SELECT refresh_report_view('mv_prisoner_details')")
+        conn.execute("SELECT refresh_report_view('mv_block_summary')")
+        conn.execute("VACUUM ANALYZE")
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,597 @@
+"""
+Prison Management System - load test
+
+Drives every route of the backend at one or more concurrency levels and
+records, per route and overall, p50/p95/p99 latency, throughput and errors.
+Results are written as a JSON baseline; ``--compare`` diffs a run against an
+earlier baseline and exits with status 1 when a route's p95 latency or
+throughput got worse than ``--tolerance`` allows, so two versions can be
+compared on the same dataset (see scripts/generate_data.py).
+
+Each scenario below is one client action covering one or more routes; the
+write scenarios (``--writes``) create rows, update them and delete them again.
+Routes of the API that no scenario covers are reported before the run.
+
+Usage:
+    uv run python scripts/load_test.py --concurrency 1 10 50 --duration 30 --json baseline.json
+    uv run python scripts/load_test.py --concurrency 1 10 50 --duration 30 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timezone
+import itertools
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, NamedTuple
+
+import httpx
+
+from benchmark_db_modes import percentile, start_backend, wait_until_healthy
+
+# Routes deliberately left out, with the reason
+SKIPPED_ROUTES = {
+    "GET /api/events": "long-lived event stream; it has no response latency to measure",
+    "DELETE /api/admin/queries": "clears the query log operators may be reading",
+    "POST /api/cell-blocks": "there is no matching DELETE, every call would leave a row behind",
+    "POST /api/programs": "there is no matching DELETE, every call would leave a row behind",
+    "POST /api/visiting-rooms": "there is no matching DELETE, every call would leave a row behind",
+}
+
+
+class Scenario(NamedTuple):
+    name: str
+    routes: tuple  # "METHOD /path/{template}" of every route it requests
+    writes: bool
+    run: Callable
+
+
+SCENARIOS = []
+
+
+def scenario(*routes: str, writes: bool = False):
+    def register(func):
+        SCENARIOS.append(Scenario(func.__name__, routes, writes, func))
+        return func
+
+    return register
+
+
+class Samples(NamedTuple):
+    """Ids of existing rows to request, collected through the API before the run."""
+
+    prisoner_ids: list
+    last_names: list
+    cell_ids: list
+    block_ids: list
+    staff_ids: list
+    visitor_ids: list  # not blacklisted
+    visit_ids: list
+    incident_ids: list
+    program_ids: list
+    crime_type_ids: list
+    role_ids: list
+
+
+def rows(payload) -> list:
+    """The rows of a list response, paginated (``{"data": [...]}``) or not."""
+    return payload["data"] if isinstance(payload, dict) else payload
+
+
+async def collect_samples(client: httpx.AsyncClient) -> Samples:
+    async def get(url):
+        response = await client.get(url)
+        response.raise_for_status()
+        return rows(response.json())
+
+    prisoners = await get("/api/prisoners?limit=500&count=none")
+    if not prisoners:
+        raise SystemExit("The database has no prisoners; generate data first (scripts/generate_data.py)")
+    # Searching keeps the visitor list short on large datasets
+    visitors = await get(f"/api/visitors?blacklisted=false&search={prisoners[0]['last_name'][:4]}")
+    if len(visitors) < 10:
+        visitors = await get("/api/visitors?blacklisted=false")
+    return Samples(
+        prisoner_ids=[row["id"] for row in prisoners],
+        last_names=sorted({row["last_name"] for row in prisoners}),
+        cell_ids=[row["id"] for row in await get("/api/cells")][:500],
+        block_ids=[row["id"] for row in await get("/api/cell-blocks")],
+        staff_ids=[row["id"] for row in await get("/api/staff")][:500],
+        visitor_ids=[row["id"] for row in visitors][:500],
+        visit_ids=[row["id"] for row in await get("/api/visits?limit=500")],
+        incident_ids=[row["id"] for row in await get("/api/incidents?limit=500")],
+        program_ids=[row["id"] for row in await get("/api/programs")],
+        crime_type_ids=[row["id"] for row in await get("/api/crime-types")],
+        role_ids=[row["id"] for row in await get("/api/staff-roles")],
+    )
+
+
+# ============================================
+# RECORDING
+# ============================================
+
+
+class RouteStats:
+    __slots__ = ("latencies", "errors")
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+class Run:
+    """What a scenario gets: the client, the samples, a random source and per-route recording."""
+
+    def __init__(self, client: httpx.AsyncClient, samples: Samples, rng: random.Random, stats: dict, tag: str):
+        self.client = client
+        self.samples = samples
+        self.rng = rng
+        self.stats = stats
+        self.tag = tag  # unique per run and worker; generated codes must fit VARCHAR(20) with an "LT" prefix
+        self._counter = itertools.count()
+
+    def unique(self) -> str:
+        return f"{self.tag}{next(self._counter):x}"
+
+    def pick(self, values: list):
+        return self.rng.choice(values)
+
+    async def request(self, route: str, url: str, params=None, json=None, content=None, headers=None):
+        """Send one request for ``route`` ("METHOD /template"); returns the decoded body, or None on failure."""
+        method = route.split(" ", 1)[0]
+        stats = self.stats[route]
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, url, params=params, json=json, content=content, headers=headers
+            )
+            await response.aread()
+        except httpx.HTTPError:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.errors += 1
+            return None
+        stats.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            stats.errors += 1
+            return None
+        if response.headers.get("content-type", "").startswith("application/json"):
+            return response.json()
+        return response.text
+
+
+# ============================================
+# READ SCENARIOS
+# ============================================
+
+
+@scenario("GET /api/prisoners")
+async def browse_prisoners(run: Run):
+    params = {"limit": 100, "status": "incarcerated"}
+    page = await run.request("GET /api/prisoners", "/api/prisoners", params)
+    if page and page.get("next_cursor"):
+        await run.request("GET /api/prisoners", "/api/prisoners", {**params, "cursor": page["next_cursor"]})
+
+
+@scenario("GET /api/prisoners", "GET /api/prisoners/autocomplete")
+async def search_prisoners(run: Run):
+    name = run.pick(run.samples.last_names)
+    await run.request("GET /api/prisoners/autocomplete", "/api/prisoners/autocomplete", {"q": name[:4]})
+    await run.request("GET /api/prisoners", "/api/prisoners", {"search": name, "limit": 50, "count": "estimated"})
+
+
+@scenario("GET /api/prisoners/{prisoner_id}", "GET /api/prisoners/{prisoner_id}/history", "GET /api/sentences")
+async def open_prisoner(run: Run):
+    prisoner_id = run.pick(run.samples.prisoner_ids)
+    await run.request("GET /api/prisoners/{prisoner_id}", f"/api/prisoners/{prisoner_id}")
+    await run.request("GET /api/prisoners/{prisoner_id}/history", f"/api/prisoners/{prisoner_id}/history")
+    await run.request("GET /api/sentences", f"/api/sentences?prisoner_id={prisoner_id}")
+
+
+@scenario("POST /api/prisoners/history")
+async def prisoner_histories(run: Run):
+    prisoner_ids = run.rng.sample(run.samples.prisoner_ids, min(50, len(run.samples.prisoner_ids)))
+    await run.request("POST /api/prisoners/history", "/api/prisoners/history", json={"prisoner_ids": prisoner_ids})
+
+
+@scenario("GET /api/cells", "GET /api/cells/{cell_id}", "GET /api/cell-blocks")
+async def browse_cells(run: Run):
+    await run.request("GET /api/cell-blocks", "/api/cell-blocks")
+    await run.request("GET /api/cells", f"/api/cells?block_id={run.pick(run.samples.block_ids)}&available_only=true")
+    await run.request("GET /api/cells/{cell_id}", f"/api/cells/{run.pick(run.samples.cell_ids)}")
+
+
+@scenario("GET /api/staff", "GET /api/staff/{staff_id}")
+async def browse_staff(run: Run):
+    await run.request("GET /api/staff", f"/api/staff?role_id={run.pick(run.samples.role_ids)}")
+    await run.request("GET /api/staff/{staff_id}", f"/api/staff/{run.pick(run.samples.staff_ids)}")
+
+
+@scenario("GET /api/visits", "GET /api/visitors")
+async def browse_visits(run: Run):
+    await run.request("GET /api/visits", "/api/visits?status=scheduled&limit=100")
+    await run.request("GET /api/visits", f"/api/visits?prisoner_id={run.pick(run.samples.prisoner_ids)}")
+    await run.request("GET /api/visitors", "/api/visitors", {"search": run.pick(run.samples.last_names)})
+
+
+@scenario("GET /api/visits/availability", "GET /api/visiting-rooms")
+async def book_visit_slots(run: Run):
+    # What a scheduling screen asks while a visit is being booked: the rooms, then free slots for the prisoner
+    await run.request("GET /api/visiting-rooms", "/api/visiting-rooms")
+    prisoner_id = run.pick(run.samples.prisoner_ids)
+    await run.request("GET /api/visits/availability", f"/api/visits/availability?prisoner_id={prisoner_id}")
+
+
+@scenario("GET /api/incidents")
+async def browse_incidents(run: Run):
+    await run.request("GET /api/incidents", "/api/incidents?resolved=false&limit=100")
+    await run.request("GET /api/incidents", f"/api/incidents?prisoner_id={run.pick(run.samples.prisoner_ids)}")
+
+
+@scenario("GET /api/programs", "GET /api/prisoner-programs")
+async def browse_programs(run: Run):
+    await run.request("GET /api/programs", "/api/programs")
+    program_id = run.pick(run.samples.program_ids)
+    await run.request("GET /api/prisoner-programs", "/api/prisoner-programs", {"program_id": program_id})
+
+
+@scenario(
+    "GET /api/views/prisoner-details", "GET /api/views/cell-occupancy", "GET /api/views/upcoming-releases",
+    "GET /api/views/block-summary", "GET /api/views/staff-overview", "GET /api/views/release-forecast",
+)
+async def reports(run: Run):
+    await run.request("GET /api/views/prisoner-details", "/api/views/prisoner-details?limit=100")
+    await run.request("GET /api/views/cell-occupancy", "/api/views/cell-occupancy")
+    months = run.rng.randint(1, 12)
+    await run.request("GET /api/views/upcoming-releases", f"/api/views/upcoming-releases?months={months}")
+    await run.request("GET /api/views/block-summary", "/api/views/block-summary")
+    await run.request("GET /api/views/staff-overview", "/api/views/staff-overview")
+    block_id = run.pick(run.samples.block_ids)
+    await run.request("GET /api/views/release-forecast", f"/api/views/release-forecast?block_id={block_id}")
+
+
+@scenario("GET /api/export/{name}")
+async def export_report(run: Run):
+    await run.request("GET /api/export/{name}", "/api/export/block-summary?format=ndjson")
+
+
+@scenario("GET /api/crime-types", "GET /api/staff-roles", "GET /api/program-types", "GET /api/stats")
+async def dashboard(run: Run):
+    await run.request("GET /api/stats", "/api/stats")
+    await run.request("GET /api/crime-types", "/api/crime-types")
+    await run.request("GET /api/staff-roles", "/api/staff-roles")
+    await run.request("GET /api/program-types", "/api/program-types")
+
+
+@scenario("GET /api/health", "GET /api/admin/queries", "GET /metrics")
+async def monitoring(run: Run):
+    await run.request("GET /api/health", "/api/health")
+    await run.request("GET /api/admin/queries", "/api/admin/queries?limit=10")
+    await run.request("GET /metrics", "/metrics")
+
+
+@scenario("POST /api/{table}/import")
+async def validate_import(run: Run):
+    # A dry run validates the rows and rolls the merge back
+    lines = [
+        json.dumps({
+            "prisoner_number": f"LT{run.unique()}", "first_name": "Jan", "last_name": "Testowy",
+            "date_of_birth": "1980-01-01", "gender": "male", "nationality": "Polish", "status": "released",
+        })
+        for _ in range(20)
+    ]
+    await run.request(
+        "POST /api/{table}/import", "/api/prisoners/import?dry_run=true", content="\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+
+# ============================================
+# WRITE SCENARIOS
+# ============================================
+
+
+@scenario(
+    "POST /api/prisoners", "PUT /api/prisoners/{prisoner_id}", "DELETE /api/prisoners/{prisoner_id}",
+    "POST /api/sentences", "DELETE /api/sentences/{sentence_id}",
+    "POST /api/visits", "PUT /api/visits/{visit_id}", "DELETE /api/visits/{visit_id}",
+    "POST /api/incidents", "PUT /api/incidents/{incident_id}", "DELETE /api/incidents/{incident_id}",
+    "POST /api/prisoner-programs", "PUT /api/prisoner-programs/{enrollment_id}", "POST /api/batch",
+    writes=True,
+)
+async def prisoner_lifecycle(run: Run):
+    today = date.today().isoformat()
+    prisoner = await run.request("POST /api/prisoners", "/api/prisoners", json={
+        "prisoner_number": f"LT{run.unique()}", "first_name": "Jan", "last_name": "Testowy",
+        "date_of_birth": "1980-01-01", "gender": "male", "nationality": "Polish", "admission_date": today,
+        "status": "released",
+    })
+    if not prisoner:
+        return
+    prisoner_id = prisoner["id"]
+    await run.request(
+        "PUT /api/prisoners/{prisoner_id}", f"/api/prisoners/{prisoner_id}", json={**prisoner, "notes": "Load test"}
+    )
+
+    sentence = await run.request("POST /api/sentences", "/api/sentences", json={
+        "prisoner_id": prisoner_id, "crime_type_id": run.pick(run.samples.crime_type_ids),
+        "sentence_start_date": today, "sentence_years": 2, "court_name": "Load test court",
+        "case_number": f"LT {run.unique()}",
+    })
+    if sentence:
+        await run.request("DELETE /api/sentences/{sentence_id}", f"/api/sentences/{sentence['id']}")
+
+    visit = await run.request("POST /api/visits", "/api/visits", json={
+        "prisoner_id": prisoner_id, "visitor_id": run.pick(run.samples.visitor_ids), "visit_date": today,
+        "scheduled_start_time": "10:00", "scheduled_end_time": "11:00",
+        "approved_by_staff_id": run.pick(run.samples.staff_ids),
+    })
+    if visit:
+        await run.request(
+            "PUT /api/visits/{visit_id}", f"/api/visits/{visit['id']}", json={**visit, "status": "cancelled"}
+        )
+        await run.request("DELETE /api/visits/{visit_id}", f"/api/visits/{visit['id']}")
+
+    incident = await run.request("POST /api/incidents", "/api/incidents", json={
+        "prisoner_id": prisoner_id, "reported_by_staff_id": run.pick(run.samples.staff_ids),
+        "incident_date": datetime.now().isoformat(timespec="seconds"), "incident_type": "disobedience",
+        "severity": "minor", "description": "Load test",
+    })
+    if incident:
+        await run.request(
+            "PUT /api/incidents/{incident_id}", f"/api/incidents/{incident['id']}",
+            json={**incident, "is_resolved": True, "resolved_date": today},
+        )
+        await run.request("DELETE /api/incidents/{incident_id}", f"/api/incidents/{incident['id']}")
+
+    enrollment = await run.request("POST /api/prisoner-programs", "/api/prisoner-programs", json={
+        "prisoner_id": prisoner_id, "program_id": run.pick(run.samples.program_ids), "enrollment_date": today,
+        "status": "dropped",
+    })
+    if enrollment:
+        await run.request(
+            "PUT /api/prisoner-programs/{enrollment_id}", f"/api/prisoner-programs/{enrollment['id']}",
+            json={**enrollment, "notes": "Load test"},
+        )
+
+    await run.request("POST /api/batch", "/api/batch", json={"operations": [
+        {"op": "update", "resource": "prisoners", "id": prisoner_id, "data": {**prisoner, "notes": "Batch"}},
+    ]})
+    # Deleting the prisoner also deletes the enrollment
+    await run.request("DELETE /api/prisoners/{prisoner_id}", f"/api/prisoners/{prisoner_id}")
+
+
+@scenario("POST /api/cells", "PUT /api/cells/{cell_id}", "DELETE /api/cells/{cell_id}", writes=True)
+async def cell_lifecycle(run: Run):
+    cell = await run.request("POST /api/cells", "/api/cells", json={
+        "cell_code": f"LT{run.unique()}", "cell_block_id": run.pick(run.samples.block_ids), "floor_number": 1,
+        "capacity": 2,
+    })
+    if cell:
+        await run.request("PUT /api/cells/{cell_id}", f"/api/cells/{cell['id']}", json={**cell, "has_window": False})
+        await run.request("DELETE /api/cells/{cell_id}", f"/api/cells/{cell['id']}")
+
+
+@scenario("POST /api/staff", "PUT /api/staff/{staff_id}", "DELETE /api/staff/{staff_id}", writes=True)
+async def staff_lifecycle(run: Run):
+    unique = run.unique()
+    member = await run.request("POST /api/staff", "/api/staff", json={
+        "employee_id": f"LT{unique}", "first_name": "Anna", "last_name": "Testowa",
+        "role_id": run.pick(run.samples.role_ids), "date_of_birth": "1985-05-05", "gender": "female",
+        "hire_date": date.today().isoformat(), "email": f"lt{unique}@load.test", "salary": 5000,
+    })
+    if member:
+        await run.request("PUT /api/staff/{staff_id}", f"/api/staff/{member['id']}", json={**member, "salary": 5100})
+        await run.request("DELETE /api/staff/{staff_id}", f"/api/staff/{member['id']}")
+
+
+@scenario("POST /api/visitors", "PUT /api/visitors/{visitor_id}", "DELETE /api/visitors/{visitor_id}", writes=True)
+async def visitor_lifecycle(run: Run):
+    visitor = await run.request("POST /api/visitors", "/api/visitors", json={
+        "first_name": "Ewa", "last_name": "Testowa", "date_of_birth": "1990-09-09",
+        "id_document_type": "national_id", "id_document_number": f"LT{run.unique()}", "relationship_type": "friend",
+    })
+    if visitor:
+        await run.request(
+            "PUT /api/visitors/{visitor_id}", f"/api/visitors/{visitor['id']}",
+            json={**visitor, "phone": "+48500000000"},
+        )
+        await run.request("DELETE /api/visitors/{visitor_id}", f"/api/visitors/{visitor['id']}")
+
+
+# ============================================
+# RUNNING
+# ============================================
+
+
+async def api_routes(client: httpx.AsyncClient) -> set:
+    """Every "METHOD /path" the server documents, plus the undocumented /metrics."""
+    response = await client.get("/openapi.json")
+    response.raise_for_status()
+    routes = {"GET /metrics"}
+    for path, operations in response.json()["paths"].items():
+        routes.update(f"{method.upper()} {path}" for method in operations)
+    return routes
+
+
+async def run_level(
+    base_url: str, scenarios: list, samples: Samples, concurrency: int, duration: float, seed: int, run_id: str
+) -> dict:
+    """Run ``scenarios`` round-robin with ``concurrency`` workers for ``duration`` seconds (one pass if 0)."""
+    stats = defaultdict(RouteStats)
+    next_scenario = itertools.count()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        def more() -> bool:
+            return time.perf_counter() < deadline if duration else pending[0] < len(scenarios)
+
+        async def worker(number: int):
+            rng = random.Random(f"{seed}:{concurrency}:{number}")
+            run = Run(client, samples, rng, stats, f"{run_id}{concurrency:x}.{number:x}.")
+            while more():
+                index = next(next_scenario)
+                pending[0] = index + 1
+                await scenarios[index % len(scenarios)].run(run)
+
+        pending = [0]
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(number) for number in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [latency for route in stats.values() for latency in route.latencies]
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(all_latencies, sum(route.errors for route in stats.values()), elapsed),
+        "routes": {name: summarize(route.latencies, route.errors, elapsed) for name, route in sorted(stats.items())},
+    }
+
+
+def print_level(result: dict):
+    columns = ["requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print(f"\nConcurrency {result['concurrency']} ({result['elapsed_s']}s)")
+    print(f"{'route':<48}" + "".join(f"{column:>15}" for column in columns))
+    for name, summary in [*result["routes"].items(), ("TOTAL", result["total"])]:
+        print(f"{name:<48}" + "".join(f"{summary[column]:>15}" for column in columns))
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Print per-route p95 and throughput changes; returns the regressions beyond ``tolerance`` percent."""
+
+    def change(before: float, after: float) -> float:
+        return (after - before) / before * 100 if before else 0.0
+
+    regressions = []
+    for level, result in current["levels"].items():
+        before_level = baseline["levels"].get(level)
+        if before_level is None:
+            print(f"\nConcurrency {level}: not in the baseline")
+            continue
+        print(f"\nConcurrency {level} vs baseline {baseline.get('version') or ''}")
+        print(
+            f"{'route':<48}{'p95 before':>12}{'p95 now':>12}{'change':>9}"
+            f"{'rps before':>12}{'rps now':>12}{'change':>9}"
+        )
+        for name, summary in [*result["routes"].items(), ("TOTAL", result["total"])]:
+            before = before_level["total"] if name == "TOTAL" else before_level["routes"].get(name)
+            if before is None:
+                continue
+            p95 = change(before["p95_ms"], summary["p95_ms"])
+            rps = change(before["throughput_rps"], summary["throughput_rps"])
+            # Sub-millisecond differences are noise, whatever the percentage
+            slower = p95 > tolerance and summary["p95_ms"] - before["p95_ms"] > 1.0
+            flag = "  REGRESSION" if slower or rps < -tolerance else ""
+            if flag:
+                regressions.append((level, name))
+            print(
+                f"{name:<48}{before['p95_ms']:>12}{summary['p95_ms']:>12}{p95:>+8.1f}%"
+                f"{before['throughput_rps']:>12}{summary['throughput_rps']:>12}{rps:>+8.1f}%{flag}"
+            )
+    return regressions
+
+
+def git_version():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test every backend route and record latency baselines")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50], help="Concurrency levels to run")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument("--writes", action="store_true", help="Also run the create/update/delete scenarios")
+    parser.add_argument("--url", help="Test a running backend instead of starting one")
+    parser.add_argument("--mode", default="async", choices=["threaded", "async"], help="DB_MODE of a started backend")
+    parser.add_argument("--port", type=int, default=8100, help="Port used for the started backend")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Allowed p95/throughput change, percent")
+    args = parser.parse_args()
+
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    process = None if args.url else start_backend(args.mode, args.port)
+    try:
+        await wait_until_healthy(base_url)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+            samples = await collect_samples(client)
+            routes = await api_routes(client)
+            health = (await client.get("/api/health")).json()
+            dataset = (await client.get("/api/stats")).json()
+
+        scenarios = [s for s in SCENARIOS if args.writes or not s.writes]
+        covered = {route for s in scenarios for route in s.routes}
+        for route in sorted(routes - covered - set(SKIPPED_ROUTES)):
+            print(f"Not exercised: {route}" + ("" if args.writes else " (see --writes)"))
+        for route, reason in SKIPPED_ROUTES.items():
+            print(f"Skipped: {route} ({reason})")
+
+        # One warm-up pass fills pools and caches, and shows failing scenarios before the measured runs
+        run_id = f"{time.time_ns() // 1000000 % 0x1000000:06x}"
+        warmup = await run_level(base_url, scenarios, samples, 1, 0.0, args.seed, run_id)
+        for name, summary in warmup["routes"].items():
+            if summary["errors"]:
+                print(f"Warning: {name} failed during warm-up")
+
+        levels = {}
+        for concurrency in args.concurrency:
+            print(f"Running {len(scenarios)} scenarios at concurrency {concurrency} for {args.duration}s...")
+            levels[str(concurrency)] = await run_level(
+                base_url, scenarios, samples, concurrency, args.duration, args.seed, run_id
+            )
+            print_level(levels[str(concurrency)])
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "version": git_version(),
+        "base_url": base_url,
+        "mode": None if args.url else args.mode,
+        "duration_s": args.duration,
+        "writes": args.writes,
+        "pool": health.get("pool"),
+        "dataset": dataset,
+        "skipped": SKIPPED_ROUTES,
+        "levels": levels,
+    }
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))